@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+'''
+ NAME: bench_xml_parser.py | version: 0.3
+ CYBERNETHUNTER Version: 0.3
+ AUTHOR: Diego Perez (@darkquasar) - 2026
+ DESCRIPTION: Micro-benchmark of the xml_parser parsermod alone (no output pipe) against synthetic evtxexport-style XML
+ (see generators.write_evtxexport_xml). End-to-end benchmarks of every parsermod and output type live in run_benchmarks.py
+
+ USAGE:
+    python benchmarks/bench_xml_parser.py --records 200000 --xmlparsetype flat --xmlengine lxml
+    python benchmarks/bench_xml_parser.py --records 200000 --xmlparsetype flat --xmlengine compare
+
+ Updates:
+        v0.1 - 18-10-2026 - Created script.
+        v0.2 - 18-10-2026 - Moved the XML generator to generators.py
+        v0.3 - 18-10-2026 - "compare" runs every engine over the same file and reports the speedup over etree
+
+'''
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cybernethunter.parsermods import xml_parser
+from generators import write_evtxexport_xml
+
+XML_ENGINES = ["etree", "lxml"]
+
+def main():
+
+    parser = argparse.ArgumentParser(description="CYBERNETHUNTER xml_parser benchmark")
+    parser.add_argument("-r", "--records", type=int, default=100000)
+    parser.add_argument("-x", "--xmlparsetype", type=str, choices=["flat", "nested"], default="flat")
+    parser.add_argument("-xe", "--xmlengine", type=str, choices=["etree", "lxml", "compare"], default="etree", help="compare: run every engine over the same file")
+    parser.add_argument("-rp", "--repeat", type=int, default=1, help="Runs of each engine, the fastest one is reported")
+    pargs = parser.parse_args()
+
+    engines = XML_ENGINES if pargs.xmlengine == "compare" else [pargs.xmlengine]
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, 'evtxexport.xml')
+        write_evtxexport_xml(file_path, pargs.records)
+        file_size = os.path.getsize(file_path)
+
+        for engine in engines:
+            records_count, elapsed = min((run_parser(file_path, pargs.xmlparsetype, engine) for _ in range(pargs.repeat)), key=lambda result: result[1])
+            results[engine] = elapsed
+            print('{:<6} {} records / {:.1f} MB in {:.2f} seconds: {:.0f} records/s, {:.1f} MB/s'.format(engine, records_count, file_size / 1e6, elapsed, records_count / elapsed, file_size / 1e6 / elapsed))
+
+    if len(results) > 1:
+        for engine in engines[1:]:
+            print('{} is {:.2f}x the speed of etree ({} mode)'.format(engine, results['etree'] / results[engine], pargs.xmlparsetype))
+
+def run_parser(file_path, xmlparsetype, xmlengine):
+    # Parses the whole file, returns the number of records and the elapsed seconds
+
+    parsermod = xml_parser.ParserMod(file_path, xmlparsetype=xmlparsetype, xmlengine=xmlengine)
+
+    start_time = time.perf_counter()
+    records_count = 0
+    for record in parsermod.execute():
+        if record != None:
+            records_count = records_count + 1
+
+    return records_count, time.perf_counter() - start_time
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+
+'''
+ NAME: generators.py | version: 0.1
+ CYBERNETHUNTER Version: 0.3
+ AUTHOR: Diego Perez (@darkquasar) - 2026
+ DESCRIPTION: Generators of synthetic inputs for the benchmarks, each one writes "records" records to "file_path":
+    - write_evtxexport_xml: evtxexport-style XML (events with schema namespace and <Data Name=> fields wrapped within <itemsList>)
+    - write_kape_csv: KAPE-like CSV with non-ascii header keys (and UTF-8 BOM), quoted fields with embedded commas, quotes and newlines
+    - write_dns_debug_log: Windows DNS debug logs in any of the dialects supported by dns_debug_logs_parser
+
+ USAGE:
+    python benchmarks/generators.py --input-type dns_windows_2012r2 --records 100000 --output-file dns.log
+
+ Updates:
+        v0.1 - 18-10-2026 - Created script.
+
+'''
+
+import argparse
+import csv
+import random
+
+# Seeded so that every run of the benchmarks parses the very same inputs
+RANDOM_SEED = 4624
+
+EVENT_TEMPLATE = """<Event xmlns="http://schemas.microsoft.com/win/2004/08/events/event">
+  <System>
+    <Provider Name="{provider}" Guid="{{54849625-5478-4994-a5ba-3e3b0328c30d}}"/>
+    <EventID>{event_id}</EventID>
+    <Version>2</Version>
+    <Level>0</Level>
+    <Task>12544</Task>
+    <Opcode>0</Opcode>
+    <Keywords>0x8020000000000000</Keywords>
+    <TimeCreated SystemTime="2020-11-19T10:{minute:02d}:{second:02d}.123456Z"/>
+    <EventRecordID>{record_id}</EventRecordID>
+    <Correlation/>
+    <Execution ProcessID="488" ThreadID="3220"/>
+    <Channel>{channel}</Channel>
+    <Computer>WKS{host:03d}.corp.local</Computer>
+    <Security UserID="S-1-5-18"/>
+  </System>
+  <EventData>
+{event_data}  </EventData>
+</Event>
+"""
+
+# Event ID -> (channel, provider, list of Data Name fields)
+EVENT_TYPES = {
+    4624: ('Security', 'Microsoft-Windows-Security-Auditing', ['SubjectUserSid', 'SubjectUserName', 'SubjectDomainName', 'SubjectLogonId', 'TargetUserName', 'LogonType', 'IpAddress']),
+    4688: ('Security', 'Microsoft-Windows-Security-Auditing', ['SubjectUserSid', 'SubjectUserName', 'NewProcessId', 'NewProcessName', 'TokenElevationType', 'CommandLine', 'ParentProcessName']),
+    1: ('Microsoft-Windows-Sysmon/Operational', 'Microsoft-Windows-Sysmon', ['RuleName', 'UtcTime', 'ProcessGuid', 'ProcessId', 'Image', 'CommandLine', 'CurrentDirectory', 'User', 'Hashes', 'ParentImage']),
+    7045: ('System', 'Service Control Manager', ['ServiceName', 'ImagePath', 'ServiceType', 'StartType', 'AccountName']),
+}
+
+KAPE_HEADER = ['\ufeffTimeCreated', 'Computer', 'Nom d\'hôte', 'Größe', 'Ünïcode Path', 'Payload', 'EventId', 'Map Description']
+
+DOMAINS = ['www.google.com', 'login.microsoftonline.com', 'update.microsoft.com', 'cdn.example.org', 'mail.corp.local', 'abcdef0123.evil-c2.net', 'static.xx.fbcdn.net']
+RECORD_TYPES = ['A', 'AAAA', 'PTR', 'MX', 'TXT']
+
+DNS_DIALECTS = ['windows_2003', 'windows_2008r2', 'windows_2012r2', 'information']
+
+def write_evtxexport_xml(file_path, records):
+    # Writes "records" events wrapped within an <itemsList> root node like the evtxexport loop does
+
+    rng = random.Random(RANDOM_SEED)
+    event_ids = list(EVENT_TYPES)
+
+    with open(file_path, 'w', encoding='utf-8') as xml_file:
+        xml_file.write('<?xml version="1.0" encoding="UTF-8"?>\n<itemsList>\n')
+
+        for i in range(records):
+            event_id = event_ids[i % len(event_ids)]
+            channel, provider, fields = EVENT_TYPES[event_id]
+            event_data = ''.join('    <Data Name="{}">{}</Data>\n'.format(field, 'value-{}-{}'.format(field, rng.randint(0, 999))) for field in fields)
+
+            xml_file.write(EVENT_TEMPLATE.format(
+                provider=provider, event_id=event_id, minute=(i // 60) % 60, second=i % 60,
+                record_id=i, channel=channel, host=i % 250, event_data=event_data
+            ))
+
+        xml_file.write('</itemsList>\n')
+
+def write_kape_csv(file_path, records):
+    # Writes a KAPE-like (EvtxECmd) CSV, every 10th record carries a multiline payload
+
+    rng = random.Random(RANDOM_SEED)
+
+    with open(file_path, 'w', encoding='utf-8', newline='') as csv_file:
+        writer = csv.writer(csv_file, quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(KAPE_HEADER)
+
+        for i in range(records):
+            if i % 10 == 0:
+                payload = 'powershell.exe -enc {}\r\nStart-Process "cmd.exe", "/c whoami"\r\n# line, with, commas'.format(rng.getrandbits(64))
+            else:
+                payload = 'C:\\Windows\\System32\\svchost.exe -k netsvcs -p -s {}'.format(rng.choice(['Schedule', 'BITS', 'Winmgmt']))
+
+            writer.writerow([
+                '2020-11-19 10:{:02d}:{:02d}.1234567'.format((i // 60) % 60, i % 60),
+                'WKS{:03d}.corp.local'.format(i % 250),
+                'hôte-{}'.format(i % 97),
+                rng.randint(0, 1 << 20),
+                'C:\\Users\\user{}\\Téléchargements\\fichier{}.exe'.format(i % 97, i),
+                payload,
+                rng.choice([4624, 4688, 7045]),
+                'Synthetic event number {}'.format(i)
+            ])
+
+def write_dns_debug_log(file_path, records, dialect='windows_2003'):
+    # Writes a Windows DNS debug log in "dialect". About half the records are queries from internal clients,
+    # the rest are responses, queries from external clients or other events that the parser discards.
+
+    rng = random.Random(RANDOM_SEED)
+
+    with open(file_path, 'w', encoding='utf-8') as dns_file:
+
+        if dialect in ['windows_2003', 'windows_2008r2']:
+            # Preamble written by the DNS server at the top of the log
+            dns_file.write('DNS Server log file creation at 11/19/2020 10:00:00 AM\nLog file wrap at 11/19/2020 10:00:00 AM\n\nMessage logging key (for packets - other items use a subset of these fields):\n\n')
+
+        for i in range(records):
+            domain = rng.choice(DOMAINS)
+            record_type = rng.choice(RECORD_TYPES)
+            client = '10.0.{}.{}'.format(i % 250, rng.randint(1, 254)) if i % 4 != 3 else '203.0.113.{}'.format(rng.randint(1, 254))
+            is_response = i % 2 == 1
+            minute, second = (i // 60) % 60, i % 60
+
+            if dialect in ['windows_2003', 'windows_2008r2']:
+                labels = ''.join('({}){}'.format(len(label), label) for label in domain.split('.')) + '(0)'
+                flags = 'R Q [8081   DR  NOERROR]' if is_response else '  Q [0001   D   NOERROR]'
+
+                if dialect == 'windows_2003':
+                    timestamp = '20201119 10:{:02d}:{:02d}'.format(minute, second)
+                else:
+                    timestamp = '19/11/2020 10:{:02d}:{:02d} AM'.format(minute, second)
+
+                dns_file.write('{} 0AD4 PACKET  0000000002D6F0B0 UDP {} {:<15} {:04x} {} {:<5} {}\n'.format(
+                    timestamp, 'Snd' if is_response else 'Rcv', client, i % 65536, flags, record_type, labels
+                ))
+
+            elif dialect == 'windows_2012r2':
+                # Whitespace separated export of the DNS analytical channel
+                event_id = '257,' if is_response else '256,'
+                filetime = 132502284000000000 + (minute * 60 + second) * 10000000
+                fields = ['Microsoft-Windows-DNS-Server', 'Analytical', 'Information', event_id, '0,', '0,', '0,', '0x8000000000000000,',
+                          'LOOKUP,', 'WIN-DNS01,', '1,', '0,', '4,', '0,', '0,', '{},'.format(i % 65536), '0,', '{},'.format(filetime),
+                          '0,', '0,', '1,', '"InterfaceIP=10.0.0.1",', '"{}",'.format(client), '{},'.format(i % 65536), '"{}.",'.format(domain)]
+                dns_file.write(' '.join(fields) + '\n')
+
+            else:
+                event_id = '257' if is_response else '256'
+                dns_file.write('Information;11/19/2020 10:{:02d}:{:02d} AM;Microsoft-Windows-DNS-Server;{};(1);LOOKUP;TCP=0;Source={};InterfaceIP=10.0.0.1;QNAME={}.\n'.format(
+                    minute, second, event_id, client, domain
+                ))
+
+# Input type -> (generator, keyword arguments)
+INPUT_GENERATORS = {
+    'evtxexport_xml': (write_evtxexport_xml, {}),
+    'kape_csv': (write_kape_csv, {}),
+}
+INPUT_GENERATORS.update({'dns_{}'.format(dialect): (write_dns_debug_log, {'dialect': dialect}) for dialect in DNS_DIALECTS})
+
+def generate_input(input_type, file_path, records):
+
+    generator, kwargs = INPUT_GENERATORS[input_type]
+    generator(file_path, records, **kwargs)
+
+def main():
+
+    parser = argparse.ArgumentParser(description="CYBERNETHUNTER synthetic input generator")
+    parser.add_argument("-i", "--input-type", type=str, choices=sorted(INPUT_GENERATORS), required=True)
+    parser.add_argument("-r", "--records", type=int, default=100000)
+    parser.add_argument("-o", "--output-file", type=str, required=True)
+    pargs = parser.parse_args()
+
+    generate_input(pargs.input_type, pargs.output_file, pargs.records)
+
+if __name__ == '__main__':
+    main()
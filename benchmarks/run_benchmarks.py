@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+
+'''
+ NAME: run_benchmarks.py | version: 0.1
+ CYBERNETHUNTER Version: 0.3
+ AUTHOR: Diego Perez (@darkquasar) - 2026
+ DESCRIPTION: End-to-end benchmark suite. Synthetic inputs are generated once (see generators.py) and every benchmark
+ runs cybernethunter_cli.py in its own process (parsermod -> transforms -> output pipe), so that the peak RSS of each
+ benchmark is measured in isolation. The records/s reported by the pipeline stats (--stats-file) and the peak RSS of each
+ benchmark are appended to a JSON history file and compared against the previous run with the same number of records,
+ a drop in throughput or a growth in memory beyond the threshold is reported as a regression.
+
+ USAGE:
+    python benchmarks/run_benchmarks.py --records 100000
+    python benchmarks/run_benchmarks.py --benchmark dns_ --benchmark xml_flat --fail-on-regression
+    python benchmarks/run_benchmarks.py --list
+
+ Updates:
+        v0.1 - 18-10-2026 - Created script.
+
+'''
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from datetime import datetime
+
+from generators import DNS_DIALECTS, generate_input
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI_PATH = os.path.join(REPO_DIR, 'cybernethunter_cli.py')
+DEFAULT_HISTORY_FILE = os.path.join(REPO_DIR, 'benchmarks', 'history.json')
+
+# name -> (input type, cybernethunter_cli.py arguments). Kafka and rabbitmq pipes need a broker and are not part of the suite.
+BENCHMARKS = {
+    # parsermods
+    'xml_flat_etree_json': ('evtxexport_xml', ['-m', 'xml_parser', '-x', 'flat', '-xe', 'etree', '-op', 'file', '-ot', 'json']),
+    'xml_flat_lxml_json': ('evtxexport_xml', ['-m', 'xml_parser', '-x', 'flat', '-xe', 'lxml', '-op', 'file', '-ot', 'json']),
+    'xml_nested_etree_json': ('evtxexport_xml', ['-m', 'xml_parser', '-x', 'nested', '-xe', 'etree', '-op', 'file', '-ot', 'json']),
+    'csv_pandas_json': ('kape_csv', ['-m', 'csv_parser', '-ce', 'pandas', '-op', 'file', '-ot', 'json']),
+    'csv_csvmodule_json': ('kape_csv', ['-m', 'csv_parser', '-ce', 'csv', '-op', 'file', '-ot', 'json']),
+    'csv_csvmodule_multilines_json': ('kape_csv', ['-m', 'csv_parser', '-ce', 'csv', '-cm', '-op', 'file', '-ot', 'json']),
+    # output types
+    'xml_flat_etree_csv': ('evtxexport_xml', ['-m', 'xml_parser', '-op', 'file', '-ot', 'csv']),
+    'xml_flat_etree_tsv': ('evtxexport_xml', ['-m', 'xml_parser', '-op', 'file', '-ot', 'tsv']),
+    'xml_flat_etree_csv_scan': ('evtxexport_xml', ['-m', 'xml_parser', '-op', 'file', '-ot', 'csv', '-tm', 'scan']),
+    'xml_flat_etree_sqlite': ('evtxexport_xml', ['-m', 'xml_parser', '-op', 'file', '-ot', 'sqlite']),
+    'xml_flat_etree_parquet': ('evtxexport_xml', ['-m', 'xml_parser', '-op', 'file', '-ot', 'parquet']),
+    'xml_flat_etree_arrow': ('evtxexport_xml', ['-m', 'xml_parser', '-op', 'file', '-ot', 'arrow']),
+    'xml_flat_etree_stdout_csv': ('evtxexport_xml', ['-m', 'xml_parser', '-op', 'stdout', '-ot', 'csv']),
+}
+BENCHMARKS.update({
+    'dns_{}_json'.format(dialect): ('dns_{}'.format(dialect), ['-m', 'dns_debug_logs_parser', '-op', 'file', '-ot', 'json']) for dialect in DNS_DIALECTS
+})
+
+def run_benchmark(name, input_file, cli_args, work_dir):
+    # Runs a single benchmark in a child process and returns its results
+
+    output_file = os.path.join(work_dir, '{}.out'.format(name))
+    stats_file = os.path.join(work_dir, '{}.stats.json'.format(name))
+    log_file = os.path.join(work_dir, '{}.log'.format(name))
+
+    command = [sys.executable, CLI_PATH, '-a', 'parse', '-f', input_file, '-of', output_file, '-sf', stats_file, '-pi', '0'] + cli_args
+
+    start_time = time.perf_counter()
+    with open(log_file, 'w') as log_output:
+        process = subprocess.Popen(command, cwd=work_dir, stdout=subprocess.DEVNULL, stderr=log_output)
+        # wait4 returns the resource usage of this child only, unlike getrusage(RUSAGE_CHILDREN)
+        _, status, rusage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start_time
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak_rss = rusage.ru_maxrss if sys.platform == 'darwin' else rusage.ru_maxrss * 1024
+
+    result = {
+        'status': 'ok',
+        'wall_seconds': round(elapsed, 3),
+        'peak_rss_mb': round(peak_rss / 1e6, 1),
+        'input_mb': round(os.path.getsize(input_file) / 1e6, 2)
+    }
+
+    if os.waitstatus_to_exitcode(status) != 0 or not os.path.exists(stats_file):
+        with open(log_file, 'r', errors='replace') as log_output:
+            result['status'] = 'failed'
+            result['error'] = log_output.read()[-1000:]
+        return result
+
+    with open(stats_file, 'r') as stats_input:
+        stats = json.load(stats_input)
+
+    result['records'] = stats['records']
+    result['pipeline_seconds'] = stats['elapsed_seconds']
+    result['records_per_second'] = stats['records_per_second']
+    result['mb_per_second'] = round(stats['input_bytes_per_second'] / 1e6, 2)
+    result['bound_by'] = stats['bound_by']
+    result['stages'] = {stage: {'seconds': values['seconds'], 'p50_us': values['latency_us']['p50'], 'p99_us': values['latency_us']['p99']} for stage, values in stats['stages'].items()}
+
+    return result
+
+def find_previous_run(history, records):
+    # Most recent run of the suite with the same number of records
+
+    for run in reversed(history['runs']):
+        if run['records'] == records:
+            return run
+
+    return None
+
+def find_regressions(results, previous_run, threshold):
+
+    regressions = []
+
+    if previous_run == None:
+        return regressions
+
+    for name, result in results.items():
+        previous = previous_run['results'].get(name)
+        if previous == None or previous['status'] != 'ok' or result['status'] != 'ok':
+            continue
+
+        if result['records_per_second'] < previous['records_per_second'] * (1 - threshold):
+            regressions.append('{}: records/s dropped from {:.0f} to {:.0f}'.format(name, previous['records_per_second'], result['records_per_second']))
+
+        if result['peak_rss_mb'] > previous['peak_rss_mb'] * (1 + threshold):
+            regressions.append('{}: peak RSS grew from {:.1f} MB to {:.1f} MB'.format(name, previous['peak_rss_mb'], result['peak_rss_mb']))
+
+    return regressions
+
+def get_git_commit():
+
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+
+    parser = argparse.ArgumentParser(description="CYBERNETHUNTER end-to-end benchmark suite")
+    parser.add_argument("-r", "--records", type=int, default=50000, help="Number of records of each synthetic input")
+    parser.add_argument("-b", "--benchmark", type=str, action="append", default=None, help="Only run the benchmarks whose name contains this string, can be repeated")
+    parser.add_argument("-hf", "--history-file", type=str, default=DEFAULT_HISTORY_FILE, help="JSON file where the results of each run are appended")
+    parser.add_argument("-t", "--threshold", type=float, default=0.10, help="Relative drop in records/s (or growth in peak RSS) reported as a regression")
+    parser.add_argument("-fr", "--fail-on-regression", action="store_true", default=False, help="Exit with a non-zero code when a regression is found")
+    parser.add_argument("-l", "--list", action="store_true", default=False, help="List the benchmarks and exit")
+    pargs = parser.parse_args()
+
+    selected = [name for name in BENCHMARKS if pargs.benchmark == None or any(pattern in name for pattern in pargs.benchmark)]
+
+    if pargs.list:
+        for name in selected:
+            print('{:<30} {:<20} {}'.format(name, BENCHMARKS[name][0], ' '.join(BENCHMARKS[name][1])))
+        return
+
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix='cybernethunter_bench_') as work_dir:
+
+        input_files = {}
+        for name in selected:
+            input_type = BENCHMARKS[name][0]
+            if input_type not in input_files:
+                input_files[input_type] = os.path.join(work_dir, 'input_{}'.format(input_type))
+                print('Generating {} records of {}'.format(pargs.records, input_type))
+                generate_input(input_type, input_files[input_type], pargs.records)
+
+        print('\n{:<30} {:>10} {:>12} {:>10} {:>10} {:>10}  {}'.format('benchmark', 'records', 'records/s', 'MB/s', 'RSS MB', 'wall s', 'bound by'))
+
+        for name in selected:
+            input_type, cli_args = BENCHMARKS[name]
+            result = run_benchmark(name, input_files[input_type], cli_args, work_dir)
+            results[name] = result
+
+            if result['status'] == 'ok':
+                print('{:<30} {:>10} {:>12.0f} {:>10.2f} {:>10.1f} {:>10.2f}  {}'.format(name, result['records'], result['records_per_second'], result['mb_per_second'], result['peak_rss_mb'], result['wall_seconds'], result['bound_by']))
+            else:
+                print('{:<30} FAILED: {}'.format(name, result['error'].strip().splitlines()[-1] if result['error'].strip() else 'no output'))
+
+    if os.path.exists(pargs.history_file):
+        with open(pargs.history_file, 'r') as history_input:
+            history = json.load(history_input)
+    else:
+        history = {'runs': []}
+
+    regressions = find_regressions(results, find_previous_run(history, pargs.records), pargs.threshold)
+
+    history['runs'].append({
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': get_git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'records': pargs.records,
+        'results': results
+    })
+
+    with open(pargs.history_file, 'w') as history_output:
+        json.dump(history, history_output, indent=2)
+
+    print('\nResults appended to {}'.format(pargs.history_file))
+
+    if len(regressions) > 0:
+        print('\nRegressions (threshold {:.0%}):'.format(pargs.threshold))
+        for regression in regressions:
+            print('  ' + regression)
+
+        if pargs.fail_on_regression:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
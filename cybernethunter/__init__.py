@@ -7,10 +7,18 @@ __license__ = "GPLv3"
 __stable__ = True
 __version__ = "3.0"
 
+import importlib
 import sys
 sys.path.append("cybernethunter")
 
-from . import helpermods
-from . import parsermods
-from . import huntmods
-from . import outputmods
\ No newline at end of file
+# Subpackages are imported on first access (PEP 562) so that "import cybernethunter" doesn't
+# pull in the heavy dependencies of every parser and output module
+SUBPACKAGES = ["connectors", "helpermods", "huntmods", "outputmods", "parsermods", "streamers"]
+
+def __getattr__(name):
+    if name in SUBPACKAGES:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+def __dir__():
+    return sorted(list(globals().keys()) + SUBPACKAGES)
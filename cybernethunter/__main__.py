@@ -4,12 +4,13 @@ import os
 import sys
 
 # If we are running with `python -m cybernethunter`
-# Add the current dir to the PATH env so as to make CyberNetHunter available as a package
-if __package__ == '':
-    path = os.path.dirname(os.path.dirname(__file__))
+# Add the parent dir of the package to the PATH env so as to make CyberNetHunter available as a package
+# and its commandline module (cybernethunter_cli.py) importable
+path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if path not in sys.path:
     sys.path.insert(0, path)
 
-from . import cybernethunter_cli as cycli
+import cybernethunter_cli as cycli
 
 if __name__ == '__main__':
     sys.exit(cycli.main())
\ No newline at end of file
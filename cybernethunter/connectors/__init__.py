@@ -1,4 +1,15 @@
 # -*- coding: utf-8 -*-
 # 2018-2020 Diego Perez (@darkquassar / https://linkedin.com/in/diegope)
 
-from . import umbrella_connector
\ No newline at end of file
+import importlib
+
+# Registry of the available connectors, modules are only imported when they are first accessed
+CONNECTORS = ["umbrella_connector"]
+
+def __getattr__(name):
+    if name in CONNECTORS:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+def __dir__():
+    return sorted(list(globals().keys()) + CONNECTORS)
@@ -1,14 +1,21 @@
 #!/usr/bin/env python3
 
 '''
- NAME: umbrella_connector.py | version: 0.1
+ NAME: umbrella_connector.py | version: 0.5
  CYBERNETHUNTER Version: 0.3
  AUTHOR: Diego Perez (@darkquasar) - 2020
  DESCRIPTION: Connector that wraps some of Cisco Umbrella's API functionalities
-    
- Updates: 
+
+ Updates:
         v0.1 - 24-11-2020 - Created script
-    
+        v0.2 - 18-10-2026 - Time windows are fetched concurrently through a pooled HTTP session, paced by a token bucket tuned
+                            to Umbrella's 5 requests per second. Requests answered with 429 (honouring Retry-After) or 5xx are
+                            retried with backoff, the API urls are configurable (ex: to test against a local mock server)
+        v0.3 - 18-10-2026 - Adaptive time windows: windows that hit records_limit are bisected and queried again, sparse windows
+                            are coalesced and the density of records of each query is remembered across runs
+        v0.4 - 18-10-2026 - On-disk cache of the fetched windows, only the gaps of the time range that are not cached are fetched
+        v0.5 - 18-10-2026 - Record streaming mode (stream_umbrella_api_activity_records) with vectorized timestamp conversion per batch
+
  ToDo:
         1. ----.
 
@@ -19,31 +26,174 @@ import logging
 import numpy as np
 import os
 import pandas as pd
+import random
 import re
 import requests
 import sys
+import threading
 import time
 
-from cybernethunter.helpermods import utils
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from cybernethunter.helpermods import response_cache, utils
 from datetime import datetime, timedelta
 from enum import Enum
 
+# Default Umbrella API urls, the connector can be pointed somewhere else with api_base_url / auth_url
+UMBRELLA_API_BASE_URL = 'https://reports.api.umbrella.com/v2'
+UMBRELLA_AUTH_URL = 'https://management.api.umbrella.com/auth/v2/oauth2/token'
+
+# Responses with these codes are retried with backoff
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Adaptive windows: target number of records per window (as a fraction of records_limit), max growth of the window size
+# from one window to the next and bounds of the window size in milliseconds
+ADAPTIVE_TARGET_FILL = 0.5
+ADAPTIVE_MAX_GROWTH = 4
+MIN_WINDOW_MS = 1000
+MAX_WINDOW_MS = 7 * 24 * 60 * 60 * 1000
+
+# Density of records per org/endpoint/domains filter remembered across runs
+DEFAULT_DENSITY_FILE = os.path.join(os.path.expanduser('~'), '.cybernethunter', 'umbrella_window_density.json')
+
+# Records of the fetched windows, see response_cache.ResponseCache. Windows that end less than CACHE_MIN_AGE_MS ago are not
+# cached since Umbrella may still be ingesting their events.
+DEFAULT_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.cybernethunter', 'umbrella_cache.sqlite')
+CACHE_MIN_AGE_MS = 30 * 60 * 1000
+
+class TokenBucket:
+    # Thread-safe token bucket: "rate" tokens are added per second up to "capacity", acquire() blocks until
+    # a token is available. With a capacity of 1 requests are evenly spaced by 1/rate seconds.
+
+    def __init__(self, rate:float, capacity:float=1):
+
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+
+                if self.tokens >= 1:
+                    self.tokens = self.tokens - 1
+                    return
+
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+    def pause(self, seconds:float):
+        # Empties the bucket so that no request is sent by any thread during the next "seconds" (ex: Retry-After of a 429)
+
+        with self.lock:
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+class WindowDensity:
+    # Exponentially weighted average of the records per millisecond returned by each org/endpoint/domains filter,
+    # persisted to a JSON file so that the next runs start with a good window size
+
+    def __init__(self, density_file:str=None, alpha:float=0.3):
+
+        self.density_file = density_file
+        self.alpha = alpha
+        self.densities = {}
+        self.lock = threading.Lock()
+
+        if self.density_file != None and os.path.exists(self.density_file):
+            try:
+                with open(self.density_file, 'r') as density_input:
+                    self.densities = json.load(density_input)
+            except (OSError, ValueError):
+                self.densities = {}
+
+    def get_key(self, org_id:str, endpoint:str, domains_filter:list) -> str:
+        return '{}/{}/{}'.format(org_id, endpoint, ','.join(sorted(domains_filter)) if len(domains_filter) > 0 else '*')
+
+    def get(self, key:str):
+
+        density = self.densities.get(key)
+
+        return density['records_per_minute'] / 60000 if density != None else None
+
+    def update(self, key:str, records_per_ms:float) -> float:
+
+        with self.lock:
+            density = self.densities.get(key)
+            records_per_minute = records_per_ms * 60000
+
+            if density != None:
+                records_per_minute = self.alpha * records_per_minute + (1 - self.alpha) * density['records_per_minute']
+
+            self.densities[key] = {'records_per_minute': records_per_minute, 'updated': datetime.now().isoformat(timespec='seconds')}
+
+        return records_per_minute / 60000
+
+    def save(self):
+
+        if self.density_file == None:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.density_file)), exist_ok=True)
+            with open(self.density_file, 'w') as density_output:
+                json.dump(self.densities, density_output, indent=2)
+        except OSError:
+            pass
+
 class Connector:
-    
-    def __init__(self):
-        
+
+    def __init__(self, api_base_url:str=UMBRELLA_API_BASE_URL, auth_url:str=UMBRELLA_AUTH_URL, requests_per_second:float=4.8, max_workers:int=5, max_retries:int=8, request_timeout:int=60, density_file:str=DEFAULT_DENSITY_FILE, cache_file:str=DEFAULT_CACHE_FILE, cache_ttl_hours:float=168, cache_max_size_mb:int=1024):
+
         # Setup logging
         self.utilities = utils.HelperMod()
         self.logger = self.utilities.get_logger('CYBERNETHUNTER.CONNECTORS.UMBRELLA')
         self.logger.info('Initializing {}'.format(__name__))
-        
+
+        # api_base_url / auth_url: Umbrella's reporting and authentication APIs
+        # requests_per_second: rate of the token bucket shared by all the requests of the connector, just under the 5 req/s
+        # allowed by Umbrella so that network jitter doesn't push a one second window over the limit
+        # max_workers: number of time windows fetched at the same time
+        # max_retries: number of times a request answered with 429/5xx (or failing to connect) is retried
+        # density_file: JSON file where the density of records of each query is remembered (adaptive windows), None keeps it in memory
+        # cache_file: SQLite file where the records of the fetched windows are cached, None disables the cache
+        # cache_ttl_hours / cache_max_size_mb: cached windows expire after cache_ttl_hours, the least recently used ones are
+        # evicted when the cache grows beyond cache_max_size_mb
+        self.api_base_url = api_base_url.rstrip('/')
+        self.auth_url = auth_url
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.request_timeout = request_timeout
+        self.rate_limiter = TokenBucket(requests_per_second)
+        self.window_density = WindowDensity(density_file)
+        self.response_cache = response_cache.ResponseCache(cache_file, ttl_seconds=cache_ttl_hours * 3600, max_size_bytes=cache_max_size_mb * 1024 * 1024) if cache_file != None else None
+        # Hit/miss summary of the cache for the last time range fetched
+        self.cache_summary = None
+
+        # Keep-alive connections are reused across requests, one per worker
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.umbrella_bearer_token = None
+        self.umbrella_bearer_token_start_time = None
+        self.basic_auth_b64 = None
+        self.token_lock = threading.Lock()
+
     def increment_datetime_by_minutes(self, timestamp:str, minutes:int):
         dt = datetime.fromisoformat(timestamp) + timedelta(minutes=minutes)
-        
+
         while True:
             yield dt.isoformat()
             dt = dt + timedelta(minutes=minutes)
-        
+
 
     def timestamp_to_unixepoch_ms(self, timestamp:str):
         # Convert from ISO format first, then grab int64 representation and multiply by 1000 to get milliseconds
@@ -59,8 +209,6 @@ class Connector:
         ip = 'activity/ip'
 
     def umbrella_authenticate(self, basic_auth_b64):
-        
-        url = "https://management.api.umbrella.com/auth/v2/oauth2/token"
 
         payload = {}
         headers = {
@@ -68,50 +216,293 @@ class Connector:
         'Authorization': 'Basic {}'.format(basic_auth_b64)
         }
 
-        response = requests.request("POST", url, headers=headers, data = payload)
+        response = self.session.request("POST", self.auth_url, headers=headers, data=payload, timeout=self.request_timeout)
         bearer_token = json.loads(response.text)
 
-        # We will store the token in a property and also store the 
-        # time it was requested so that we can renew it before 
+        # We will store the token in a property and also store the
+        # time it was requested so that we can renew it before
         # 3600s (1h) have elapsed
         self.umbrella_bearer_token = bearer_token['access_token']
         self.umbrella_bearer_token_start_time = datetime.now()
         self.basic_auth_b64 = basic_auth_b64
 
+    def refresh_bearer_token(self):
+        # Re-authenticates when the bearer token is about to expire, to be safe we do it at >=3500 seconds.
+        # Only one of the worker threads renews the token.
+
+        if self.basic_auth_b64 == None or self.umbrella_bearer_token_start_time == None:
+            return
+
+        with self.token_lock:
+            if (datetime.now() - self.umbrella_bearer_token_start_time) >= timedelta(seconds=3500):
+                self.umbrella_authenticate(self.basic_auth_b64)
+
+    def umbrella_api_request(self, url:str):
+        # Sends a GET request to the Umbrella API paced by the token bucket, retrying 429/5xx responses
+        # and connection errors with exponential backoff. Returns the response.
+
+        for attempt in range(self.max_retries + 1):
+
+            self.refresh_bearer_token()
+            self.rate_limiter.acquire()
+
+            headers = {
+                'Authorization': 'Bearer {}'.format(self.umbrella_bearer_token)
+            }
+
+            try:
+                response = self.session.request("GET", url, headers=headers, timeout=self.request_timeout)
+            except requests.exceptions.RequestException as err:
+                if attempt == self.max_retries:
+                    raise
+                self.logger.warning('Umbrella API request failed ({}), attempt {} of {}'.format(err, attempt + 1, self.max_retries + 1))
+                time.sleep(self.get_backoff(attempt))
+                continue
+
+            if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                return response
+
+            delay = self.get_backoff(attempt)
+            retry_after = response.headers.get('Retry-After')
+            if response.status_code == 429 and retry_after != None:
+                try:
+                    delay = max(delay, float(retry_after))
+                except ValueError:
+                    pass
+
+            if response.status_code == 429:
+                # Every worker backs off, not only the one that got the 429
+                self.rate_limiter.pause(delay)
+
+            self.logger.warning('Umbrella API answered {}, retrying in {:.1f}s (attempt {} of {})'.format(response.status_code, delay, attempt + 1, self.max_retries + 1))
+            time.sleep(delay)
+
+        return response
+
+    def get_backoff(self, attempt:int) -> float:
+        # Exponential backoff with jitter so that the workers don't retry in lockstep
+        return min(30, 0.5 * (2 ** attempt)) * random.uniform(0.5, 1.0)
+
     def umbrella_api_activity_query(self, org_id:str, api_endpoint: umbrella_api_activity_endpoint, from_timestamp:str, to_timestamp:str, records_limit:int, domains_filter:list=[]):
-        
+
         # Umbrella Activity API documentation: https://docs.umbrella.com/umbrella-api/reference#activity
-        
+
         if len(domains_filter) > 0:
-            url = "https://reports.api.umbrella.com/v2/organizations/{}/{}?from={}&to={}&limit={}&domains={}".format(org_id, api_endpoint.value, from_timestamp, to_timestamp, records_limit, ','.join(domains_filter))
+            url = "{}/organizations/{}/{}?from={}&to={}&limit={}&domains={}".format(self.api_base_url, org_id, api_endpoint.value, from_timestamp, to_timestamp, records_limit, ','.join(domains_filter))
         else:
-            url = "https://reports.api.umbrella.com/v2/organizations/{}/{}?from={}&to={}&limit={}".format(org_id, api_endpoint.value, from_timestamp, to_timestamp, records_limit)
+            url = "{}/organizations/{}/{}?from={}&to={}&limit={}".format(self.api_base_url, org_id, api_endpoint.value, from_timestamp, to_timestamp, records_limit)
 
-        payload = {}
-        headers = {
-            'Authorization': 'Bearer {}'.format(self.umbrella_bearer_token)
-        }
+        response = self.umbrella_api_request(url)
 
-        response = requests.request("GET", url, headers=headers, data=payload)
-        data_dict = json.loads(response.text)
-        
-        if isinstance(data_dict['data'], dict) and ((data_dict['data'].get('errors', False) != False) or (data_dict['data'].get('error', False) != False)):
-            error_message = 'Error {} \\ Headers: {}'.format(response.text, response.headers)
+        try:
+            data_dict = json.loads(response.text)
+        except ValueError:
+            self.logger.error('Error {} \\ Status: {} \\ Headers: {}'.format(response.text[:500], response.status_code, response.headers))
+            return False
+
+        if not isinstance(data_dict, dict) or 'data' not in data_dict or (isinstance(data_dict['data'], dict) and ((data_dict['data'].get('errors', False) != False) or (data_dict['data'].get('error', False) != False))):
+            error_message = 'Error {} \\ Headers: {}'.format(response.text[:500], response.headers)
             self.logger.error(error_message)
             return False
         else:
             return data_dict['data']
-        
-    def get_umbrella_api_activity_dataframe(self, start_time:str, end_time:str, org_id:str, api_endpoint: umbrella_api_activity_endpoint, records_limit:int, bearer_token:str=None, time_window_minute_increments:int=0, domains_filter:list=[], return_columns:list=['timestamp', 'externalip', 'domain'], time_zone:str='Australia/Melbourne', api_requests_rate_limit:int=5):
-        
+
+    def fetch_window(self, org_id:str, api_endpoint: umbrella_api_activity_endpoint, window:tuple, records_limit:int, domains_filter:list=[]):
+        # Fetches the records of a single time window, queries that return an error are retried.
+        # Returns (records, truncated), truncated is True when the window hit records_limit and may be missing records.
+
+        for attempt in range(self.max_retries + 1):
+
+            umbrella_results = self.umbrella_api_activity_query(
+                org_id=org_id,
+                domains_filter=domains_filter,
+                api_endpoint=api_endpoint,
+                from_timestamp=window[0],
+                to_timestamp=window[1],
+                records_limit=records_limit
+            )
+
+            if isinstance(umbrella_results, list):
+                return umbrella_results, len(umbrella_results) >= records_limit
+
+            self.logger.error('Error in Umbrella API query, retrying window {} - {}'.format(window[0], window[1]))
+            time.sleep(self.get_backoff(attempt))
+
+        raise RuntimeError('Umbrella API query failed for window {} - {} after {} attempts'.format(window[0], window[1], self.max_retries + 1))
+
+    def fetch_time_range(self, org_id:str, api_endpoint: umbrella_api_activity_endpoint, start_timestamp:int, end_timestamp:int, records_limit:int, domains_filter:list=[], window_ms:int=0, adaptive_windows:bool=True):
+        # Generator that yields the (window, records) of [start_timestamp, end_timestamp) (unix epochs in ms) in chronological
+        # order. The parts of the range found in the response cache are read from disk, the gaps are fetched from the API
+        # (see fetch_api_time_range) and their windows cached. A hit/miss summary is logged and kept in self.cache_summary.
+
+        if self.response_cache == None:
+            for window, records, truncated in self.fetch_api_time_range(org_id, api_endpoint, start_timestamp, end_timestamp, records_limit, domains_filter, window_ms, adaptive_windows):
+                yield window, records
+            return
+
+        query_key = self.response_cache.get_key(org_id, api_endpoint.value, domains_filter)
+        cacheable_end = self.timestamp_to_unixepoch_ms(datetime.now().isoformat()) - CACHE_MIN_AGE_MS
+
+        summary = {'cached_windows': 0, 'cached_records': 0, 'cached_ms': 0, 'fetched_windows': 0, 'fetched_records': 0, 'fetched_ms': 0, 'gaps': 0}
+        self.cache_summary = summary
+
+        try:
+            for segment_type, segment, window_id in self.response_cache.plan(query_key, start_timestamp, end_timestamp):
+
+                if segment_type == 'cached':
+                    records = self.response_cache.read(window_id, segment[0], segment[1])
+                    if records != None:
+                        summary['cached_windows'] = summary['cached_windows'] + 1
+                        summary['cached_records'] = summary['cached_records'] + len(records)
+                        summary['cached_ms'] = summary['cached_ms'] + segment[1] - segment[0]
+                        yield segment, records
+                        continue
+
+                summary['gaps'] = summary['gaps'] + 1
+
+                for window, records, truncated in self.fetch_api_time_range(org_id, api_endpoint, segment[0], segment[1], records_limit, domains_filter, window_ms, adaptive_windows):
+                    summary['fetched_windows'] = summary['fetched_windows'] + 1
+                    summary['fetched_records'] = summary['fetched_records'] + len(records)
+                    summary['fetched_ms'] = summary['fetched_ms'] + window[1] - window[0]
+
+                    # Incomplete windows are not cached, nor the recent ones that may still get new events
+                    if not truncated and window[1] <= cacheable_end:
+                        self.response_cache.store(query_key, window[0], window[1], records)
+
+                    yield window, records
+
+        finally:
+            total_ms = summary['cached_ms'] + summary['fetched_ms']
+            summary['hit_ratio'] = round(summary['cached_ms'] / total_ms, 3) if total_ms > 0 else 0
+            self.logger.info('Cache hits: {} windows / {} records ({:.0%} of the time range) - misses: {} gaps / {} windows / {} records fetched from the API'.format(
+                summary['cached_windows'], summary['cached_records'], summary['hit_ratio'], summary['gaps'], summary['fetched_windows'], summary['fetched_records']
+            ))
+            self.response_cache.evict()
+
+    def fetch_api_time_range(self, org_id:str, api_endpoint: umbrella_api_activity_endpoint, start_timestamp:int, end_timestamp:int, records_limit:int, domains_filter:list=[], window_ms:int=0, adaptive_windows:bool=True):
+        # Generator that splits [start_timestamp, end_timestamp) (unix epochs in ms) in time windows, fetches them concurrently
+        # (paced by the token bucket) and yields the (window, records, truncated) of each one in chronological order. At most
+        # 2 * max_workers windows are in flight so that memory stays bounded when the consumer is slower than the API.
+        #
+        # window_ms: size of the windows, 0 queries the whole range at once
+        # adaptive_windows: when True, the size of the next windows follows the density of records observed so far (and
+        # remembered from previous runs, see WindowDensity) aiming at ADAPTIVE_TARGET_FILL * records_limit records per window:
+        # sparse windows are coalesced into bigger ones and a window that hits records_limit is bisected and queried again,
+        # so no records are lost to the limit. When False, windows have a fixed size and truncated windows are only reported.
+
+        density_key = self.window_density.get_key(org_id, api_endpoint.value, domains_filter)
+        next_window_ms = window_ms if window_ms > 0 else end_timestamp - start_timestamp
+
+        if adaptive_windows == True:
+            records_per_ms = self.window_density.get(density_key)
+            if records_per_ms != None:
+                next_window_ms = self.get_adaptive_window_ms(records_per_ms, records_limit, next_window_ms)
+                self.logger.info('Starting with windows of {:.1f} minutes ({:.1f} records/minute seen in previous runs)'.format(next_window_ms / 60000, records_per_ms * 60000))
+
+        cursor = start_timestamp
+        windows_count = 0
+        requests_count = 0
+        bisected_count = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='cybernethunter-umbrella') as pool:
+
+            # pending: (window, future, is_bisected) in chronological order, the halves of bisected windows are
+            # always ahead of the windows queued from the cursor
+            submit = lambda window, is_bisected: (window, pool.submit(self.fetch_window, org_id, api_endpoint, window, records_limit, domains_filter), is_bisected)
+            pending = deque()
+
+            try:
+                while True:
+
+                    # Keep the pool busy with the next windows of the range
+                    while cursor < end_timestamp and len(pending) < self.max_workers * 2:
+                        window = (cursor, min(cursor + max(1, int(next_window_ms)), end_timestamp))
+                        cursor = window[1]
+                        pending.append(submit(window, False))
+                        requests_count = requests_count + 1
+
+                    if len(pending) == 0:
+                        break
+
+                    window, future, is_bisected = pending.popleft()
+                    records, truncated = future.result()
+                    window_length = window[1] - window[0]
+
+                    if truncated and adaptive_windows == True and window_length > MIN_WINDOW_MS:
+                        # The window holds at least records_limit records, query each half again before moving on
+                        middle = window[0] + window_length // 2
+                        pending.appendleft(submit((middle, window[1]), True))
+                        pending.appendleft(submit((window[0], middle), True))
+                        requests_count = requests_count + 2
+                        bisected_count = bisected_count + 1
+
+                        self.window_density.update(density_key, records_limit / window_length)
+                        next_window_ms = min(next_window_ms, window_length // 2)
+
+                        # The windows queued with the old size would most likely hit the limit too, the ones that
+                        # have not been sent yet are cancelled and queued again from the cursor with the new size
+                        while len(pending) > 0 and pending[-1][2] == False and pending[-1][0][1] - pending[-1][0][0] > next_window_ms and pending[-1][1].cancel():
+                            cursor = pending.pop()[0][0]
+                            requests_count = requests_count - 1
+
+                        continue
+
+                    if truncated:
+                        self.logger.warning('Window {} - {} returned records_limit ({}) records, some records may be missing'.format(window[0], window[1], records_limit))
+
+                    if adaptive_windows == True:
+                        records_per_ms = self.window_density.update(density_key, len(records) / max(1, window_length))
+                        next_window_ms = self.get_adaptive_window_ms(records_per_ms, records_limit, next_window_ms)
+
+                    windows_count = windows_count + 1
+                    yield window, records, truncated
+
+            finally:
+                # Windows still in flight are not needed anymore when the consumer stops early
+                for window, future, is_bisected in pending:
+                    future.cancel()
+
+                if adaptive_windows == True:
+                    self.window_density.save()
+
+        self.logger.info('Fetched {} time windows with {} requests ({} windows bisected)'.format(windows_count, requests_count, bisected_count))
+
+    def get_adaptive_window_ms(self, records_per_ms:float, records_limit:int, last_window_ms:float) -> float:
+        # Size of the window expected to hold ADAPTIVE_TARGET_FILL * records_limit records, growing at most
+        # ADAPTIVE_MAX_GROWTH times at once so that a few empty windows don't make the next one huge
+
+        if records_per_ms <= 0:
+            window_ms = last_window_ms * ADAPTIVE_MAX_GROWTH
+        else:
+            window_ms = min(ADAPTIVE_TARGET_FILL * records_limit / records_per_ms, last_window_ms * ADAPTIVE_MAX_GROWTH)
+
+        return max(MIN_WINDOW_MS, min(MAX_WINDOW_MS, window_ms))
+
+    def records_to_dataframe(self, records:list, return_columns:list, time_zone:str):
+        # Builds a single DataFrame out of the records of several windows, converting the timestamps in one go
+
+        result = pd.DataFrame(records, columns=return_columns)
+
+        if 'timestamp' in result.columns:
+            result['timestamp'] = pd.to_datetime(result['timestamp'], unit='ms')
+            result['timestamp'] = result.timestamp.dt.tz_localize('UTC').dt.tz_convert(time_zone)
+
+        return result
+
+    def get_umbrella_api_activity_dataframe(self, start_time:str, end_time:str, org_id:str, api_endpoint: umbrella_api_activity_endpoint, records_limit:int, bearer_token:str=None, time_window_minute_increments:int=0, domains_filter:list=[], return_columns:list=['timestamp', 'externalip', 'domain'], time_zone:str='Australia/Melbourne', api_requests_rate_limit:int=5, adaptive_windows:bool=True):
+
         # Example UTC start_time = '2020-02-18T00:00:00'
         # Example UTC end_time = '2020-03-18T00:00:00'
         # Example return_columns for the dataframe: ['timestamp', 'externalip', 'domain', 'verdict']
         # Example Time Zone value: 'Australia/Melbourne'
+        # api_requests_rate_limit: number of time windows in each yielded DataFrame (the request rate itself is
+        # set by the connector's token bucket, see requests_per_second)
+        # adaptive_windows: size the windows after the density of records, time_window_minute_increments is then only the
+        # initial size (see fetch_time_range)
 
         '''
         Example calling this function from JupyterNotebooks
-        
+
         from cybernethunter.connectors import umbrella_connector as cyh_umbrella
         umb = cyh_umbrella.Connector()
         umb.umbrella_authenticate("YOUR_BASE64_TOKEN_HERE")
@@ -130,87 +521,119 @@ class Connector:
                     records_limit=5000,
                     domains_filter=domains_filter,
                     return_columns=['timestamp', 'externalip', 'domain'],
-                    time_zone='Australia/Melbourne',
-                    yield_dataframe_chunks=True,
+                    time_zone='Australia/Melbourne'
                 )
         '''
 
         if not self.umbrella_bearer_token and bearer_token == None:
             self.logger.error('Please provide a Base64 Encoded Bearer Token or run umbrella_authenticate before calling this function')
             sys.exit()
-        
+
         elif not self.umbrella_bearer_token and bearer_token != None:
             self.umbrella_bearer_token = bearer_token
-        
-        if time_window_minute_increments == 0:
-            # in this case we only run a simple query within the specified timeframes
-            # and don't slice the queries into smaller timewindows
-            start_timestamp = self.timestamp_to_unixepoch_ms(start_time)
-            end_timestamp = self.timestamp_to_unixepoch_ms(end_time)
 
-            umbrella_results = self.umbrella_api_activity_query(
-                org_id=org_id,
-                domains_filter=domains_filter,
-                api_endpoint=api_endpoint,
-                from_timestamp=start_timestamp,
-                to_timestamp=end_timestamp,
-                records_limit=records_limit
-            )
+        start_timestamp = self.timestamp_to_unixepoch_ms(start_time)
+        end_timestamp = self.timestamp_to_unixepoch_ms(end_time)
+        window_ms = int(time_window_minute_increments * 60 * 1000)
 
-            result = pd.DataFrame(umbrella_results, columns=return_columns)
+        # Records of the windows are collected in a list and turned into a DataFrame once per yield
+        windows_per_yield = max(1, api_requests_rate_limit)
+        records = []
+        windows_count = 0
 
-            if isinstance(result, pd.core.frame.DataFrame) == False:
-                self.logger.error('Error in Umbrella API query, retrying in 5s')
-                time.sleep(5)
+        for window, window_records in self.fetch_time_range(org_id, api_endpoint, start_timestamp, end_timestamp, records_limit, domains_filter, window_ms=window_ms, adaptive_windows=adaptive_windows):
+            records.extend(window_records)
+            windows_count = windows_count + 1
 
-            result['timestamp'] = pd.to_datetime(result['timestamp'], unit='ms')
-            result['timestamp'] = result.timestamp.dt.tz_localize('UTC').dt.tz_convert(time_zone)
-            
-            yield result
-            
-        else:
-            
-            time_incremental = self.increment_datetime_by_minutes(start_time, minutes=time_window_minute_increments)
-
-            while datetime.fromisoformat(start_time) <= datetime.fromisoformat(end_time):
-
-                # df to hold partial results within the "api_requests_rate_limit" window
-                windowed_df = pd.DataFrame()
-                # Umbrella API rate limit: 5 requests per second
-                for i in range(api_requests_rate_limit):
-                    
-                    # first check bearer token validity and re-authenticate if required
-                    # to be safe, we do it at >=3500 seconds
-                    current_time = datetime.now()
-                    if (current_time - self.umbrella_bearer_token_start_time) >= timedelta(seconds=3500):
-                        self.umbrella_authenticate(self.basic_auth_b64)
-
-                    start_timestamp = self.timestamp_to_unixepoch_ms(start_time)
-                    end_timestamp = time_incremental.__next__()
-
-                    umbrella_results = self.umbrella_api_activity_query(
-                        org_id=org_id,
-                        domains_filter=domains_filter,
-                        api_endpoint=api_endpoint,
-                        from_timestamp=start_timestamp,
-                        to_timestamp=self.timestamp_to_unixepoch_ms(end_timestamp),
-                        records_limit=records_limit
-                    )
-
-                    result = pd.DataFrame(umbrella_results, columns=return_columns)
-
-                    if isinstance(result, pd.core.frame.DataFrame) == False:
-                        self.logger.error('Error in Umbrella API query, retrying in 5s')
-                        time.sleep(5)
-                        continue
+            if windows_count == windows_per_yield:
+                yield self.records_to_dataframe(records, return_columns, time_zone)
+                records = []
+                windows_count = 0
+
+        if windows_count > 0:
+            yield self.records_to_dataframe(records, return_columns, time_zone)
+
+    def format_timestamps(self, timestamps, time_zone:str='UTC') -> list:
+        # Converts unix epochs in ms to ISO 8601 strings in "time_zone" with vectorized numpy operations, without
+        # building Timestamp objects: the wall clock time of each timestamp is computed once for the whole array
+        # and the UTC offset suffix is only formatted once per distinct offset (ex: before and after a DST change)
+
+        timestamps = np.asarray(timestamps, dtype='int64')
+
+        if time_zone == None or time_zone == 'UTC':
+            return np.datetime_as_string(timestamps.astype('datetime64[ms]'), unit='ms', timezone='UTC').tolist()
+
+        local_times = pd.to_datetime(timestamps, unit='ms', utc=True).tz_convert(time_zone).tz_localize(None).values.astype('datetime64[ms]')
+        offsets = (local_times.astype('int64') - timestamps) // 60000
+        unique_offsets, positions = np.unique(offsets, return_inverse=True)
+        suffixes = np.array(['{}{:02d}:{:02d}'.format('+' if offset >= 0 else '-', abs(offset) // 60, abs(offset) % 60) for offset in unique_offsets.tolist()])
+
+        return np.char.add(np.datetime_as_string(local_times, unit='ms'), suffixes[positions]).tolist()
+
+    def convert_record_timestamps(self, records:list, time_zone:str='UTC'):
+        # Replaces the unix epoch in ms of the "timestamp" field of a batch of records with its ISO 8601 string, in place
+
+        timed_records = [record for record in records if isinstance(record.get('timestamp'), int)]
+
+        if len(timed_records) == 0:
+            return
+
+        for record, timestamp in zip(timed_records, self.format_timestamps([record['timestamp'] for record in timed_records], time_zone)):
+            record['timestamp'] = timestamp
+
+    def stream_umbrella_api_activity_records(self, start_time:str, end_time:str, org_id:str, api_endpoint: umbrella_api_activity_endpoint, records_limit:int, bearer_token:str=None, time_window_minute_increments:int=0, domains_filter:list=[], time_zone:str='UTC', batch_size:int=None, adaptive_windows:bool=True):
+
+        # Streaming version of get_umbrella_api_activity_dataframe: yields the raw records (dicts) returned by the API,
+        # or lists of up to "batch_size" records, in chronological order of their time windows. No DataFrame is built,
+        # the "timestamp" of the records is converted to an ISO 8601 string in "time_zone" once per batch (or window).
+        # The records can be sent straight to an output pipe (see --action collect in cybernethunter_cli.py).
+
+        '''
+        Example sending the DNS activity of the last day to kafka from JupyterNotebooks
+
+        from cybernethunter.connectors import umbrella_connector as cyh_umbrella
+        from cybernethunter.outputmods import output as cyout
+
+        umb = cyh_umbrella.Connector()
+        umb.umbrella_authenticate("YOUR_BASE64_TOKEN_HERE")
+
+        kafka = cyout.Output(output_type='json', output_pipe='kafka', kafka_broker=['127.0.0.1', '9092'], log_type='umbrella')
+        kafka.define_output_workflow()
+
+        for record in umb.stream_umbrella_api_activity_records(start_time='2020-12-15T00:00:00', end_time='2020-12-16T00:00:00', org_id=XXXXXXX, api_endpoint=umb.umbrella_api_activity_endpoint.dns, records_limit=5000):
+            kafka.send(record)
+
+        kafka.close_output_pipe()
+        '''
+
+        if not self.umbrella_bearer_token and bearer_token == None:
+            self.logger.error('Please provide a Base64 Encoded Bearer Token or run umbrella_authenticate before calling this function')
+            sys.exit()
+
+        elif not self.umbrella_bearer_token and bearer_token != None:
+            self.umbrella_bearer_token = bearer_token
+
+        start_timestamp = self.timestamp_to_unixepoch_ms(start_time)
+        end_timestamp = self.timestamp_to_unixepoch_ms(end_time)
+        window_ms = int(time_window_minute_increments * 60 * 1000)
+
+        batch = []
+
+        for window, records in self.fetch_time_range(org_id, api_endpoint, start_timestamp, end_timestamp, records_limit, domains_filter, window_ms=window_ms, adaptive_windows=adaptive_windows):
 
-                    result['timestamp'] = pd.to_datetime(result['timestamp'], unit='ms')
-                    result['timestamp'] = result.timestamp.dt.tz_localize('UTC').dt.tz_convert(time_zone)
+            if batch_size == None:
+                self.convert_record_timestamps(records, time_zone)
+                yield from records
+                continue
 
-                    start_time = end_timestamp
+            batch.extend(records)
 
-                    windowed_df = windowed_df.append(result, ignore_index=True)
+            while len(batch) >= batch_size:
+                records_batch = batch[:batch_size]
+                batch = batch[batch_size:]
+                self.convert_record_timestamps(records_batch, time_zone)
+                yield records_batch
 
-                yield windowed_df
-                del windowed_df
-                time.sleep(1)
+        if batch_size != None and len(batch) > 0:
+            self.convert_record_timestamps(batch, time_zone)
+            yield batch
@@ -1,6 +1,15 @@
 # -*- coding: utf-8 -*-
 # 2018-2020 Diego Perez (@darkquassar / https://linkedin.com/in/diegope)
 
-from . import utils
-from . import notebook
-from . import transforms
+import importlib
+
+# Registry of the available helper modules, modules are only imported when they are first accessed
+HELPERMODS = ["utils", "notebook", "transforms", "parallel", "stats", "response_cache"]
+
+def __getattr__(name):
+    if name in HELPERMODS:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+def __dir__():
+    return sorted(list(globals().keys()) + HELPERMODS)
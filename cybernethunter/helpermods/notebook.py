@@ -15,9 +15,7 @@
 '''
 
 import logging
-import nbformat as nbf
 import os
-import pandas as pd
 import re
 import sys
 import yaml
@@ -33,12 +31,29 @@ class HelperMod:
         utilities = utils.HelperMod()
         self.logger = utilities.get_logger('CYBERNETHUNTER.HELPERS.PLAYBOOK')
         
+    def load_columnar_output(self, file_name, columns:list=None, filter_expression=None, output_format:str=None):
+        # Lazily scans a parquet or arrow file produced by the "file" output pipe. Only the requested
+        # columns (and the row groups matching the filter) are read from disk. Returns a pandas dataframe.
+        # Example: load_columnar_output('security.parquet', columns=['EventID', 'TargetUserName'], 
+        #          filter_expression=pyarrow.dataset.field('EventID') == '4624')
+
+        import pyarrow.dataset as ds
+
+        if output_format == None:
+            output_format = 'arrow' if Path(file_name).suffix in ['.arrow', '.feather', '.ipc'] else 'parquet'
+
+        dataset = ds.dataset(file_name, format='ipc' if output_format == 'arrow' else 'parquet')
+        return dataset.to_table(columns=columns, filter=filter_expression).to_pandas()
+
     def read_yaml(self, file_name):
         with open(file_name, encoding='utf-8') as yf:
             t = yaml.load(yf, Loader=yaml.FullLoader)
         return t
     
     def create_notebook(self, yaml_playbook, output_nb_file=None):
+
+        import nbformat as nbf
+        import pandas as pd
         
         # Define notebook metadata
         nb_meta =   {
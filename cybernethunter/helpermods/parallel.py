@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+'''
+ NAME: parallel.py | version: 0.1
+ CYBERNETHUNTER Version: 0.3
+ AUTHOR: Diego Perez (@darkquasar) - 2026
+ DESCRIPTION: Helpers to fan out the parsing of multiple files across a pool of processes and merge their records back into a single stream.
+
+ Updates:
+        v0.1 - 18-10-2026 - Created script.
+
+ ToDo:
+        1. ----.
+
+'''
+
+import multiprocessing
+import os
+import queue
+import time
+
+from cybernethunter import parsermods
+from cybernethunter.helpermods import utils
+
+# Queue shared with the pool workers, it is set by the pool initializer
+# since multiprocessing queues can't be passed as task arguments
+_results_queue = None
+
+def _init_worker(results_queue):
+    global _results_queue
+    _results_queue = results_queue
+
+def _parse_file_worker(file_index, file_path, module_name, parsermod_options, batch_size):
+    # Runs a parsermod over a single file inside a worker process. Records are sent back
+    # to the parent process in batches to reduce the pickling and queue overhead, a final
+    # "done" message carries the stats of the file.
+
+    start_time = time.perf_counter()
+    records_count = 0
+    error = None
+
+    try:
+        load_parser_mod = parsermods.load_parsermod(module_name)
+        parsermod = load_parser_mod.ParserMod(file_path, **parsermod_options)
+
+        batch = []
+        for record in parsermod.execute():
+            if record == None:
+                continue
+
+            batch.append(record)
+            if len(batch) >= batch_size:
+                _results_queue.put(('records', file_index, batch))
+                records_count = records_count + len(batch)
+                batch = []
+
+        if len(batch) > 0:
+            _results_queue.put(('records', file_index, batch))
+            records_count = records_count + len(batch)
+
+    except Exception as err:
+        error = repr(err)
+
+    stats = {
+        'file': str(file_path),
+        'pid': os.getpid(),
+        'records': records_count,
+        'seconds': time.perf_counter() - start_time,
+        'error': error
+    }
+    _results_queue.put(('done', file_index, stats))
+
+class HelperMod:
+
+    def __init__(self):
+
+        # Setup logging
+        utilities = utils.HelperMod()
+        self.logger = utilities.get_logger('CYBERNETHUNTER.HELPERS.PARALLEL')
+
+    def parse_files(self, target_files:list, module_name:str, parsermod_options:dict=None, workers:int=None, ordered:bool=False, batch_size:int=500):
+        # Generator that spreads "target_files" across a pool of "workers" processes, each one running
+        # the parsermod "module_name" over a whole file. Records are yielded as they arrive (ordered=False)
+        # or following the order of "target_files" (ordered=True). When ordered, the batches of files that
+        # finish ahead of their turn are kept in memory until all the previous files are done.
+
+        if parsermod_options == None:
+            parsermod_options = {}
+
+        if workers == None:
+            workers = os.cpu_count()
+
+        workers = max(1, min(workers, len(target_files)))
+        self.logger.info('Parsing {} files with {} worker processes ({})'.format(len(target_files), workers, 'ordered' if ordered else 'unordered'))
+
+        # A bounded queue provides backpressure when the output pipe is slower than the parsers
+        results_queue = multiprocessing.Queue(maxsize=workers * 8)
+        pool = multiprocessing.Pool(processes=workers, initializer=_init_worker, initargs=(results_queue,))
+
+        for file_index, file_path in enumerate(target_files):
+            pool.apply_async(_parse_file_worker, (file_index, file_path, module_name, parsermod_options, batch_size))
+        pool.close()
+
+        pending_files = len(target_files)
+        next_file_index = 0
+        buffered_batches = {}
+        finished_files = set()
+        files_stats = []
+
+        try:
+            while pending_files > 0:
+
+                try:
+                    message_type, file_index, payload = results_queue.get(timeout=1)
+                except queue.Empty:
+                    continue
+
+                if message_type == 'records':
+                    if ordered == False or file_index == next_file_index:
+                        yield from payload
+                    else:
+                        buffered_batches.setdefault(file_index, []).append(payload)
+
+                elif message_type == 'done':
+                    pending_files = pending_files - 1
+                    files_stats.append(payload)
+
+                    if payload['error'] != None:
+                        self.logger.error('Worker {} could not parse {}: {}'.format(payload['pid'], payload['file'], payload['error']))
+
+                    if ordered == True:
+                        finished_files.add(file_index)
+                        # Release the records of the files that were waiting for their turn
+                        while next_file_index in finished_files:
+                            next_file_index = next_file_index + 1
+                            for batch in buffered_batches.pop(next_file_index, []):
+                                yield from batch
+
+            pool.join()
+
+        finally:
+            pool.terminate()
+            self.report_worker_throughput(files_stats)
+
+    def report_worker_throughput(self, files_stats:list):
+        # Aggregate the per-file stats by worker process and log the throughput of each worker
+
+        workers_stats = {}
+
+        for file_stats in files_stats:
+            worker = workers_stats.setdefault(file_stats['pid'], {'files': 0, 'records': 0, 'seconds': 0.0})
+            worker['files'] = worker['files'] + 1
+            worker['records'] = worker['records'] + file_stats['records']
+            worker['seconds'] = worker['seconds'] + file_stats['seconds']
+
+        for pid, worker in sorted(workers_stats.items()):
+            records_per_second = worker['records'] / worker['seconds'] if worker['seconds'] > 0 else 0
+            self.logger.info('Worker {}: {} files / {} records / {:.2f} seconds / {:.0f} records/s'.format(pid, worker['files'], worker['records'], worker['seconds'], records_per_second))
+
+        return workers_stats
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+'''
+ NAME: response_cache.py | version: 0.1
+ CYBERNETHUNTER Version: 0.3
+ AUTHOR: Diego Perez (@darkquasar) - 2026
+ DESCRIPTION: On-disk (SQLite) cache of the records returned by time-ranged connector queries. Records are stored per time
+ window under a query key (ex: org / endpoint / domains filter), so that a new query over an overlapping time range is
+ split in the windows already cached, served from disk, and the gaps that still have to be fetched. Windows expire after a
+ TTL and the least recently used ones are evicted when the cache grows beyond its max size.
+
+ Updates:
+        v0.1 - 18-10-2026 - Created script.
+
+ ToDo:
+        1. ----.
+
+'''
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from cybernethunter.helpermods import utils
+
+class ResponseCache:
+
+    def __init__(self, cache_file:str, ttl_seconds:float=7 * 24 * 3600, max_size_bytes:int=1024 * 1024 * 1024, timestamp_field:str='timestamp'):
+
+        # Setup logging
+        utilities = utils.HelperMod()
+        self.logger = utilities.get_logger('CYBERNETHUNTER.HELPERS.CACHE')
+
+        # ttl_seconds: windows fetched longer ago than this are not served anymore
+        # max_size_bytes: max size of the (compressed) records kept in the cache
+        # timestamp_field: field with the unix epoch in ms of each record, used to cut the cached windows that are
+        # only partially inside the requested time range
+        self.cache_file = cache_file
+        self.ttl_seconds = ttl_seconds
+        self.max_size_bytes = max_size_bytes
+        self.timestamp_field = timestamp_field
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(cache_file)), exist_ok=True)
+        self.connection = sqlite3.connect(cache_file, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('''
+            CREATE TABLE IF NOT EXISTS windows (
+                id INTEGER PRIMARY KEY,
+                query_key TEXT NOT NULL,
+                start_ms INTEGER NOT NULL,
+                end_ms INTEGER NOT NULL,
+                records_count INTEGER NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                records BLOB NOT NULL
+            )
+        ''')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS windows_by_query ON windows (query_key, start_ms)')
+        self.connection.commit()
+
+        self.evict()
+
+    def get_key(self, *parts) -> str:
+        # Lists (ex: a domains filter) are sorted so that the same filter always gets the same key
+        return '/'.join(','.join(sorted(str(item) for item in part)) if isinstance(part, (list, tuple, set)) else str(part) for part in parts)
+
+    def plan(self, query_key:str, start_ms:int, end_ms:int) -> list:
+        # Splits [start_ms, end_ms) in chronological segments: ('cached', (start, end), window_id) for the parts covered
+        # by cached windows and ('gap', (start, end), None) for the parts that have to be fetched
+
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT id, start_ms, end_ms FROM windows WHERE query_key = ? AND end_ms > ? AND start_ms < ? AND fetched_at >= ? ORDER BY start_ms',
+                (query_key, start_ms, end_ms, time.time() - self.ttl_seconds)
+            ).fetchall()
+
+        segments = []
+        cursor = start_ms
+
+        for window_id, window_start, window_end in rows:
+            if window_end <= cursor:
+                continue
+            if window_start > cursor:
+                segments.append(('gap', (cursor, window_start), None))
+            segments.append(('cached', (max(cursor, window_start), min(window_end, end_ms)), window_id))
+            cursor = min(window_end, end_ms)
+
+        if cursor < end_ms:
+            segments.append(('gap', (cursor, end_ms), None))
+
+        return segments
+
+    def read(self, window_id:int, start_ms:int, end_ms:int) -> list:
+        # Records of a cached window, only the ones within [start_ms, end_ms) if the window goes beyond it
+
+        with self.lock:
+            row = self.connection.execute('SELECT start_ms, end_ms, records FROM windows WHERE id = ?', (window_id,)).fetchone()
+            self.connection.execute('UPDATE windows SET last_used = ? WHERE id = ?', (time.time(), window_id))
+            self.connection.commit()
+
+        if row == None:
+            return None
+
+        window_start, window_end, blob = row
+        records = json.loads(zlib.decompress(blob))
+
+        if window_start < start_ms or window_end > end_ms:
+            timestamp_field = self.timestamp_field
+            records = [record for record in records if start_ms <= record.get(timestamp_field, start_ms) < end_ms]
+
+        return records
+
+    def store(self, query_key:str, start_ms:int, end_ms:int, records:list):
+
+        blob = zlib.compress(json.dumps(records, separators=(',', ':')).encode('utf-8'), 1)
+        now = time.time()
+
+        with self.lock:
+            # A window replaces the expired ones it overlaps
+            self.connection.execute('DELETE FROM windows WHERE query_key = ? AND end_ms > ? AND start_ms < ?', (query_key, start_ms, end_ms))
+            self.connection.execute(
+                'INSERT INTO windows (query_key, start_ms, end_ms, records_count, size_bytes, fetched_at, last_used, records) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (query_key, start_ms, end_ms, len(records), len(blob), now, now, blob)
+            )
+            self.connection.commit()
+
+    def evict(self):
+        # Drops the expired windows, then the least recently used ones until the cache fits in max_size_bytes
+
+        with self.lock:
+            expired = self.connection.execute('DELETE FROM windows WHERE fetched_at < ?', (time.time() - self.ttl_seconds,)).rowcount
+
+            total_size = self.connection.execute('SELECT COALESCE(SUM(size_bytes), 0) FROM windows').fetchone()[0]
+            evicted = 0
+
+            if total_size > self.max_size_bytes:
+                for window_id, size_bytes in self.connection.execute('SELECT id, size_bytes FROM windows ORDER BY last_used').fetchall():
+                    if total_size <= self.max_size_bytes:
+                        break
+                    self.connection.execute('DELETE FROM windows WHERE id = ?', (window_id,))
+                    total_size = total_size - size_bytes
+                    evicted = evicted + 1
+
+            self.connection.commit()
+
+        if expired + evicted > 0:
+            self.logger.info('Evicted {} expired and {} least recently used windows from {}'.format(expired, evicted, self.cache_file))
+
+    def close(self):
+
+        with self.lock:
+            self.connection.close()
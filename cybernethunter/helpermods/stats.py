@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+
+'''
+ NAME: stats.py | version: 0.3
+ CYBERNETHUNTER Version: 0.3
+ AUTHOR: Diego Perez (@darkquasar) - 2026
+ DESCRIPTION: Pipeline instrumentation. Counts records and bytes going through each stage of the pipeline (parse,
+ transform, output), keeps a log-scale histogram of the per-record latency of each stage, logs a periodic progress line
+ and produces a final report (optionally written as a JSON stats file) with records/s and p50/p90/p99 latencies per stage.
+
+ Updates:
+        v0.1 - 18-10-2026 - Created script.
+        v0.2 - 18-10-2026 - Stages can record batches of records with a single call
+        v0.3 - 18-10-2026 - Stages outside of STAGES (ex: hunt) are created on first use
+
+ ToDo:
+        1. ----.
+
+'''
+
+import json
+import time
+
+from cybernethunter.helpermods import utils
+
+# Stages of the pipeline, in the order records go through them
+STAGES = ['parse', 'transform', 'output']
+
+# Each power of two is split in 2**SUB_BUCKET_BITS buckets, which bounds the error of the reported percentiles to ~6%
+SUB_BUCKET_BITS = 3
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+class LatencyHistogram:
+    # Log-scale histogram of nanosecond latencies. Recording a value is a couple of integer operations and a
+    # dict update, so it can be used on every record without skewing the measurements.
+
+    def __init__(self):
+
+        self.buckets = {}
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, nanoseconds:int, count:int=1):
+        # count: number of values with this latency (ex: the records of a batch, recorded with their mean latency)
+
+        if nanoseconds < 1:
+            nanoseconds = 1
+
+        exponent = nanoseconds.bit_length() - 1
+        if exponent >= SUB_BUCKET_BITS:
+            mantissa = (nanoseconds >> (exponent - SUB_BUCKET_BITS)) & (SUB_BUCKETS - 1)
+        else:
+            mantissa = (nanoseconds << (SUB_BUCKET_BITS - exponent)) & (SUB_BUCKETS - 1)
+
+        bucket = (exponent << SUB_BUCKET_BITS) | mantissa
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+
+        self.count = self.count + count
+        self.total_ns = self.total_ns + nanoseconds * count
+        if nanoseconds > self.max_ns:
+            self.max_ns = nanoseconds
+
+    def bucket_midpoint(self, bucket:int) -> float:
+
+        exponent = bucket >> SUB_BUCKET_BITS
+        mantissa = bucket & (SUB_BUCKETS - 1)
+
+        lower = (SUB_BUCKETS + mantissa) * (2.0 ** (exponent - SUB_BUCKET_BITS))
+        upper = (SUB_BUCKETS + mantissa + 1) * (2.0 ** (exponent - SUB_BUCKET_BITS))
+
+        return (lower + upper) / 2
+
+    def percentile(self, percent:float) -> float:
+        # Returns the latency (in nanoseconds) below which "percent" of the recorded values fall
+
+        if self.count == 0:
+            return 0.0
+
+        rank = max(1, int(round(self.count * percent / 100.0)))
+        seen = 0
+
+        for bucket in sorted(self.buckets):
+            seen = seen + self.buckets[bucket]
+            if seen >= rank:
+                return min(self.bucket_midpoint(bucket), float(self.max_ns))
+
+        return float(self.max_ns)
+
+class StageStats:
+
+    def __init__(self, name:str):
+
+        self.name = name
+        self.records = 0
+        self.bytes = 0
+        # Time spent in the stage outside of the per-record calls (ex: flushing the output pipe on close)
+        self.extra_ns = 0
+        self.histogram = LatencyHistogram()
+
+    def record(self, nanoseconds:int, nbytes:int=0):
+
+        self.records = self.records + 1
+        self.bytes = self.bytes + nbytes
+        self.histogram.record(nanoseconds)
+
+    def record_batch(self, nanoseconds:int, count:int, nbytes:int=0):
+        # Records "count" records processed together in "nanoseconds"
+
+        if count < 1:
+            self.add_time(nanoseconds)
+            return
+
+        self.records = self.records + count
+        self.bytes = self.bytes + nbytes
+        self.histogram.record(nanoseconds // count, count)
+        self.extra_ns = self.extra_ns + nanoseconds % count
+
+    def add_time(self, nanoseconds:int):
+
+        self.extra_ns = self.extra_ns + nanoseconds
+
+    def seconds(self) -> float:
+
+        return (self.histogram.total_ns + self.extra_ns) / 1e9
+
+    def summary(self) -> dict:
+
+        seconds = self.seconds()
+
+        return {
+            'records': self.records,
+            'bytes': self.bytes,
+            'seconds': round(seconds, 6),
+            'records_per_second': round(self.records / seconds, 1) if seconds > 0 else 0,
+            'latency_us': {
+                'mean': round(self.histogram.total_ns / self.histogram.count / 1000, 3) if self.histogram.count > 0 else 0,
+                'p50': round(self.histogram.percentile(50) / 1000, 3),
+                'p90': round(self.histogram.percentile(90) / 1000, 3),
+                'p99': round(self.histogram.percentile(99) / 1000, 3),
+                'max': round(self.histogram.max_ns / 1000, 3)
+            }
+        }
+
+class HelperMod:
+
+    def __init__(self, progress_interval:float=10):
+
+        # Setup logging
+        utilities = utils.HelperMod()
+        self.logger = utilities.get_logger('CYBERNETHUNTER.HELPERS.STATS')
+
+        # progress_interval: seconds between progress lines, 0 disables them
+        self.progress_interval = progress_interval
+        self.stages = {stage: StageStats(stage) for stage in STAGES}
+        self.input_bytes = 0
+        self.start_ns = time.perf_counter_ns()
+        self.next_progress_ns = self.start_ns + int(self.progress_interval * 1e9)
+        self.last_progress_ns = self.start_ns
+        self.last_progress_records = 0
+
+    def stage(self, name:str) -> StageStats:
+        # Stages that only some actions go through (ex: hunt) are added to the report when first requested
+
+        if name not in self.stages:
+            self.stages[name] = StageStats(name)
+
+        return self.stages[name]
+
+    def add_input_bytes(self, nbytes:int):
+
+        self.input_bytes = self.input_bytes + nbytes
+
+    def report_progress(self, now_ns:int):
+        # Cheap enough to be called on every record, only logs once every "progress_interval" seconds
+
+        if self.progress_interval <= 0 or now_ns < self.next_progress_ns:
+            return
+
+        records = self.stages['output'].records
+        elapsed = (now_ns - self.start_ns) / 1e9
+        interval = (now_ns - self.last_progress_ns) / 1e9
+        current_rate = (records - self.last_progress_records) / interval if interval > 0 else 0
+
+        self.logger.info('Progress: {} records in {:.1f} seconds / {:.0f} records/s (overall {:.0f} records/s) / {}'.format(
+            records,
+            elapsed,
+            current_rate,
+            records / elapsed if elapsed > 0 else 0,
+            ' / '.join('{} {:.1f}s'.format(name, stage.seconds()) for name, stage in self.stages.items())
+        ))
+
+        self.last_progress_ns = now_ns
+        self.last_progress_records = records
+        self.next_progress_ns = now_ns + int(self.progress_interval * 1e9)
+
+    def summary(self) -> dict:
+
+        elapsed = (time.perf_counter_ns() - self.start_ns) / 1e9
+        records = self.stages['output'].records
+        stages = {name: stage.summary() for name, stage in self.stages.items()}
+
+        return {
+            'elapsed_seconds': round(elapsed, 6),
+            'records': records,
+            'records_per_second': round(records / elapsed, 1) if elapsed > 0 else 0,
+            'input_bytes': self.input_bytes,
+            'input_bytes_per_second': round(self.input_bytes / elapsed, 1) if elapsed > 0 else 0,
+            # The stage where most of the time went is the one limiting the throughput of the run
+            'bound_by': max(stages, key=lambda name: stages[name]['seconds']) if records > 0 else None,
+            'stages': stages
+        }
+
+    def report(self, stats_file:str=None) -> dict:
+        # Logs the final per-stage stats and optionally writes them to "stats_file" as JSON
+
+        summary = self.summary()
+
+        self.logger.info('Processed {} records ({} input bytes) in {:.2f} seconds / {:.0f} records/s / bound by {}'.format(
+            summary['records'], summary['input_bytes'], summary['elapsed_seconds'], summary['records_per_second'], summary['bound_by']
+        ))
+
+        for name, stage in summary['stages'].items():
+            self.logger.info('Stage {:<9}: {} records / {:.2f} seconds / {:.0f} records/s / p50 {:.1f}us / p99 {:.1f}us / max {:.1f}us'.format(
+                name, stage['records'], stage['seconds'], stage['records_per_second'],
+                stage['latency_us']['p50'], stage['latency_us']['p99'], stage['latency_us']['max']
+            ))
+
+        if stats_file != None:
+            with open(stats_file, 'w') as stats_output:
+                json.dump(summary, stats_output, indent=4)
+            self.logger.info('Stats written to {}'.format(stats_file))
+
+        return summary
@@ -20,8 +20,7 @@ import re
 import shutil
 import subprocess
 import sys
-import wget
-import yaml
+import time
 import zipfile
 
 from pathlib import Path
@@ -97,6 +96,8 @@ class HelperMod:
 
     def get_cyberhunt_tools(self):
 
+        import wget
+
         CYBERNETHUNTER_base_dir = Path.cwd()
 
         # Download Tools
@@ -231,6 +232,8 @@ class HelperMod:
     def load_cybernethunter_config(self, config_path):
         # This function will load cyberhunt_config.yml
         
+        import yaml
+
         self.logger.info('Loading CYBERNETHUNTER Config at {}'.format(config_path))
 
         with open(config_path, 'r') as conf:
@@ -279,6 +282,35 @@ class HelperMod:
                                 if NT_MAGIC_DAT == fileitem.read(4):
                                     zipf.extract(zfile, dst)
                                     
+    def profile_imports(self, modules:list) -> list:
+        # Measures the import cost of each module in a fresh interpreter, so that the results don't 
+        # depend on what has already been imported by the current process. Returns a list of dicts 
+        # with the module name, the import time in seconds (None if it can't be imported) and the
+        # number of modules it loaded.
+
+        profile_code = (
+            "import sys, time\n"
+            "loaded = len(sys.modules)\n"
+            "start = time.perf_counter()\n"
+            "import {}\n"
+            "print(time.perf_counter() - start, len(sys.modules) - loaded)\n"
+        )
+
+        results = []
+
+        for module in modules:
+            start_time = time.perf_counter()
+            process = subprocess.run([sys.executable, '-c', profile_code.format(module)], stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=str(Path(__file__).resolve().parents[2]), universal_newlines=True)
+            wall_time = time.perf_counter() - start_time
+
+            if process.returncode == 0:
+                import_seconds, modules_loaded = process.stdout.split()
+                results.append({'module': module, 'seconds': float(import_seconds), 'modules_loaded': int(modules_loaded), 'process_seconds': wall_time})
+            else:
+                results.append({'module': module, 'seconds': None, 'modules_loaded': 0, 'process_seconds': wall_time})
+
+        return results
+
     def get_value_from_nested_dict(self, record:dict, nested_keys_list):
         
         # This function will return the value of a nested key in a dictionary
@@ -1,4 +1,15 @@
 # -*- coding: utf-8 -*-
 # 2018-2020 Diego Perez (@darkquassar / https://linkedin.com/in/diegope)
 
-# from . import frequency_hunter
\ No newline at end of file
+import importlib
+
+# Registry of the available huntmods, modules are only imported when they are first accessed
+HUNTMODS = ["hunt_engine", "huntmod_template"]
+
+def __getattr__(name):
+    if name in HUNTMODS:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+def __dir__():
+    return sorted(list(globals().keys()) + HUNTMODS)
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+
+'''
+ NAME: hunt_engine.py | version: 0.2
+ CYBERNETHUNTER Version: 0.3
+ AUTHOR: Diego Perez (@darkquasar) - 2026
+ DESCRIPTION: Hunt engine used by the "hunt" action. Loads a YAML hunt template (or a folder of them), compiles the field
+ predicates of all its rules once and evaluates every rule in a single pass over the records yielded by a parsermod,
+ tagging the records that hit one or more rules via transforms.tag_json_record.
+
+ Compilation:
+    - Every distinct predicate (field, modifier, values) gets a bit, so a record is matched by building a bitmask of the
+      predicates it satisfies and each rule is a couple of integer operations over that mask.
+    - Predicates are grouped by field, so each field is read and lowercased once per record however many rules use it.
+    - Plain (equals) values of all rules are merged in a dict per field that maps each value to the bits of the
+      predicates that contain it, a single lookup per field.
+    - contains/startswith/endswith/re predicates are compiled to str methods bound to tuples or precompiled regexes and
+      numeric comparisons share a single float conversion of the value.
+    - Rules are indexed by the bits of their predicates, only the rules sharing a bit with the mask of a record are
+      evaluated, and the hits of each mask are memoized since records of the same kind keep satisfying the same
+      predicates.
+
+ Hunt template format:
+
+    title: Suspicious process creation
+    rules:
+      - name: encoded_powershell
+        description: PowerShell launched with an encoded command
+        severity: high                  # informational, low, medium (default), high, critical
+        tags: [attack.execution, attack.t1059.001]
+        condition: all                  # all (default): every field must match / any: one field is enough
+        match:
+          EventID: 4688                 # equals, a list of values matches any of them
+          NewProcessName|endswith: ['\\powershell.exe', '\\pwsh.exe']
+          CommandLine|contains: [' -enc', ' -encodedcommand']
+        exclude:                        # the rule doesn't hit if any of these fields match
+          ParentProcessName|endswith: '\\ccmexec.exe'
+
+    Modifiers: contains, startswith, endswith, re, gt, gte, lt, lte, all (every value of the list must match), cased (case
+    sensitive match, string matches are case insensitive by default). Regexes are case sensitive unless they use (?i) and
+    numeric comparisons skip the values that aren't numbers. Fields of nested records can be selected with dots (ex:
+    System.EventID) and list values match when any of their items does. A file can hold several YAML documents
+    and each document can be a template with "rules" or a single rule.
+
+ Updates:
+        v0.1 - 18-10-2026 - Created script.
+        v0.2 - 18-10-2026 - Exclude fields with the "all" modifier only discard a hit when every value matches
+
+ ToDo:
+        1. Sigma-like condition expressions (ex: "selection and not filter").
+
+'''
+
+import operator
+import os
+import re
+
+from cybernethunter.helpermods import transforms
+from cybernethunter.helpermods import utils
+
+# Severity levels in increasing order, a record tagged by several rules gets the highest one
+SEVERITY_LEVELS = ['informational', 'low', 'medium', 'high', 'critical']
+
+# Max number of distinct predicate masks whose hits are memoized, the memo is cleared when it's full
+MASK_MEMO_SIZE = 65536
+
+# Fields added to the records that hit at least one rule
+TAG_FIELDS = ['hunt_template', 'hunt_rules', 'hunt_severity', 'hunt_tags']
+
+STRING_MODIFIERS = ['equals', 'contains', 'startswith', 'endswith']
+NUMERIC_MODIFIERS = {'gt': operator.gt, 'gte': operator.ge, 'lt': operator.lt, 'lte': operator.le}
+MATCH_MODIFIERS = STRING_MODIFIERS + ['re'] + list(NUMERIC_MODIFIERS)
+
+class FieldPredicates:
+    # Compiled predicates of a single field. Equals values are kept in dicts (value -> mask of the predicates that contain
+    # it), numeric comparisons in a list of (bit, operator, threshold) and the other predicates in lists of (bit, callable).
+    # "folded" ones are matched against the lowercased value.
+
+    def __init__(self, field:str):
+
+        self.field = field
+        # Fields like "System.EventID" are looked up as a key first and then as a path in nested records
+        self.path = field.split('.') if '.' in field else None
+        self.cased_values = {}
+        self.folded_values = {}
+        self.cased_predicates = []
+        self.folded_predicates = []
+        self.numeric_predicates = []
+        # Set once the field has predicates on the lowercased value, so that fields only matched case sensitively aren't lowercased
+        self.folded = False
+
+    def match(self, value) -> int:
+        # Returns the mask of the predicates satisfied by "value"
+
+        if not isinstance(value, str):
+            if isinstance(value, (list, tuple)):
+                mask = 0
+                for item in value:
+                    if item != None:
+                        mask = mask | self.match(item)
+                return mask
+            value = str(value)
+
+        mask = 0
+        if self.cased_values:
+            mask = self.cased_values.get(value, 0)
+        for bit, predicate in self.cased_predicates:
+            if predicate(value):
+                mask = mask | bit
+
+        if self.numeric_predicates:
+            try:
+                number = float(value)
+                for bit, compare, threshold in self.numeric_predicates:
+                    if compare(number, threshold):
+                        mask = mask | bit
+            except ValueError:
+                pass
+
+        if self.folded:
+            value = value.lower()
+            if self.folded_values:
+                mask = mask | self.folded_values.get(value, 0)
+            for bit, predicate in self.folded_predicates:
+                if predicate(value):
+                    mask = mask | bit
+
+        return mask
+
+class HuntMod:
+
+    def __init__(self, hunt_template:str, hits_only:bool=True):
+
+        # Setup logging
+        utilities = utils.HelperMod()
+        self.logger = utilities.get_logger('CYBERNETHUNTER.HUNTMOD')
+        self.transforms = transforms.HelperMod()
+
+        # hunt_template: YAML hunt template or folder of templates (*.yml, *.yaml)
+        # hits_only: only yield the records that hit a rule, otherwise all the records are yielded and only hits are tagged
+        self.hunt_template = hunt_template
+        self.hits_only = hits_only
+
+        self.fields = {}
+        self.predicate_bits = {}
+        self.rules = []
+        self.rules_by_bit = []
+        self.mask_hits = {}
+
+        self.load_templates(hunt_template)
+        self.compile_rule_index()
+
+        self.records_count = 0
+        self.hits_count = 0
+        self.rule_hits = [0] * len(self.rules)
+
+        self.logger.info('Compiled {} hunt rules into {} predicates over {} fields'.format(len(self.rules), len(self.predicate_bits), len(self.fields)))
+
+    def load_templates(self, hunt_template:str):
+
+        import yaml
+
+        if os.path.isdir(hunt_template):
+            template_files = sorted(os.path.join(hunt_template, name) for name in os.listdir(hunt_template) if name.endswith(('.yml', '.yaml')))
+        else:
+            template_files = [hunt_template]
+
+        for template_file in template_files:
+            with open(template_file, 'r', encoding='utf-8') as template_input:
+                try:
+                    documents = list(yaml.safe_load_all(template_input))
+                except yaml.YAMLError as e:
+                    raise ValueError('{}: invalid YAML: {}'.format(template_file, e))
+
+            for document in documents:
+                if document == None:
+                    continue
+                if not isinstance(document, dict):
+                    raise ValueError('{}: a hunt template must be a mapping with a "rules" list or a single rule'.format(template_file))
+
+                title = document.get('title', os.path.splitext(os.path.basename(template_file))[0])
+                rules = document['rules'] if 'rules' in document else [document]
+
+                for rule in rules:
+                    self.compile_rule(rule, title, template_file)
+
+        if len(self.rules) == 0:
+            raise ValueError('No hunt rules found in {}'.format(hunt_template))
+
+    def compile_rule(self, rule:dict, title:str, template_file:str):
+        # Compiles the "match" and "exclude" sections of a rule into masks of predicate bits
+
+        name = rule.get('name', rule.get('title')) if isinstance(rule, dict) else None
+        if name == None:
+            raise ValueError('{}: every hunt rule must be a mapping with a "name"'.format(template_file))
+
+        if not isinstance(rule.get('match'), dict) or len(rule['match']) == 0:
+            raise ValueError('{}: rule {} has no "match" fields'.format(template_file, name))
+
+        condition = rule.get('condition', 'all')
+        if condition not in ['all', 'any']:
+            raise ValueError('{}: rule {} has an unknown condition {}, choose from all, any'.format(template_file, name, condition))
+
+        severity = str(rule.get('severity', 'medium')).lower()
+        if severity not in SEVERITY_LEVELS:
+            raise ValueError('{}: rule {} has an unknown severity {}, choose from {}'.format(template_file, name, severity, ', '.join(SEVERITY_LEVELS)))
+
+        tags = rule.get('tags', [])
+        if not isinstance(tags, list):
+            tags = [tags]
+
+        # Each field of the match section is a group: the mask of the bits that must all be set for the field to match
+        groups = []
+        for field_spec, values in rule['match'].items():
+            groups.append(self.compile_field(field_spec, values, name, template_file))
+
+        # Any exclude field that matches discards the hit, each one is a group like the ones of the match section
+        exclude_groups = []
+        for field_spec, values in (rule.get('exclude') or {}).items():
+            exclude_groups.append(self.compile_field(field_spec, values, name, template_file))
+
+        # Rules matching on every field only need the union of their groups
+        if condition == 'all':
+            match_mask = 0
+            for group in groups:
+                match_mask = match_mask | group
+            groups = [match_mask]
+
+        self.rules.append({
+            'name': str(name),
+            'title': title,
+            'severity': severity,
+            'severity_level': SEVERITY_LEVELS.index(severity),
+            'tags': [str(tag) for tag in tags],
+            'groups': groups,
+            'exclude_groups': exclude_groups
+        })
+
+    def compile_field(self, field_spec:str, values, rule_name:str, template_file:str) -> int:
+        # Compiles "field|modifier|..." and its values, returns the mask of the bits that must be set for it to match
+
+        field, *modifiers = str(field_spec).split('|')
+
+        unknown = [modifier for modifier in modifiers if modifier not in MATCH_MODIFIERS + ['all', 'cased']]
+        match_modifiers = [modifier for modifier in modifiers if modifier in MATCH_MODIFIERS]
+        if len(unknown) > 0 or len(match_modifiers) > 1:
+            raise ValueError('{}: rule {} has invalid modifiers in {}, use one of {} plus optionally all and cased'.format(template_file, rule_name, field_spec, ', '.join(MATCH_MODIFIERS)))
+
+        modifier = match_modifiers[0] if len(match_modifiers) > 0 else 'equals'
+        cased = 'cased' in modifiers or modifier == 're' or modifier in NUMERIC_MODIFIERS
+
+        if not isinstance(values, list):
+            values = [values]
+        if len(values) == 0 or any(value == None for value in values):
+            raise ValueError('{}: rule {} has empty or null values in {}'.format(template_file, rule_name, field_spec))
+
+        if modifier in NUMERIC_MODIFIERS:
+            try:
+                values = [float(value) for value in values]
+            except (TypeError, ValueError):
+                raise ValueError('{}: rule {} compares {} with non numeric values'.format(template_file, rule_name, field_spec))
+        else:
+            # Values are matched against the string representation of the record values (ex: EventID: 4688 matches "4688")
+            values = [str(value) if cased else str(value).lower() for value in values]
+
+        # A list of values matches any of them, unless the "all" modifier asks for every one of them (one bit each)
+        if 'all' in modifiers:
+            value_groups = [[value] for value in values]
+        else:
+            value_groups = [values]
+
+        mask = 0
+        for value_group in value_groups:
+            mask = mask | self.get_predicate_bit(field, modifier, cased, value_group)
+
+        return mask
+
+    def get_predicate_bit(self, field:str, modifier:str, cased:bool, values:list) -> int:
+        # Identical predicates of different rules share the same bit, so they are only evaluated once per record
+
+        key = (field, modifier, cased, tuple(sorted(set(values), key=str)))
+        bit = self.predicate_bits.get(key)
+        if bit != None:
+            return bit
+
+        bit = 1 << len(self.predicate_bits)
+        self.predicate_bits[key] = bit
+
+        field_predicates = self.fields.get(field)
+        if field_predicates == None:
+            field_predicates = self.fields[field] = FieldPredicates(field)
+
+        if modifier == 'equals':
+            table = field_predicates.cased_values if cased else field_predicates.folded_values
+            for value in values:
+                table[value] = table.get(value, 0) | bit
+            field_predicates.folded = field_predicates.folded or not cased
+            return bit
+
+        if modifier in NUMERIC_MODIFIERS:
+            # A list of thresholds matches any of them, so each one sets the same bit
+            for threshold in values:
+                field_predicates.numeric_predicates.append((bit, NUMERIC_MODIFIERS[modifier], threshold))
+            return bit
+
+        predicate = self.compile_predicate(modifier, values)
+        if cased:
+            field_predicates.cased_predicates.append((bit, predicate))
+        else:
+            field_predicates.folded_predicates.append((bit, predicate))
+            field_predicates.folded = True
+
+        return bit
+
+    def compile_predicate(self, modifier:str, values:list):
+        # Builds the callable that tells whether a (string) record value satisfies the predicate
+
+        if modifier == 'contains':
+            if len(values) == 1:
+                needle = values[0]
+                return lambda value: needle in value
+            return re.compile('|'.join(re.escape(value) for value in values)).search
+
+        elif modifier == 'startswith':
+            prefixes = tuple(values)
+            return lambda value: value.startswith(prefixes)
+
+        elif modifier == 'endswith':
+            suffixes = tuple(values)
+            return lambda value: value.endswith(suffixes)
+
+        else:
+            patterns = [re.compile(value) for value in values]
+            if len(patterns) == 1:
+                return patterns[0].search
+            return lambda value: any(pattern.search(value) for pattern in patterns)
+
+    def compile_rule_index(self):
+        # For every predicate bit, the indexes of the rules that use it in their match section
+
+        self.rules_by_bit = [[] for _ in self.predicate_bits]
+        for index, rule in enumerate(self.rules):
+            rule_mask = 0
+            for group in rule['groups']:
+                rule_mask = rule_mask | group
+            while rule_mask:
+                lowest_bit = rule_mask & -rule_mask
+                self.rules_by_bit[lowest_bit.bit_length() - 1].append(index)
+                rule_mask = rule_mask ^ lowest_bit
+
+        # (field, path, match) of every field, so the loop over the fields of a record doesn't look up attributes
+        self.field_matchers = [(field_predicates.field, field_predicates.path, field_predicates.match) for field_predicates in self.fields.values()]
+
+    def get_nested_value(self, record:dict, path:list):
+
+        value = record
+        for key in path:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(key)
+            if value == None:
+                return None
+
+        return value
+
+    def match_record(self, record:dict) -> list:
+        # Returns the indexes of the rules hit by the record, in the order of the template. The list is shared by all the
+        # records with the same mask, it must not be modified
+
+        mask = 0
+        get = record.get
+
+        for field, path, match in self.field_matchers:
+            value = get(field)
+            if value == None:
+                if path == None or get(path[0]) == None:
+                    continue
+                value = self.get_nested_value(record, path)
+                if value == None:
+                    continue
+            mask = mask | match(value)
+
+        if mask == 0:
+            return []
+
+        hits = self.mask_hits.get(mask)
+        if hits == None:
+            if len(self.mask_hits) >= MASK_MEMO_SIZE:
+                self.mask_hits.clear()
+            hits = self.mask_hits[mask] = self.get_mask_hits(mask)
+
+        return hits
+
+    def get_mask_hits(self, mask:int) -> list:
+        # Evaluates the rules against a mask of satisfied predicates
+
+        # Candidate rules are the ones using at least one of the predicates satisfied by the record
+        candidates = set()
+        remaining = mask
+        while remaining:
+            lowest_bit = remaining & -remaining
+            candidates.update(self.rules_by_bit[lowest_bit.bit_length() - 1])
+            remaining = remaining ^ lowest_bit
+
+        hits = []
+        for index in sorted(candidates):
+            rule = self.rules[index]
+            if any(mask & group == group for group in rule['exclude_groups']):
+                continue
+            for group in rule['groups']:
+                if mask & group == group:
+                    hits.append(index)
+                    break
+
+        return hits
+
+    def hunt_record(self, record:dict):
+        # Tags the record with the rules it hits. Returns None for the records without hits when hits_only is set
+
+        # Parsermods can yield things that aren't records (ex: the xml_parser in nested mode yields an empty string at the end)
+        if not isinstance(record, dict):
+            return None if self.hits_only else record
+
+        self.records_count = self.records_count + 1
+        hits = self.match_record(record)
+
+        if len(hits) == 0:
+            return None if self.hits_only else record
+
+        self.hits_count = self.hits_count + 1
+        rules = [self.rules[index] for index in hits]
+        for index in hits:
+            self.rule_hits[index] = self.rule_hits[index] + 1
+
+        tags = []
+        for rule in rules:
+            for tag in rule['tags']:
+                if tag not in tags:
+                    tags.append(tag)
+
+        self.transforms.tag_json_record(record, [{
+            'hunt_template': rules[0]['title'],
+            'hunt_rules': [rule['name'] for rule in rules],
+            'hunt_severity': max(rules, key=lambda rule: rule['severity_level'])['severity'],
+            'hunt_tags': tags
+        }])
+
+        return record
+
+    def hunt(self, records):
+        # Runs all the rules over a generator of records (ex: the one returned by a parsermod's execute()) in a single pass
+
+        hunt_record = self.hunt_record
+        for record in records:
+            if record == None:
+                continue
+            record = hunt_record(record)
+            if record != None:
+                yield record
+
+    def report(self) -> dict:
+        # Logs the number of hits of each rule and returns them
+
+        rule_hits = {rule['name']: hits for rule, hits in zip(self.rules, self.rule_hits)}
+
+        self.logger.info('Hunted {} records, {} records hit at least one of the {} rules'.format(self.records_count, self.hits_count, len(self.rules)))
+        for rule in sorted(rule_hits, key=rule_hits.get, reverse=True):
+            if rule_hits[rule] > 0:
+                self.logger.info('Rule {}: {} hits'.format(rule, rule_hits[rule]))
+
+        return rule_hits
@@ -1,60 +1,45 @@
 '''
- MODULE NAME: huntmod_template.py | Version: 0.1
- CYBERNETHUNTER Version: 0.1
+ MODULE NAME: huntmod_template.py | Version: 0.2
+ CYBERNETHUNTER Version: 0.3
  AUTHOR: Diego Perez (@darkquasar) - 2018
- DESCRIPTION: This module will load hunting templates and execute them against an ElasticSearch database via Apache Spark. It should be called from within CYBERNETHUNTER-jupyter
-'''
+ DESCRIPTION: Template for huntmods. A huntmod runs a parsermod over a log file and sends its records through the hunt
+ engine, so that all the rules of a hunt template are evaluated in a single pass over the file. It can be used from
+ within CYBERNETHUNTER-jupyter to get the hits of a template as a generator of records.
 
-import logging
-import pyspark
-import sys
+ Updates:
+        v0.2 - 18-10-2026 - Replaced the (removed) multiparser and pyspark with the parsermods and the hunt engine
 
-# Ugly but workable importing solution so that the package can be both 
-# imported as a package, run from commandline with `python -m cyberhunter`
-# or from the source directory as `python cyberhunter.py`
-if "cybernethunter" in sys.modules:
-    from cybernethunter.parsermods import multiparser as mp
-else:
-    from parsermods import multiparser as mp
-    
+'''
 
+from cybernethunter import parsermods
+from cybernethunter.helpermods import utils
+from cybernethunter.huntmods import hunt_engine
 
-# All parsermods have a class called "mod" and define
+# All huntmods have a class called "HuntMod" and define
 # any initialization parameters inside.
-# Parsermods can have any number of functions inside the "mod" class.
-class mod:
-    def __init__(self, xmlparsetype, logtype, filepath, output, **kwargs):
-        
+# Huntmods can have any number of functions inside the "HuntMod" class.
+class HuntMod:
+    def __init__(self, hunt_template, parsermod, filepath, hits_only=True, **parsermod_options):
+
         # Setup logging
-        # We need to pass the "logger" to any Classes or Modules that may use it 
-        # in our script
-        try:
-            import coloredlogs
-            self.logger = logging.getLogger('CYBERNETHUNTER.HUNTMOD')
-            coloredlogs.install(fmt='%(asctime)s - %(name)s - %(message)s', level="DEBUG", logger=self.logger)
-
-        except ModuleNotFoundError:
-            self.logger = logging.getLogger('CYBERNETHUNTER.HUNTMOD')
-            formatter = logging.Formatter('%(asctime)s - %(name)s - %(message)s')
-            console_handler = logging.StreamHandler()
-            console_handler.setFormatter(formatter)
-            console_handler.setLevel(logging.DEBUG)
-            self.logger.addHandler(console_handler)
-            self.logger.setLevel(logging.INFO)
-  
+        utilities = utils.HelperMod()
+        self.logger = utilities.get_logger('CYBERNETHUNTER.HUNTMOD')
+
         # Initializing variables
-        self.xmlparsetype = xmlparsetype
-        self.logtype = logtype
+        # parsermod: name of the parsermod that reads "filepath" (ex: xml_parser)
+        # parsermod_options: keyword arguments of the parsermod (ex: xmlparsetype="flat")
+        self.hunt_template = hunt_template
+        self.parsermod = parsermod
         self.filepath = filepath
-        self.output = output
+        self.hits_only = hits_only
+        self.parsermod_options = parsermod_options
 
-    # All parsermods must contain an "execute" function that will: 
-    # a. initialize the output pipe via de MultiParser "init_output" func.
-    # b. return a generator back to CYBERNETHUNTER.py so that records can be iterated through.
+    # All huntmods must contain an "execute" function that will
+    # return a generator of the (tagged) records so that they can be iterated through.
     def execute(self):
-        # Instantiating the MultiParser for plain parsing (no modules)
-        self.fileparser = mp.MultiParser(self.xmlparsetype, self.logtype, self.filepath)
-        results = self.fileparser.parser()
-        self.fileparser.init_output(self.output, self.logtype)
-    
-        return results
\ No newline at end of file
+        self.hunter = hunt_engine.HuntMod(self.hunt_template, hits_only=self.hits_only)
+
+        load_parser_mod = parsermods.load_parsermod(self.parsermod)
+        parser = load_parser_mod.ParserMod(self.filepath, **self.parsermod_options)
+
+        return self.hunter.hunt(parser.execute())
@@ -1,4 +1,15 @@
 # -*- coding: utf-8 -*-
 # Copyright (c) 2018-2020 Diego Perez (@darkquassar / https://linkedin.com/in/diegope)
 
-from . import output
\ No newline at end of file
+import importlib
+
+# Registry of the available output modules, modules are only imported when they are first accessed
+OUTPUTMODS = ["output", "columnar_writer", "sqlite_writer", "rabbitmq_publisher", "elasticsearch_bulk", "serializer", "file_writers"]
+
+def __getattr__(name):
+    if name in OUTPUTMODS:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+def __dir__():
+    return sorted(list(globals().keys()) + OUTPUTMODS)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+
+'''
+MODULE NAME: columnar_writer.py | Version: 0.1
+CYBERNETHUNTER Version: 0.3
+AUTHOR: Diego Perez (@darkquassar) - 2026
+DESCRIPTION: Columnar (Parquet / Arrow IPC) file writer used by the "file" output pipe. Records are buffered into
+typed row groups which are spilled to disk as they fill up. Since records coming from different EVTX channels don't
+share the same fields, the schemas of all row groups are unioned when the pipe is closed and the final file is written
+with the unified schema. The resulting files can be scanned lazily from Jupyter, see notebook.HelperMod.load_columnar_output
+
+ Updates:
+        v0.1 - 18-10-2026 - Created script.
+
+ ToDo:
+        1. ----.
+
+'''
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+from cybernethunter.helpermods import utils
+
+class ColumnarWriter:
+
+    def __init__(self, output_file, output_format='parquet', row_group_size=None, compression=None):
+
+        # Setup logging
+        utilities = utils.HelperMod()
+        self.logger = utilities.get_logger('CYBERNETHUNTER.OUTPUT.COLUMNAR')
+
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ModuleNotFoundError:
+            self.logger.error('pyarrow is required for the {} output type, please install it with "pip install pyarrow"'.format(output_format))
+            sys.exit(1)
+
+        self.pa = pa
+        self.pq = pq
+
+        # output_format: "parquet" or "arrow" (Arrow IPC file format, aka Feather v2)
+        # row_group_size: number of records buffered before they are converted to a typed row group
+        # compression: parquet supports snappy, gzip, lz4 and zstd (default snappy), arrow only lz4 and zstd (default none)
+        self.output_file = output_file
+        self.output_format = output_format
+        self.row_group_size = row_group_size if row_group_size else 65536
+        self.compression = compression
+
+        if self.output_format == 'arrow' and self.compression not in [None, 'lz4', 'zstd']:
+            self.logger.warning('Compression {} is not supported by the arrow output type, writing uncompressed'.format(self.compression))
+            self.compression = None
+
+        # Row groups are spilled as Arrow IPC files next to the output file until the pipe is closed
+        self.spill_dir = tempfile.mkdtemp(prefix='.cybernethunter_spill_', dir=os.path.dirname(os.path.abspath(self.output_file)))
+        self.spill_files = []
+        self.schemas = []
+        self.buffer = []
+        self.records_count = 0
+
+    def write(self, record:dict):
+
+        self.buffer.append(record)
+
+        if len(self.buffer) >= self.row_group_size:
+            self.flush_row_group()
+
+    def flush_row_group(self):
+
+        if len(self.buffer) == 0:
+            return
+
+        table = self.records_to_table(self.buffer)
+        self.records_count = self.records_count + table.num_rows
+        self.buffer = []
+
+        spill_file = os.path.join(self.spill_dir, 'part-{:06d}.arrow'.format(len(self.spill_files)))
+        with self.pa.OSFile(spill_file, 'wb') as sink:
+            with self.pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        self.spill_files.append(spill_file)
+        self.schemas.append(table.schema)
+
+    def records_to_table(self, records:list):
+        # Builds a typed table out of a list of records, columns are the union of the keys of all records.
+        # Columns whose values can't be converted to a single arrow type (ex: mixed ints and strings, nested dicts
+        # with different shapes) are stored as strings.
+
+        columns = {}
+        for record in records:
+            for key in record:
+                columns[key] = None
+
+        arrays = []
+        for column in columns:
+            values = [record.get(column) for record in records]
+            try:
+                arrays.append(self.pa.array(values))
+            except (self.pa.ArrowInvalid, self.pa.ArrowTypeError, self.pa.ArrowNotImplementedError, OverflowError, TypeError):
+                arrays.append(self.pa.array([self.to_string(value) for value in values], type=self.pa.string()))
+
+        return self.pa.Table.from_arrays(arrays, names=[str(column) for column in columns])
+
+    def to_string(self, value):
+
+        if value == None or isinstance(value, str):
+            return value
+        elif isinstance(value, (dict, list)):
+            return json.dumps(value, default=str)
+        else:
+            return str(value)
+
+    def unify_schemas(self, schemas:list):
+        # Union of the fields of all row groups in order of appearance. Fields with
+        # conflicting types across row groups are promoted to strings.
+
+        fields = {}
+
+        for schema in schemas:
+            for field in schema:
+                current_type = fields.get(field.name)
+
+                if current_type == None or self.pa.types.is_null(current_type):
+                    fields[field.name] = field.type
+                elif self.pa.types.is_null(field.type) or current_type == field.type:
+                    continue
+                else:
+                    fields[field.name] = self.pa.string()
+
+        return self.pa.schema([self.pa.field(name, field_type) for name, field_type in fields.items()])
+
+    def conform_table(self, table, schema):
+        # Adds the missing columns (as nulls) and casts the existing ones to the unified schema
+
+        arrays = []
+
+        for field in schema:
+            if field.name not in table.column_names:
+                arrays.append(self.pa.nulls(table.num_rows, type=field.type))
+                continue
+
+            column = table.column(field.name)
+            if column.type != field.type:
+                try:
+                    column = column.cast(field.type)
+                except (self.pa.ArrowInvalid, self.pa.ArrowNotImplementedError):
+                    column = self.pa.array([self.to_string(value) for value in column.to_pylist()], type=self.pa.string())
+
+            arrays.append(column)
+
+        return self.pa.Table.from_arrays(arrays, schema=schema)
+
+    def close(self):
+
+        self.flush_row_group()
+
+        try:
+            if len(self.spill_files) == 0:
+                self.logger.info('No records to write to {}'.format(self.output_file))
+                return
+
+            schema = self.unify_schemas(self.schemas)
+
+            if self.output_format == 'parquet':
+                writer = self.pq.ParquetWriter(self.output_file, schema, compression=self.compression if self.compression else 'snappy')
+            else:
+                writer = self.pa.ipc.new_file(self.output_file, schema, options=self.pa.ipc.IpcWriteOptions(compression=self.compression))
+
+            try:
+                for spill_file in self.spill_files:
+                    with self.pa.memory_map(spill_file, 'r') as source:
+                        table = self.pa.ipc.open_file(source).read_all()
+                    writer.write_table(self.conform_table(table, schema))
+            finally:
+                writer.close()
+
+            self.logger.info('Wrote {} records in {} row groups with {} columns to {}'.format(self.records_count, len(self.spill_files), len(schema), self.output_file))
+
+        finally:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
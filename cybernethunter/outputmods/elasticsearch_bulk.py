@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+
+'''
+MODULE NAME: elasticsearch_bulk.py | Version: 0.2
+CYBERNETHUNTER Version: 0.3
+AUTHOR: Diego Perez (@darkquassar) - 2026
+DESCRIPTION: Elasticsearch / OpenSearch bulk API writer used by the "elasticsearch" output pipe. Records are serialized
+into _bulk NDJSON batches capped by number of documents and by bytes, and the batches are sent by a pool of threads,
+each one keeping its own HTTP keep-alive connection. Requests rejected with 429 (or 502/503/504) and the documents
+rejected with 429 inside a bulk response are retried with exponential backoff. Records are routed to one index per
+EVTX channel so that they pick up the index templates in stack/docker/config/elasticsearch/mappings:
+
+    logs-dfir-winevent-<channel>   records with a Channel (ex: logs-dfir-winevent-microsoft-windows-sysmon-operational)
+    logs-dfir-<log_type>           any other record (ex: logs-dfir-csv)
+
+ Updates:
+        v0.1 - 18-10-2026 - Created script.
+        v0.2 - 18-10-2026 - Documents are encoded by the shared serializer
+
+ ToDo:
+        1. ----.
+
+'''
+
+import base64
+import http.client
+import json
+import random
+import re
+import ssl
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from cybernethunter.helpermods import utils
+from cybernethunter.outputmods import serializer as outputmod_serializer
+
+# Characters that are not allowed in elasticsearch index names
+INVALID_INDEX_CHARACTERS = re.compile(r'[\\/*?"<>|\s,#:]+')
+
+# Whole bulk requests answered with these codes are retried
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+class ElasticsearchBulkWriter:
+
+    def __init__(self, hosts, index_prefix='logs-dfir', log_type=None, credentials=None, batch_size=None, batch_bytes=None, workers=4, max_retries=8, initial_backoff=0.5, max_backoff=30, timeout=120, verify_ssl=True, serializer=None):
+
+        # Setup logging
+        utilities = utils.HelperMod()
+        self.logger = utilities.get_logger('CYBERNETHUNTER.OUTPUT.ELASTICSEARCH')
+
+        # hosts: list of node urls (ex: ["http://127.0.0.1:9200"]), bulk requests are spread across them
+        # index_prefix: records go to "<index_prefix>-winevent-<channel>" or "<index_prefix>-<log_type>"
+        # credentials: ["user", "password"] for basic authentication
+        # batch_size / batch_bytes: a bulk request is sent as soon as either limit is reached
+        # workers: number of bulk requests in flight at the same time
+        # serializer: serializer.Serializer used to encode the documents, the fastest available one by default
+        self.hosts = [urlsplit(host if '//' in host else 'http://' + host) for host in hosts]
+        self.index_prefix = index_prefix
+        self.default_index = self.get_index_name('{}-{}'.format(index_prefix, log_type if log_type else 'records'))
+        self.batch_size = batch_size if batch_size else 5000
+        self.batch_bytes = batch_bytes if batch_bytes else 10 * 1024 * 1024
+        self.workers = max(1, workers)
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.serializer = serializer if serializer else outputmod_serializer.Serializer()
+
+        self.headers = {'Content-Type': 'application/x-ndjson'}
+        if credentials:
+            token = base64.b64encode('{}:{}'.format(credentials[0], credentials[1]).encode()).decode()
+            self.headers['Authorization'] = 'Basic {}'.format(token)
+
+        self.ssl_context = ssl.create_default_context()
+        if not verify_ssl:
+            self.ssl_context.check_hostname = False
+            self.ssl_context.verify_mode = ssl.CERT_NONE
+
+        # channel -> bulk action line with the index of the channel
+        self.action_lines = {}
+
+        self.batch = []
+        self.batch_docs = 0
+        self.batch_size_bytes = 0
+
+        # Bounds the number of batches queued in the pool, write() blocks when the cluster can't keep up
+        self.pending_batches = threading.BoundedSemaphore(self.workers * 2)
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='cybernethunter-bulk')
+        self.thread_local = threading.local()
+        self.next_host = 0
+
+        self.stats_lock = threading.Lock()
+        self.docs_sent = 0
+        self.docs_indexed = 0
+        self.docs_failed = 0
+        self.retries = 0
+        self.requests_count = 0
+        self.start_time = time.perf_counter()
+
+        self.logger.info('Elasticsearch bulk writer ready: {} / batches of {} docs or {} bytes / {} workers'.format(', '.join(host.netloc for host in self.hosts), self.batch_size, self.batch_bytes, self.workers))
+
+    # *** Main thread ***
+
+    def write(self, record:dict):
+
+        action_line = self.get_action_line(record)
+        document_line = self.serializer.dumpb(record) + b'\n'
+
+        self.batch.append(action_line)
+        self.batch.append(document_line)
+        self.batch_docs = self.batch_docs + 1
+        self.batch_size_bytes = self.batch_size_bytes + len(action_line) + len(document_line)
+
+        if self.batch_docs >= self.batch_size or self.batch_size_bytes >= self.batch_bytes:
+            self.flush()
+
+    def get_action_line(self, record:dict) -> bytes:
+
+        # Flat records (xml_parser) carry the channel at the top level, nested records (evtx_parser) under Event.System.Channel
+        channel = record.get('Channel')
+        if channel == None:
+            event = record.get('Event')
+            if isinstance(event, dict) and isinstance(event.get('System'), dict):
+                channel = event['System'].get('Channel')
+
+        action_line = self.action_lines.get(channel)
+        if action_line == None:
+            index = self.get_index_name('{}-winevent-{}'.format(self.index_prefix, channel)) if channel else self.default_index
+            action_line = self.action_lines[channel] = (json.dumps({'index': {'_index': index}}) + '\n').encode('utf-8')
+            self.logger.info('Routing {} records to index {}'.format(channel if channel else 'channel-less', index))
+
+        return action_line
+
+    def get_index_name(self, name:str) -> str:
+        # Index names must be lowercase and can't contain some characters nor start with "-", "_" or "+"
+        return INVALID_INDEX_CHARACTERS.sub('-', name.lower()).lstrip('-_+')
+
+    def flush(self):
+
+        if self.batch_docs == 0:
+            return
+
+        body = b''.join(self.batch)
+        docs = self.batch_docs
+        self.batch = []
+        self.batch_docs = 0
+        self.batch_size_bytes = 0
+
+        self.pending_batches.acquire()
+        self.pool.submit(self.send_batch, body, docs)
+
+    def close(self):
+
+        self.flush()
+        self.pool.shutdown(wait=True)
+
+        elapsed = time.perf_counter() - self.start_time
+        self.logger.info('Elasticsearch docs sent: {} / indexed: {} / failed: {} / retries: {} / bulk requests: {} ({:.0f} docs/s)'.format(
+            self.docs_sent, self.docs_indexed, self.docs_failed, self.retries, self.requests_count, self.docs_indexed / elapsed if elapsed > 0 else 0
+        ))
+
+    # *** Bulk worker threads ***
+
+    def send_batch(self, body:bytes, docs:int):
+
+        try:
+            with self.stats_lock:
+                self.docs_sent = self.docs_sent + docs
+
+            for attempt in range(self.max_retries + 1):
+
+                if attempt > 0:
+                    self.backoff(attempt)
+
+                try:
+                    status, response = self.post_bulk(body)
+                except (OSError, http.client.HTTPException) as err:
+                    self.reset_connection()
+                    self.logger.warning('Bulk request failed ({}), attempt {} of {}'.format(err, attempt + 1, self.max_retries + 1))
+                    continue
+
+                if status in RETRY_STATUS_CODES:
+                    continue
+
+                if status >= 300:
+                    self.count_failed(docs, 'bulk request rejected with HTTP {}: {}'.format(status, response[:500]))
+                    return
+
+                body, docs = self.process_bulk_response(body, json.loads(response))
+                if docs == 0:
+                    return
+
+            self.count_failed(docs, 'gave up after {} retries'.format(self.max_retries))
+
+        except Exception as err:
+            self.count_failed(docs, repr(err))
+
+        finally:
+            self.pending_batches.release()
+
+    def process_bulk_response(self, body:bytes, response:dict):
+        # Counts the indexed documents and rebuilds a bulk body with the documents rejected with 429
+
+        if response.get('errors') != True:
+            self.count_indexed(len(response.get('items', [])))
+            return b'', 0
+
+        lines = body.splitlines(keepends=True)
+        retry_lines = []
+        indexed = 0
+
+        for position, item in enumerate(response.get('items', [])):
+            result = next(iter(item.values()))
+            status = result.get('status', 500)
+
+            if status < 300:
+                indexed = indexed + 1
+            elif status == 429:
+                retry_lines.append(lines[position * 2])
+                retry_lines.append(lines[position * 2 + 1])
+            else:
+                self.count_failed(1, '{} {}'.format(status, json.dumps(result.get('error'))[:500]))
+
+        self.count_indexed(indexed)
+
+        return b''.join(retry_lines), len(retry_lines) // 2
+
+    def post_bulk(self, body:bytes):
+
+        connection = self.get_connection()
+        connection.request('POST', connection.bulk_path, body=body, headers=self.headers)
+        response = connection.getresponse()
+        data = response.read()
+
+        with self.stats_lock:
+            self.requests_count = self.requests_count + 1
+
+        return response.status, data.decode('utf-8', errors='replace')
+
+    def get_connection(self):
+        # One keep-alive connection per worker thread, workers are spread across the hosts
+
+        connection = getattr(self.thread_local, 'connection', None)
+        if connection != None:
+            return connection
+
+        with self.stats_lock:
+            host = self.hosts[self.next_host % len(self.hosts)]
+            self.next_host = self.next_host + 1
+
+        if host.scheme == 'https':
+            connection = http.client.HTTPSConnection(host.hostname, host.port or 443, timeout=self.timeout, context=self.ssl_context)
+        else:
+            connection = http.client.HTTPConnection(host.hostname, host.port or 9200, timeout=self.timeout)
+
+        connection.bulk_path = host.path.rstrip('/') + '/_bulk'
+        self.thread_local.connection = connection
+
+        return connection
+
+    def reset_connection(self):
+
+        connection = getattr(self.thread_local, 'connection', None)
+        if connection != None:
+            connection.close()
+            self.thread_local.connection = None
+
+    def backoff(self, attempt:int):
+
+        with self.stats_lock:
+            self.retries = self.retries + 1
+
+        # Exponential backoff with jitter so that the workers don't retry in lockstep
+        delay = min(self.max_backoff, self.initial_backoff * (2 ** (attempt - 1)))
+        time.sleep(delay * random.uniform(0.5, 1.0))
+
+    def count_indexed(self, docs:int):
+
+        with self.stats_lock:
+            self.docs_indexed = self.docs_indexed + docs
+
+    def count_failed(self, docs:int, reason:str):
+
+        with self.stats_lock:
+            self.docs_failed = self.docs_failed + docs
+            failed = self.docs_failed
+
+        # Only log the first errors to avoid flooding stdout when the cluster rejects everything
+        if failed - docs < 10:
+            self.logger.error('{} documents could not be indexed: {}'.format(docs, reason))
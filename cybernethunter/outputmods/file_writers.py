@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+
+'''
+MODULE NAME: file_writers.py | Version: 0.3
+CYBERNETHUNTER Version: 0.3
+AUTHOR: Diego Perez (@darkquassar) - 2026
+DESCRIPTION: JSON and CSV/TSV file writers used by the "file" output pipe. Files are opened once, records are encoded
+into a batch and every batch is written with a single writelines() call into a large write buffer, optionally compressed
+on the fly (gzip or zstd). Output files can be rotated by size: "output.json" becomes "output.0001.json", "output.0002.json",
+etc. and every part of a CSV/TSV output starts with its own header row.
+
+Records with different fields (ex: events of different EVTX channels) are written column-aligned in CSV/TSV outputs:
+    - "spill" mode (single pass): rows are spilled to a temporary file as they come, in the field order of each record,
+      while the sequence of record schemas is kept in memory. When the pipe is closed the union of all the columns is
+      known and the spilled rows are rewritten aligned to it, keeping the order of the records.
+    - "scan" mode (two passes): the union of the columns is computed beforehand by a schema scan of the input and rows
+      are aligned as they are written.
+Every distinct schema (tuple of keys) gets a cached itemgetter mapping its values to the output columns, so aligning
+a row only costs a tuple build.
+
+ Updates:
+        v0.1 - 18-10-2026 - Created script.
+        v0.2 - 18-10-2026 - Column-aligned CSV/TSV outputs (spill and scan modes)
+        v0.3 - 18-10-2026 - Spilled rows with fields over the csv module's 128 KB limit are read back, the spill file is kept if the merge fails
+
+ ToDo:
+        1. ----.
+
+'''
+
+import csv
+import gzip
+import io
+import os
+import shutil
+import sys
+import tempfile
+
+from operator import itemgetter
+
+from cybernethunter.helpermods import utils
+
+# Size of the write buffer of the output files
+FILE_BUFFER_SIZE = 8 * 1024 * 1024
+
+# Field size limit used to read the spilled rows back, csv.reader rejects fields over 128 KB by default (ex: big
+# PowerShell ScriptBlockText values). csv.field_size_limit takes a C long, which is 32 bits on Windows.
+SPILL_FIELD_SIZE_LIMIT = min(sys.maxsize, 2**31 - 1)
+
+# Extension appended to the output file name for each compression codec
+COMPRESSION_EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+
+class LineBuffer:
+    # File-like object that keeps whatever csv.writer writes in a list, so that rows are encoded in batches.
+    # csv.writer binds the write method once, so the list is emptied in place instead of replaced.
+
+    def __init__(self):
+        self.lines = []
+        self.write = self.lines.append
+
+    def drain(self) -> bytes:
+        data = ''.join(self.lines).encode('utf-8')
+        self.lines.clear()
+        return data
+
+class FileWriter:
+    # Base writer: batching, compression and rotation of the output file. Subclasses implement encode_batch()
+
+    def __init__(self, output_file, batch_size=None, compression=None, rotate_size=None):
+
+        # Setup logging
+        utilities = utils.HelperMod()
+        self.logger = utilities.get_logger('CYBERNETHUNTER.OUTPUT.FILE')
+
+        # batch_size: number of records encoded and written at once
+        # compression: None, "gzip" or "zstd"
+        # rotate_size: max number of (uncompressed) bytes per output file, None disables the rotation
+        self.output_file = output_file
+        self.batch_size = batch_size if batch_size else 10000
+        self.compression = compression
+        self.rotate_size = rotate_size
+
+        if self.compression not in [None, 'gzip', 'zstd']:
+            self.logger.warning('Compression {} is not supported by json/csv/tsv outputs, writing uncompressed'.format(self.compression))
+            self.compression = None
+
+        if self.compression == 'zstd':
+            try:
+                import zstandard
+                self.zstandard = zstandard
+            except ModuleNotFoundError:
+                self.logger.error('zstandard is required for zstd compressed outputs, please install it with "pip install zstandard"')
+                sys.exit(1)
+
+        self.batch = []
+        self.part_number = 0
+        self.part_bytes = 0
+        self.records_count = 0
+        self.bytes_count = 0
+        self.files = []
+
+        self.file = self.open_part()
+
+    def get_part_path(self) -> str:
+
+        path = self.output_file
+        if self.rotate_size:
+            root, extension = os.path.splitext(path)
+            path = '{}.{:04d}{}'.format(root, self.part_number, extension)
+
+        extension = COMPRESSION_EXTENSIONS.get(self.compression)
+        if extension != None and not path.endswith(extension):
+            path = path + extension
+
+        return path
+
+    def open_part(self):
+
+        self.part_number = self.part_number + 1
+        self.part_bytes = 0
+        path = self.get_part_path()
+        self.files.append(path)
+
+        if self.compression == 'gzip':
+            # Level 6 trades a bit of ratio for ~3x the speed of the default level 9
+            return io.BufferedWriter(gzip.open(path, mode='ab', compresslevel=6), buffer_size=FILE_BUFFER_SIZE)
+        elif self.compression == 'zstd':
+            # Closing the stream writer closes the underlying file too
+            return io.BufferedWriter(self.zstandard.ZstdCompressor(level=3).stream_writer(open(path, mode='ab')), buffer_size=FILE_BUFFER_SIZE)
+        else:
+            return open(path, mode='ab', buffering=FILE_BUFFER_SIZE)
+
+    def close_part(self):
+
+        self.file.flush()
+        self.file.close()
+
+    def write(self, record:dict):
+
+        self.batch.append(record)
+
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+
+        if len(self.batch) == 0:
+            return
+
+        records = self.batch
+        self.batch = []
+
+        self.write_lines(self.encode_batch(records))
+        self.records_count = self.records_count + len(records)
+
+    def write_lines(self, lines:list):
+        # Writes encoded lines to the current part, rotating first if they don't fit in it
+
+        batch_bytes = sum(len(line) for line in lines)
+        if batch_bytes == 0:
+            return
+
+        if self.rotate_size and self.part_bytes > 0 and self.part_bytes + batch_bytes > self.rotate_size:
+            self.close_part()
+            self.file = self.open_part()
+            self.on_new_part()
+
+        self.file.writelines(lines)
+        self.part_bytes = self.part_bytes + batch_bytes
+        self.bytes_count = self.bytes_count + batch_bytes
+
+    def on_new_part(self):
+        # Called after a rotation, before the first batch of the new part is written
+        pass
+
+    def encode_batch(self, records:list) -> list:
+        raise NotImplementedError
+
+    def close(self):
+
+        self.flush()
+        self.close_part()
+
+        self.logger.info('Wrote {} records ({:.1f} MB) to {}'.format(self.records_count, self.bytes_count / 1e6, ', '.join(self.files)))
+
+class JSONFileWriter(FileWriter):
+    # One JSON document per line
+
+    def __init__(self, output_file, serializer, batch_size=None, compression=None, rotate_size=None):
+
+        self.dumpb = serializer.dumpb
+        super().__init__(output_file, batch_size=batch_size, compression=compression, rotate_size=rotate_size)
+
+    def encode_batch(self, records:list) -> list:
+        return [b'\n'.join(map(self.dumpb, records)), b'\n']
+
+class TabularFileWriter(FileWriter):
+    # CSV/TSV writer with the columns aligned to the union of the fields of all records, see the module description.
+    # The header is repeated in every part of a rotated output.
+
+    def __init__(self, output_file, delimiter=',', batch_size=None, compression=None, rotate_size=None, columns=None):
+
+        # columns: union of the columns computed by a schema scan ("scan" mode), None spills the rows until
+        # the pipe is closed ("spill" mode)
+        self.line_buffer = LineBuffer()
+        self.csv_writer = csv.writer(self.line_buffer, delimiter=delimiter, quotechar='"', quoting=csv.QUOTE_MINIMAL)
+        self.delimiter = delimiter
+        self.spill_mode = columns == None
+        self.header = list(columns) if columns != None else None
+        self.header_written = False
+
+        # schema (tuple of keys) -> itemgetter that builds a row aligned to the header out of the record values
+        self.row_getters = {}
+        self.unknown_keys = set()
+
+        # Spill mode: schemas in order of appearance and (schema index, number of records) of each run of consecutive records with the same schema
+        self.schemas = {}
+        self.segments = []
+        self.last_schema = None
+
+        super().__init__(output_file, batch_size=batch_size, compression=compression, rotate_size=rotate_size)
+
+        if self.spill_mode:
+            self.spill_dir = tempfile.mkdtemp(prefix='.cybernethunter_spill_', dir=os.path.dirname(os.path.abspath(self.output_file)))
+            self.spill_path = os.path.join(self.spill_dir, 'rows.csv')
+            self.spill_file = open(self.spill_path, mode='wb', buffering=FILE_BUFFER_SIZE)
+
+    def get_row_getter(self, schema:tuple):
+        # Builds (and caches) the itemgetter aligning the values of a record with "schema" keys to the header.
+        # The values are passed with an extra empty string at the end, used for the columns missing in the schema.
+
+        row_getter = self.row_getters.get(schema)
+        if row_getter != None:
+            return row_getter
+
+        positions = {key: position for position, key in enumerate(schema)}
+        missing = len(schema)
+        indexes = [positions.get(column, missing) for column in self.header]
+
+        extra_keys = set(schema) - set(self.header)
+        if len(extra_keys - self.unknown_keys) > 0:
+            self.unknown_keys.update(extra_keys)
+            self.logger.warning('Fields not found by the schema scan are dropped from the output: {}'.format(', '.join(str(key) for key in sorted(extra_keys, key=str))))
+
+        if len(indexes) == 1:
+            # itemgetter with a single index returns the item instead of a tuple
+            index = indexes[0]
+            row_getter = lambda values: (values[index],)
+        else:
+            row_getter = itemgetter(*indexes)
+
+        self.row_getters[schema] = row_getter
+        return row_getter
+
+    def encode_batch(self, records:list) -> list:
+
+        if self.spill_mode:
+            self.spill_batch(records)
+            return []
+
+        if not self.header_written:
+            self.csv_writer.writerow(self.header)
+            self.header_written = True
+
+        rows = []
+        row_getters = self.row_getters
+        for record in records:
+            schema = tuple(record)
+            row_getter = row_getters.get(schema)
+            if row_getter == None:
+                row_getter = self.get_row_getter(schema)
+            rows.append(row_getter((*record.values(), '')))
+
+        self.csv_writer.writerows(rows)
+
+        return [self.line_buffer.drain()]
+
+    def spill_batch(self, records:list):
+        # Spills the rows with the values in the order of the keys of each record, tracking the runs of schemas
+
+        for record in records:
+            schema = tuple(record)
+
+            if schema == self.last_schema:
+                self.segments[-1][1] = self.segments[-1][1] + 1
+            else:
+                schema_index = self.schemas.get(schema)
+                if schema_index == None:
+                    schema_index = self.schemas[schema] = len(self.schemas)
+                self.segments.append([schema_index, 1])
+                self.last_schema = schema
+
+        self.csv_writer.writerows(record.values() for record in records)
+        self.spill_file.write(self.line_buffer.drain())
+
+    def merge_spill(self):
+        # Rewrites the spilled rows aligned to the union of the columns of all the schemas
+
+        self.spill_file.close()
+
+        if len(self.segments) == 0:
+            return
+
+        columns = {}
+        for schema in self.schemas:
+            for key in schema:
+                columns[key] = None
+        self.header = list(columns)
+
+        # The header is left out of the size of the part, like in the parts opened by a rotation
+        self.csv_writer.writerow(self.header)
+        self.file.write(self.line_buffer.drain())
+        self.header_written = True
+
+        if len(self.schemas) == 1 and not self.rotate_size:
+            # All the records share the same fields, the spilled rows are already aligned
+            with open(self.spill_path, mode='rb') as spill_file:
+                self.bytes_count = self.bytes_count + os.path.getsize(self.spill_path)
+                shutil.copyfileobj(spill_file, self.file, FILE_BUFFER_SIZE)
+            return
+
+        self.logger.info('Aligning {} records with {} different schemas to {} columns'.format(self.records_count, len(self.schemas), len(self.header)))
+
+        schemas = list(self.schemas)
+
+        # The limit is global to the csv module, it is restored once the spilled rows are read
+        field_size_limit = csv.field_size_limit(SPILL_FIELD_SIZE_LIMIT)
+
+        try:
+            with open(self.spill_path, mode='r', newline='', encoding='utf-8') as spill_file:
+                reader = csv.reader(spill_file, delimiter=self.delimiter, quotechar='"')
+
+                for schema_index, count in self.segments:
+                    row_getter = self.get_row_getter(schemas[schema_index])
+                    remaining = count
+
+                    while remaining > 0:
+                        chunk = min(remaining, self.batch_size)
+                        self.csv_writer.writerows(row_getter((*next(reader), '')) for _ in range(chunk))
+                        self.write_lines([self.line_buffer.drain()])
+                        remaining = remaining - chunk
+        finally:
+            csv.field_size_limit(field_size_limit)
+
+    def on_new_part(self):
+
+        self.csv_writer.writerow(self.header)
+        self.file.write(self.line_buffer.drain())
+
+    def close(self):
+
+        if self.spill_mode:
+            try:
+                self.flush()
+                self.merge_spill()
+            except Exception:
+                # The spilled rows are the only copy of the records, keep them around
+                self.logger.error('Could not align the spilled rows, they are kept in {}'.format(self.spill_path))
+                raise
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+        super().close()
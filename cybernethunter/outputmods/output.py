@@ -9,32 +9,32 @@ DESCRIPTION: main module to handle outputs
  Updates: 
         v0.1 - 15-01-2018 - output to elasticsearch-kafka.
         v0.2 - 29-08-2019 - adding ability to control kakfa broker settings
+        v0.3 - 18-10-2026 - batched kafka producer with tunable linger/compression, bounded in-flight window and delivery counters
+        v0.4 - 18-10-2026 - parquet and arrow file outputs
+        v0.5 - 18-10-2026 - sqlite file output
+        v0.6 - 18-10-2026 - asynchronous rabbitmq publisher with publisher confirms, channel pool and configurable exchange/routing key
+        v0.7 - 18-10-2026 - elasticsearch/opensearch bulk API output pipe
+        v0.8 - 18-10-2026 - records are serialized by the shared serializer (orjson/ujson/json) straight to bytes
+        v0.9 - 18-10-2026 - json/csv/tsv files are opened once and written in batches, with optional gzip/zstd compression and rotation by size
+        v0.10 - 18-10-2026 - csv/tsv files are column-aligned across records with different fields
     
  ToDo:
         1. always something to do
 
 '''
 
-import csv
-import json
 import logging
-import pika
 import re
-import socket
-import sqlite3
 import sys
-import unicodedata
 
 from cybernethunter.helpermods import utils
-from kafka import KafkaProducer
-from pprint import pprint
-from tabulate import tabulate
+from cybernethunter.outputmods import serializer
 
 # Setup logging
 
 class Output:
 
-    def __init__(self, output_type='json', output_pipe='stdout', output_file=None, log_type=None, kafka_broker=None, rabbitmq_broker=None, rabbitmq_credentials=None, host_name=None):
+    def __init__(self, output_type='json', output_pipe='stdout', output_file=None, log_type=None, kafka_broker=None, rabbitmq_broker=None, rabbitmq_credentials=None, host_name=None, kafka_batch_size=262144, kafka_linger_ms=50, kafka_compression=None, kafka_max_in_flight=100000, rabbitmq_exchange='logstash-rabbitmq', rabbitmq_routing_key='', rabbitmq_channels=2, rabbitmq_max_in_flight=10000, es_hosts=None, es_credentials=None, es_index_prefix='logs-dfir', es_bulk_workers=4, es_bulk_bytes=10485760, es_verify_ssl=True, output_batch_size=None, output_compression=None, output_rotate_size=None, tabular_columns=None, serializer_backend='auto'):
         
         # Setup logging
         utilities = utils.HelperMod()
@@ -53,6 +53,60 @@ class Output:
         self.kafka_broker = kafka_broker
         self.rabbitmq_broker = rabbitmq_broker
         self.rabbitmq_credentials = rabbitmq_credentials
+
+        # Kafka producer tuning
+        # kafka_batch_size: max size in bytes of the batches sent to each partition
+        # kafka_linger_ms: time the producer waits for more records before sending a batch
+        # kafka_compression: None, gzip, snappy, lz4 or zstd
+        # kafka_max_in_flight: max number of records sent but not yet acknowledged by the broker,
+        # the producer is flushed when the window is full
+        self.kafka_batch_size = kafka_batch_size
+        self.kafka_linger_ms = kafka_linger_ms
+        self.kafka_compression = kafka_compression
+        self.kafka_max_in_flight = kafka_max_in_flight
+        self.kafka_records_sent = 0
+        self.kafka_records_delivered = 0
+        self.kafka_records_failed = 0
+
+        # RabbitMQ publisher settings
+        # rabbitmq_exchange / rabbitmq_routing_key: where the records are published, the exchange must exist
+        # rabbitmq_channels: number of channels the messages are spread across
+        # rabbitmq_max_in_flight: max number of messages published but not yet confirmed by the broker
+        self.rabbitmq_exchange = rabbitmq_exchange
+        self.rabbitmq_routing_key = rabbitmq_routing_key
+        self.rabbitmq_channels = rabbitmq_channels
+        self.rabbitmq_max_in_flight = rabbitmq_max_in_flight
+
+        # Elasticsearch bulk settings
+        # es_hosts: list of node urls, es_credentials: ["user", "password"] or None
+        # es_index_prefix: records go to "<prefix>-winevent-<channel>" or "<prefix>-<log_type>" indexes
+        # es_bulk_workers: number of concurrent bulk requests, es_bulk_bytes: max size of each bulk request
+        self.es_hosts = es_hosts if es_hosts else ['http://127.0.0.1:9200']
+        self.es_credentials = es_credentials
+        self.es_index_prefix = es_index_prefix
+        self.es_bulk_workers = es_bulk_workers
+        self.es_bulk_bytes = es_bulk_bytes
+        self.es_verify_ssl = es_verify_ssl
+
+        # Batching and compression of file outputs
+        # output_batch_size: records per batch (row group size for parquet/arrow), None uses each output's default
+        # output_compression: compression codec for the outputs that support it
+        # output_rotate_size: max size in bytes of each json/csv/tsv output file, None writes a single file
+        self.output_batch_size = output_batch_size
+        self.output_compression = output_compression
+        self.output_rotate_size = output_rotate_size
+        # tabular_columns: columns of csv/tsv files computed by a schema scan of the input, None aligns
+        # the rows to the union of the fields of all records when the pipe is closed
+        self.tabular_columns = tabular_columns
+
+        # JSON serialization shared by all the pipes
+        # serializer_backend: "auto" (fastest available), "orjson", "ujson" or "json"
+        try:
+            self.serializer = serializer.Serializer(serializer_backend)
+        except (ModuleNotFoundError, TypeError):
+            self.logger.error('The {} serializer is not installed (ujson requires v5 or later), choose another one or use "auto"'.format(serializer_backend))
+            sys.exit(1)
+        self.logger.info('Serializing records with {}'.format(self.serializer.backend))
         
         self.logger.info("Will send data to output pipeline in {} format".format(self.output_type))
 
@@ -65,12 +119,17 @@ class Output:
         allowed_flows = [
             ('kafka', 'json'),
             ('rabbitmq', 'json'),
+            ('elasticsearch', 'json'),
             ('stdout', 'json'),
+            ('stdout', 'json_pretty'),
             ('stdout', 'csv'),
             ('stdout', 'tsv'),
             ('file', 'json'),
             ('file', 'csv'),
             ('file', 'tsv'),
+            ('file', 'parquet'),
+            ('file', 'arrow'),
+            ('file', 'sqlite'),
         ]
         
         if not output_flow in allowed_flows:
@@ -79,19 +138,54 @@ class Output:
         
         # First initialize output pipes
 
+        # Client libraries are only imported when their pipe is selected
         if self.output_pipe == 'kafka':
+            from kafka import KafkaProducer
             self.HOST = self.kafka_broker[0]
             self.PORT = self.kafka_broker[1]
             self.kafka_topic = self.kafka_broker[2]
             self.KAFKAS = self.HOST+':'+str(self.PORT)
-            self.kafka_producer = KafkaProducer(bootstrap_servers=self.KAFKAS, value_serializer=lambda v: json.dumps(v).encode('utf-8'))
+            self.kafka_producer = KafkaProducer(
+                bootstrap_servers=self.KAFKAS,
+                value_serializer=self.serializer.dumpb,
+                batch_size=self.kafka_batch_size,
+                linger_ms=self.kafka_linger_ms,
+                compression_type=self.kafka_compression
+            )
+            self.logger.info('Kafka producer ready: batch_size={} linger_ms={} compression={} max_in_flight={}'.format(self.kafka_batch_size, self.kafka_linger_ms, self.kafka_compression, self.kafka_max_in_flight))
 
         if self.output_pipe == 'rabbitmq':
+            from cybernethunter.outputmods import rabbitmq_publisher
             self.HOST = self.rabbitmq_broker[0]
             self.PORT = self.rabbitmq_broker[1]
-            credentials = pika.PlainCredentials(self.rabbitmq_credentials[0], self.rabbitmq_credentials[1])
-            connection = pika.BlockingConnection(pika.ConnectionParameters(host=self.HOST,credentials=credentials))
-            self.channel = connection.channel()
+            try:
+                self.rabbitmq_publisher = rabbitmq_publisher.RabbitMQPublisher(
+                    self.HOST,
+                    port=self.PORT,
+                    credentials=self.rabbitmq_credentials,
+                    exchange=self.rabbitmq_exchange,
+                    routing_key=self.rabbitmq_routing_key,
+                    channels=self.rabbitmq_channels,
+                    max_in_flight=self.rabbitmq_max_in_flight,
+                    batch_size=self.output_batch_size if self.output_batch_size else 500
+                )
+            except ConnectionError as err:
+                self.logger.error(str(err))
+                sys.exit(1)
+
+        if self.output_pipe == 'elasticsearch':
+            from cybernethunter.outputmods import elasticsearch_bulk
+            self.elasticsearch_writer = elasticsearch_bulk.ElasticsearchBulkWriter(
+                self.es_hosts,
+                index_prefix=self.es_index_prefix,
+                log_type=self.log_type,
+                credentials=self.es_credentials,
+                batch_size=self.output_batch_size,
+                batch_bytes=self.es_bulk_bytes,
+                workers=self.es_bulk_workers,
+                verify_ssl=self.es_verify_ssl,
+                serializer=self.serializer
+            )
 
         # Second define output type if needed
 
@@ -100,10 +194,21 @@ class Output:
 
         if self.output_pipe == 'file':
 
-            if self.output_type in 'sqlite3':
-                # No implemented
-                print("SQLite3 Output Not Implemented yet")
-                self.output_type = "stdout"
+            if self.output_type == 'sqlite':
+                from cybernethunter.outputmods import sqlite_writer
+                self.sqlite_writer = sqlite_writer.SQLiteWriter(self.output_file, log_type=self.log_type, batch_size=self.output_batch_size)
+
+            elif self.output_type in ['parquet', 'arrow']:
+                from cybernethunter.outputmods import columnar_writer
+                self.columnar_writer = columnar_writer.ColumnarWriter(self.output_file, output_format=self.output_type, row_group_size=self.output_batch_size, compression=self.output_compression)
+
+            elif self.output_type == 'json':
+                from cybernethunter.outputmods import file_writers
+                self.file_writer = file_writers.JSONFileWriter(self.output_file, self.serializer, batch_size=self.output_batch_size, compression=self.output_compression, rotate_size=self.output_rotate_size)
+
+            elif self.output_type in ['csv', 'tsv']:
+                from cybernethunter.outputmods import file_writers
+                self.file_writer = file_writers.TabularFileWriter(self.output_file, delimiter=',' if self.output_type == 'csv' else '\t', batch_size=self.output_batch_size, compression=self.output_compression, rotate_size=self.output_rotate_size, columns=self.tabular_columns)
 
     def send(self, record):
 
@@ -115,82 +220,48 @@ class Output:
             if self.output_type == "sqlite":
                 self.send_to_sqlite(record)
 
-            elif self.output_type == "csv":
-                
-                # Routine to initialize the file if it does not exist
-                try:
-                    if self.tabular_file_created == True:
-                        self.send_to_tabular_file(record)
-                except AttributeError:
-                    self.tabular_file_created = True
-                    self.tabular_output_file = open(self.output_file, mode='a+', newline='')
-                    self.tabular_writter = csv.writer(self.tabular_output_file, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
-                    self.tabular_writter.writerow([header for header in record.keys()])
-                    self.send_to_tabular_file(record)
-                        
-            elif self.output_type == "tsv":
-                
-                # Routine to initialize the file if it does not exist
-                try:
-                    if self.tabular_file_created == True:
-                        self.send_to_tabular_file(record)
-                except AttributeError:
-                    self.tabular_file_created = True
-                    self.tabular_output_file = open(self.output_file, mode='a+', newline='')
-                    self.tabular_writter = csv.writer(self.tabular_output_file, delimiter='\t', quotechar='"', quoting=csv.QUOTE_MINIMAL)
-                    self.tabular_writter.writerow([header for header in record.keys()])
-                    self.send_to_tabular_file(record)
-
-            elif self.output_type == "json":
-
-                # Routine to initialize the file if it does not exist
-                try:
-                    if self.json_file_created == True:
-                        self.send_to_json_file(record)
-                except AttributeError:
-                    self.json_file_created = True
-                    self.json_output_file = open(self.output_file, mode='a+')
-                    self.send_to_json_file(record)
-
-        elif self.output_pipe in ["kafka", "rabbitmq"]:
-            self.send_to_elasticsearch(record, ampq=self.output_type)
-
-    def send_to_tabular_file(self, record):
-        self.tabular_writter.writerow([values for values in record.values()])
-
-    def send_to_json_file(self, record):
-        self.json_output_file.write(json.dumps(record))
-        self.json_output_file.write('\n')
+            elif self.output_type in ["parquet", "arrow"]:
+                self.columnar_writer.write(record)
+
+            else:
+                # json, csv and tsv files, records are buffered and written in batches
+                self.file_writer.write(record)
+
+        elif self.output_pipe in ["kafka", "rabbitmq", "elasticsearch"]:
+            self.send_to_elasticsearch(record, ampq=self.output_pipe)
 
     def close_output_pipe(self):
 
-        if "stdout" in self.output_type:
-            pass
+        if self.output_pipe == 'kafka':
+            # Make sure no records are left in the producer buffers before exiting
+            self.kafka_producer.flush()
+            self.kafka_producer.close()
+            self.logger.info('Kafka records sent: {} / delivered: {} / failed: {}'.format(self.kafka_records_sent, self.kafka_records_delivered, self.kafka_records_failed))
 
-        elif self.output_type == "sqlite":
-            self.conn.commit()
-            self.conn.close()
+        elif self.output_pipe == 'rabbitmq':
+            # Waits for the broker to confirm all the published messages before closing the connection
+            self.rabbitmq_publisher.close()
 
-        elif self.output_type == "rabbitmq":
-            self.channel.close()
+        elif self.output_pipe == 'elasticsearch':
+            # Sends the last batch and waits for all the bulk requests to complete
+            self.elasticsearch_writer.close()
+
+        elif "stdout" in self.output_type:
+            pass
             
         elif self.output_pipe == 'file':
-            if self.output_type in ['tsv', 'csv']:
-                self.tabular_output_file.close()
+            if self.output_type in ['json', 'csv', 'tsv']:
+                self.file_writer.close()
 
-            elif self.output_type == 'json':
-                self.json_output_file.close()
+            elif self.output_type in ['parquet', 'arrow']:
+                self.columnar_writer.close()
 
-    def send_to_sqlite(self, data):
+            elif self.output_type == 'sqlite':
+                self.sqlite_writer.close()
 
-        data.pop(0)
-        data.insert(0, self.hostname)
-
-        try:
-            self.cur.executemany("INSERT INTO StateAgentInspector (" + self.fields_asOneString + ") VALUES (" + self.fields_number + ");", [data])
-
-        except Exception as e:
-            print(e)
+    def send_to_sqlite(self, record):
+        # Records are buffered by the writer and inserted in batches
+        self.sqlite_writer.write(record)
 
     def send_to_elasticsearch(self, data_dict, nested=False, ampq="kafka"):
 
@@ -207,12 +278,12 @@ class Output:
                         data_dict[x] == 'null'
                         #nonemptykey.append(x)
                 #dictobj = dict({key : data_dict[key] for key in nonemptykey})
-            else: 
-                dictobj = data_dict
 
         except:
             pass
 
+        dictobj = data_dict
+
         # Pre-Processing Data
         # (1) We need to capture the field that designates 
         # the timestamp in each processed log so that we can
@@ -240,21 +311,46 @@ class Output:
             dictobj['log_src_pipeline'] = "cybernethunter"          
 
         # Assigning the value of the source host where the logs were collected
-        dictobj['log_hostname'] = self.hostname
+        dictobj['log_hostname'] = self.host_name
         
         # Sending Data
         try: 
             # Sending the data to ELK
             if ampq == "kafka":
-                self.kafka_producer.send(self.kafka_topic, dictobj)
+                self.send_to_kafka(dictobj)
 
             elif ampq == "rabbitmq":
-                self.channel.basic_publish(exchange='logstash-rabbitmq', routing_key='', body=(json.dumps(dictobj)).encode())
+                self.rabbitmq_publisher.publish(self.serializer.dumpb(dictobj))
+
+            elif ampq == "elasticsearch":
+                self.elasticsearch_writer.write(dictobj)
         except: 
             #log error here
             print("Error 2, could not connect to socket")
             sys.exit(1)
     
+    def send_to_kafka(self, record):
+        # Records are buffered by the producer and sent in batches, delivery is tracked through
+        # the callbacks of each future. When too many records are waiting for an acknowledgement
+        # we flush the producer so that memory stays bounded.
+
+        future = self.kafka_producer.send(self.kafka_topic, record)
+        future.add_callback(self.on_kafka_delivery)
+        future.add_errback(self.on_kafka_error)
+        self.kafka_records_sent = self.kafka_records_sent + 1
+
+        if (self.kafka_records_sent - self.kafka_records_delivered - self.kafka_records_failed) >= self.kafka_max_in_flight:
+            self.kafka_producer.flush()
+
+    def on_kafka_delivery(self, record_metadata):
+        self.kafka_records_delivered = self.kafka_records_delivered + 1
+
+    def on_kafka_error(self, exception):
+        self.kafka_records_failed = self.kafka_records_failed + 1
+        # Only log the first errors to avoid flooding stdout when the broker goes away
+        if self.kafka_records_failed <= 10:
+            self.logger.error('Kafka delivery failed: {}'.format(exception))
+
     def send_to_stdout(self, data, output_type='json_pretty', nested=False):
 
         # store non-empty keys in a list so as to only display those keys with actual values for each event category to stdout
@@ -280,7 +376,9 @@ class Output:
 
         try:
             if output_type == 'json_pretty':
-                print(json.dumps(data_dict, indent=4), file=sys.stdout, flush=True)
+                print(self.serializer.dumps_pretty(data_dict), file=sys.stdout, flush=True)
+            elif output_type == 'json':
+                print(self.serializer.dumps(data))
             else:
                 print(data)
 
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+
+'''
+MODULE NAME: rabbitmq_publisher.py | Version: 0.1
+CYBERNETHUNTER Version: 0.3
+AUTHOR: Diego Perez (@darkquassar) - 2026
+DESCRIPTION: Asynchronous RabbitMQ publisher used by the "rabbitmq" output pipe. A pika AsyncioConnection runs on an
+asyncio event loop in a background thread, records are handed over to the loop in batches and published without waiting
+for a round trip, spread across a pool of channels in publisher confirms mode. The broker acknowledges messages in batches
+(multiple=True acks) and the number of published but unconfirmed messages is bounded, so the parsers are slowed down
+instead of buffering without limit when the broker falls behind or raises a resource alarm (connection.blocked).
+
+ Updates:
+        v0.1 - 18-10-2026 - Created script.
+
+ ToDo:
+        1. ----.
+
+'''
+
+import asyncio
+import collections
+import threading
+import time
+
+from cybernethunter.helpermods import utils
+
+class RabbitMQPublisher:
+
+    def __init__(self, host, port=5672, credentials=None, exchange='logstash-rabbitmq', routing_key='', virtual_host='/', channels=2, max_in_flight=10000, batch_size=500, connect_timeout=30):
+
+        # Setup logging
+        utilities = utils.HelperMod()
+        self.logger = utilities.get_logger('CYBERNETHUNTER.OUTPUT.RABBITMQ')
+
+        import pika
+        from pika.adapters.asyncio_connection import AsyncioConnection
+        self.pika = pika
+        self.AsyncioConnection = AsyncioConnection
+
+        # exchange / routing_key: where every record is published to, the exchange must already exist in the broker
+        # channels: number of channels messages are spread across (round robin per batch)
+        # max_in_flight: max number of messages published but not yet confirmed by the broker, publish() blocks when reached
+        # batch_size: number of records handed over to the event loop at once
+        self.host = host
+        self.port = int(port)
+        self.credentials = credentials
+        self.exchange = exchange
+        self.routing_key = routing_key
+        self.virtual_host = virtual_host
+        self.channels_count = max(1, channels)
+        self.max_in_flight = max(1, max_in_flight)
+        self.batch_size = max(1, min(batch_size, self.max_in_flight))
+        self.connect_timeout = connect_timeout
+
+        # Backpressure: one slot per unconfirmed message, released when the broker acks or nacks it
+        self.in_flight_slots = threading.Semaphore(self.max_in_flight)
+        self.pending_batch = []
+
+        self.connection = None
+        self.channels = []
+        self.next_channel = 0
+        # channel number -> delivery tag of the last message published on the channel
+        self.delivery_tags = {}
+        # channel number -> ordered delivery tags of the messages waiting for a confirm
+        self.unconfirmed = {}
+        self.ready = threading.Event()
+        self.closing = False
+        self.closed = threading.Event()
+        self.error = None
+
+        self.messages_published = 0
+        self.messages_confirmed = 0
+        self.messages_failed = 0
+        self.start_time = time.perf_counter()
+
+        # Start the event loop thread and wait until all channels are open
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = threading.Thread(target=self.run_loop, name='cybernethunter-rabbitmq', daemon=True)
+        self.loop_thread.start()
+
+        if not self.ready.wait(self.connect_timeout) and self.error == None:
+            self.error = 'timed out after {} seconds'.format(self.connect_timeout)
+
+        if self.error != None:
+            self.stop_loop()
+            raise ConnectionError('Could not connect to RabbitMQ broker {}:{}: {}'.format(self.host, self.port, self.error))
+
+        self.logger.info('RabbitMQ publisher ready: exchange={} routing_key={} channels={} max_in_flight={}'.format(self.exchange, self.routing_key, self.channels_count, self.max_in_flight))
+
+    # *** Main thread ***
+
+    def publish(self, body:bytes):
+
+        if self.error != None:
+            raise ConnectionError('RabbitMQ publisher failed: {}'.format(self.error))
+
+        # Blocks while the window of unconfirmed messages is full
+        while not self.in_flight_slots.acquire(timeout=1):
+            if self.error != None:
+                raise ConnectionError('RabbitMQ publisher failed: {}'.format(self.error))
+
+        self.pending_batch.append(body)
+
+        if len(self.pending_batch) >= self.batch_size:
+            self.flush_batch()
+
+    def flush_batch(self):
+
+        if len(self.pending_batch) == 0:
+            return
+
+        batch = self.pending_batch
+        self.pending_batch = []
+        self.loop.call_soon_threadsafe(self.publish_batch, batch)
+
+    def close(self, timeout=60):
+        # Publishes whatever is left, waits for the broker to confirm every message and closes the connection
+
+        try:
+            self.flush_batch()
+
+            # All the slots are back once every message has been confirmed
+            deadline = time.monotonic() + timeout
+            acquired = 0
+            while acquired < self.max_in_flight and self.error == None:
+                if self.in_flight_slots.acquire(timeout=max(0, min(1, deadline - time.monotonic()))):
+                    acquired = acquired + 1
+                elif time.monotonic() >= deadline:
+                    self.logger.warning('Timed out waiting for {} publisher confirms'.format(self.max_in_flight - acquired))
+                    break
+
+        finally:
+            self.loop.call_soon_threadsafe(self.close_connection)
+            self.closed.wait(10)
+            self.stop_loop()
+
+        elapsed = time.perf_counter() - self.start_time
+        self.logger.info('RabbitMQ messages published: {} / confirmed: {} / failed: {} ({:.0f} msgs/s)'.format(
+            self.messages_published, self.messages_confirmed, self.messages_failed, self.messages_confirmed / elapsed if elapsed > 0 else 0
+        ))
+
+    def stop_loop(self):
+
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop_thread.join(10)
+
+    # *** Event loop thread ***
+
+    def run_loop(self):
+
+        asyncio.set_event_loop(self.loop)
+
+        parameters = self.pika.ConnectionParameters(
+            host=self.host,
+            port=self.port,
+            virtual_host=self.virtual_host,
+            credentials=self.pika.PlainCredentials(self.credentials[0], self.credentials[1]) if self.credentials else self.pika.ConnectionParameters.DEFAULT_CREDENTIALS
+        )
+
+        self.connection = self.AsyncioConnection(
+            parameters,
+            on_open_callback=self.on_connection_open,
+            on_open_error_callback=self.on_connection_open_error,
+            on_close_callback=self.on_connection_closed,
+            custom_ioloop=self.loop
+        )
+
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def on_connection_open(self, connection):
+
+        connection.add_on_connection_blocked_callback(self.on_connection_blocked)
+        connection.add_on_connection_unblocked_callback(self.on_connection_unblocked)
+
+        for _ in range(self.channels_count):
+            connection.channel(on_open_callback=self.on_channel_open)
+
+    def on_connection_open_error(self, connection, err):
+
+        self.error = repr(err)
+        self.ready.set()
+        self.closed.set()
+
+    def on_connection_closed(self, connection, reason):
+
+        if not self.closing and self.error == None:
+            self.error = 'connection closed: {}'.format(reason)
+            self.logger.error('RabbitMQ connection closed unexpectedly: {}'.format(reason))
+
+        self.closed.set()
+        self.ready.set()
+
+    def on_connection_blocked(self, connection, method):
+        # The broker stops reading from the socket during a resource alarm, confirms stop arriving
+        # and publish() blocks once the window of unconfirmed messages is full
+        self.logger.warning('RabbitMQ broker blocked the connection: {}'.format(method.method.reason))
+
+    def on_connection_unblocked(self, connection, method):
+        self.logger.info('RabbitMQ broker unblocked the connection')
+
+    def on_channel_open(self, channel):
+
+        channel.add_on_close_callback(self.on_channel_closed)
+        self.delivery_tags[channel.channel_number] = 0
+        self.unconfirmed[channel.channel_number] = collections.OrderedDict()
+        channel.confirm_delivery(lambda frame, channel=channel: self.on_delivery_confirmation(channel, frame))
+        self.channels.append(channel)
+
+        if len(self.channels) == self.channels_count:
+            self.ready.set()
+
+    def on_channel_closed(self, channel, reason):
+
+        if not self.closing and self.error == None:
+            # ex: 404 NOT_FOUND when the exchange does not exist
+            self.error = 'channel {} closed: {}'.format(channel.channel_number, reason)
+            self.logger.error('RabbitMQ channel closed unexpectedly: {}'.format(reason))
+            self.ready.set()
+
+    def publish_batch(self, batch):
+
+        if self.error != None:
+            self.release_slots(len(batch), failed=True)
+            return
+
+        # Each batch goes to the next channel of the pool
+        channel = self.channels[self.next_channel]
+        self.next_channel = (self.next_channel + 1) % len(self.channels)
+
+        unconfirmed = self.unconfirmed[channel.channel_number]
+        delivery_tag = self.delivery_tags[channel.channel_number]
+        properties = self.pika.BasicProperties(content_type='application/json', delivery_mode=2)
+
+        for body in batch:
+            channel.basic_publish(self.exchange, self.routing_key, body, properties)
+            # Delivery tags are sequential per channel once confirms are enabled
+            delivery_tag = delivery_tag + 1
+            unconfirmed[delivery_tag] = None
+
+        self.delivery_tags[channel.channel_number] = delivery_tag
+        self.messages_published = self.messages_published + len(batch)
+
+    def on_delivery_confirmation(self, channel, frame):
+
+        unconfirmed = self.unconfirmed[channel.channel_number]
+        method = frame.method
+        failed = isinstance(method, self.pika.spec.Basic.Nack)
+
+        if method.multiple:
+            count = 0
+            while len(unconfirmed) > 0 and next(iter(unconfirmed)) <= method.delivery_tag:
+                unconfirmed.popitem(last=False)
+                count = count + 1
+        else:
+            count = 1 if unconfirmed.pop(method.delivery_tag, 0) == None else 0
+
+        self.release_slots(count, failed=failed)
+
+    def release_slots(self, count, failed=False):
+
+        if count == 0:
+            return
+
+        if failed:
+            self.messages_failed = self.messages_failed + count
+            # Only log the first errors to avoid flooding stdout when the broker rejects everything
+            if self.messages_failed <= 10:
+                self.logger.error('RabbitMQ broker rejected {} messages'.format(count))
+        else:
+            self.messages_confirmed = self.messages_confirmed + count
+
+        for _ in range(count):
+            self.in_flight_slots.release()
+
+    def close_connection(self):
+
+        self.closing = True
+
+        if self.connection != None and not (self.connection.is_closed or self.connection.is_closing):
+            # on_connection_closed is called once the broker acknowledges the close
+            self.connection.close()
+        else:
+            self.closed.set()
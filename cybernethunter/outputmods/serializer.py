@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+'''
+MODULE NAME: serializer.py | Version: 0.1
+CYBERNETHUNTER Version: 0.3
+AUTHOR: Diego Perez (@darkquassar) - 2026
+DESCRIPTION: JSON serialization layer shared by the output pipes. The fastest backend available is used (orjson, then
+ujson, then the stdlib json module), all of them producing compact UTF-8 JSON. datetime, date and time values (like the
+ones yielded by the DNS debug log parser) are serialized as ISO 8601 strings and any other value that JSON can't represent
+natively is serialized as its string representation. dumpb() returns bytes straight away so that the pipes writing bytes
+(kafka, rabbitmq, elasticsearch, json files) don't need to encode the string again.
+
+ Updates:
+        v0.1 - 18-10-2026 - Created script.
+
+ ToDo:
+        1. ----.
+
+'''
+
+import json
+
+from datetime import date, datetime, time
+
+# Backends in order of preference, "auto" picks the first one installed
+SERIALIZER_BACKENDS = ['orjson', 'ujson', 'json']
+
+def default_serializer(value):
+    # Called by the backends for the values they can't serialize natively
+
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    elif isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    elif isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    elif hasattr(value, 'item') and callable(value.item):
+        # numpy scalars
+        return value.item()
+    else:
+        return str(value)
+
+class Serializer:
+
+    def __init__(self, backend='auto'):
+
+        if backend == 'auto':
+            for candidate in SERIALIZER_BACKENDS:
+                try:
+                    self.set_backend(candidate)
+                    break
+                except (ModuleNotFoundError, TypeError):
+                    continue
+        else:
+            self.set_backend(backend)
+
+    def set_backend(self, backend):
+
+        if backend == 'orjson':
+            import orjson
+            self.orjson = orjson
+            self.orjson_options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            self.dumpb = self.orjson_dumpb
+            self.dumps = self.orjson_dumps
+            self.loads = orjson.loads
+
+        elif backend == 'ujson':
+            import ujson
+            self.ujson = ujson
+            # ujson only supports "default" since v5
+            ujson.dumps(datetime.now(), default=default_serializer)
+            self.dumpb = self.ujson_dumpb
+            self.dumps = self.ujson_dumps
+            self.loads = ujson.loads
+
+        elif backend == 'json':
+            self.json_encoder = json.JSONEncoder(default=default_serializer, ensure_ascii=False, separators=(',', ':'))
+            self.dumpb = self.json_dumpb
+            self.dumps = self.json_encoder.encode
+            self.loads = json.loads
+
+        else:
+            raise ValueError('Unknown serializer backend {}, choose from {}'.format(backend, ', '.join(SERIALIZER_BACKENDS)))
+
+        self.backend = backend
+
+    def orjson_dumpb(self, record) -> bytes:
+        return self.orjson.dumps(record, default=default_serializer, option=self.orjson_options)
+
+    def orjson_dumps(self, record) -> str:
+        return self.orjson.dumps(record, default=default_serializer, option=self.orjson_options).decode('utf-8')
+
+    def ujson_dumpb(self, record) -> bytes:
+        return self.ujson.dumps(record, default=default_serializer, ensure_ascii=False).encode('utf-8')
+
+    def ujson_dumps(self, record) -> str:
+        return self.ujson.dumps(record, default=default_serializer, ensure_ascii=False)
+
+    def json_dumpb(self, record) -> bytes:
+        return self.json_encoder.encode(record).encode('utf-8')
+
+    def dumps_pretty(self, record) -> str:
+        # Only used to print records for humans, speed doesn't matter here
+        return json.dumps(record, default=default_serializer, ensure_ascii=False, indent=4)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+
+'''
+MODULE NAME: sqlite_writer.py | Version: 0.2
+CYBERNETHUNTER Version: 0.3
+AUTHOR: Diego Perez (@darkquassar) - 2026
+DESCRIPTION: SQLite file writer used by the "file" output pipe. Records are stored in one table per EVTX channel
+(or per log type when records have no channel), new columns are added as fields appear and records are inserted
+in transactions of N records with executemany. Indexes on the timestamp and host columns are built when the pipe
+is closed, so that the resulting single-file database can be queried straight away on offline triage boxes.
+
+ Updates:
+        v0.1 - 18-10-2026 - Created script.
+        v0.2 - 18-10-2026 - Record fields named like the primary key column are stored in a renamed column
+
+ ToDo:
+        1. ----.
+
+'''
+
+import json
+import re
+import sqlite3
+import time
+
+from cybernethunter.helpermods import utils
+from datetime import date, datetime
+
+# Candidate columns to index, the first one found in each table is used
+TIMESTAMP_COLUMNS = ['@timestamp', 'timestamp', 'SystemTime', 'DateTime', 'TimeCreated', 'Time']
+HOST_COLUMNS = ['log_hostname', 'Computer', 'hostname', 'ClientIP']
+
+# Primary key of every table and the column used for the record fields with the same name
+ROWID_COLUMN = '_rowid'
+ROWID_FIELD_COLUMN = '_rowid_1'
+
+class SQLiteWriter:
+
+    def __init__(self, output_file, log_type=None, batch_size=None):
+
+        # Setup logging
+        utilities = utils.HelperMod()
+        self.logger = utilities.get_logger('CYBERNETHUNTER.OUTPUT.SQLITE')
+
+        # log_type: name of the table used for records that don't carry an EVTX channel
+        # batch_size: number of records inserted in each transaction
+        self.output_file = output_file
+        self.default_table = log_type if log_type else 'records'
+        self.batch_size = batch_size if batch_size else 5000
+
+        self.conn = sqlite3.connect(self.output_file)
+        # WAL and relaxed syncing: a crash can lose the last transactions but never corrupts the database
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA temp_store=MEMORY')
+        self.conn.execute('PRAGMA cache_size=-65536')
+        self.conn.execute('PRAGMA mmap_size=268435456')
+
+        # table name -> list of columns in the table
+        self.table_columns = {}
+        # table name -> {lowercase column name: column name}, sqlite column names are case insensitive
+        self.table_columns_lower = {}
+        # table name -> list of records waiting to be inserted
+        self.table_buffers = {}
+        self.buffered_records = 0
+
+        self.records_count = 0
+        self.insert_seconds = 0.0
+        self.start_time = time.perf_counter()
+
+        self.logger.info('Writing records to SQLite database {} in transactions of {} records'.format(self.output_file, self.batch_size))
+
+    def write(self, record:dict):
+
+        table = self.get_table_name(record)
+        buffer = self.table_buffers.get(table)
+        if buffer == None:
+            buffer = self.table_buffers[table] = []
+
+        buffer.append(record)
+        self.buffered_records = self.buffered_records + 1
+
+        if self.buffered_records >= self.batch_size:
+            self.flush()
+
+    def get_table_name(self, record:dict) -> str:
+        # Flat records (xml_parser) carry the channel at the top level, nested
+        # records (evtx_parser) under Event.System.Channel
+
+        channel = record.get('Channel')
+        if channel == None:
+            event = record.get('Event')
+            if isinstance(event, dict) and isinstance(event.get('System'), dict):
+                channel = event['System'].get('Channel')
+
+        if not channel:
+            channel = self.default_table
+
+        return re.sub(r'[^0-9a-zA-Z_]', '_', str(channel))
+
+    def get_table_columns(self, table:str) -> list:
+
+        columns = self.table_columns.get(table)
+        if columns != None:
+            return columns
+
+        self.conn.execute('CREATE TABLE IF NOT EXISTS "{}" ({} INTEGER PRIMARY KEY)'.format(table, ROWID_COLUMN))
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info("{}")'.format(table)) if row[1] != ROWID_COLUMN]
+
+        self.table_columns[table] = columns
+        self.table_columns_lower[table] = {column.lower(): column for column in columns}
+
+        return columns
+
+    def add_new_columns(self, table:str, records:list) -> list:
+        # Adds the fields seen in "records" that are not yet columns of the table
+
+        columns = self.get_table_columns(table)
+        columns_lower = self.table_columns_lower[table]
+
+        for record in records:
+            for key in record:
+                key_lower = str(key).lower()
+                if key_lower not in columns_lower:
+                    column = str(key)
+                    # A "_rowid" field can't be a column next to the primary key, it goes to ROWID_FIELD_COLUMN instead
+                    # (shared with a "_rowid_1" field if a record had both)
+                    if key_lower == ROWID_COLUMN:
+                        column = ROWID_FIELD_COLUMN
+
+                    if column.lower() not in columns_lower:
+                        self.conn.execute('ALTER TABLE "{}" ADD COLUMN "{}"'.format(table, column.replace('"', '""')))
+                        columns.append(column)
+                        columns_lower[column.lower()] = column
+                    columns_lower[key_lower] = column
+
+        return columns
+
+    def adapt_value(self, value):
+
+        if value == None or isinstance(value, (str, int, float, bytes)):
+            return value
+        elif isinstance(value, (datetime, date)):
+            return value.isoformat()
+        elif isinstance(value, (dict, list)):
+            return json.dumps(value, default=str)
+        else:
+            return str(value)
+
+    def flush(self):
+
+        if self.buffered_records == 0:
+            return
+
+        start_time = time.perf_counter()
+
+        # A single transaction for the whole batch
+        with self.conn:
+            for table, records in self.table_buffers.items():
+                if len(records) == 0:
+                    continue
+
+                columns = self.add_new_columns(table, records)
+                columns_lower = self.table_columns_lower[table]
+                column_position = {column: position for position, column in enumerate(columns)}
+
+                sql = 'INSERT INTO "{}" ({}) VALUES ({})'.format(
+                    table,
+                    ', '.join('"{}"'.format(column.replace('"', '""')) for column in columns),
+                    ', '.join('?' * len(columns))
+                )
+
+                rows = []
+                for record in records:
+                    row = [None] * len(columns)
+                    for key, value in record.items():
+                        row[column_position[columns_lower[str(key).lower()]]] = self.adapt_value(value)
+                    rows.append(row)
+
+                self.conn.executemany(sql, rows)
+                self.records_count = self.records_count + len(rows)
+
+        self.insert_seconds = self.insert_seconds + (time.perf_counter() - start_time)
+        self.table_buffers = {}
+        self.buffered_records = 0
+
+    def create_indexes(self):
+
+        for table, columns in self.table_columns.items():
+            for candidates in [TIMESTAMP_COLUMNS, HOST_COLUMNS]:
+                for column in candidates:
+                    if column in columns:
+                        index_name = 'idx_{}_{}'.format(table, re.sub(r'[^0-9a-zA-Z_]', '_', column))
+                        self.conn.execute('CREATE INDEX IF NOT EXISTS "{}" ON "{}" ("{}")'.format(index_name, table, column))
+                        break
+
+        self.conn.commit()
+
+    def close(self):
+
+        self.flush()
+        self.create_indexes()
+        self.conn.close()
+
+        elapsed = time.perf_counter() - self.start_time
+        inserts_per_second = self.records_count / self.insert_seconds if self.insert_seconds > 0 else 0
+        self.logger.info('Inserted {} records into {} tables in {:.2f} seconds ({:.0f} inserts/s, {:.2f} seconds total)'.format(self.records_count, len(self.table_columns), self.insert_seconds, inserts_per_second, elapsed))
@@ -1,9 +1,21 @@
 # -*- coding: utf-8 -*-
 # Copyright (c) 2018-2020 Diego Perez (@darkquassar / https://linkedin.com/in/diegope)
 
+import importlib
 
-from . import csv_parser
-from . import dns_debug_logs_parser
-from . import evtx_parser
-from . import standard_parser
-from . import xml_parser
\ No newline at end of file
+# Registry of the available parsermods, modules are only imported when they are first accessed
+PARSERMODS = ["csv_parser", "dns_debug_logs_parser", "evtx_parser", "standard_parser", "xml_parser"]
+
+def __getattr__(name):
+    if name in PARSERMODS:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+def __dir__():
+    return sorted(list(globals().keys()) + PARSERMODS)
+
+def load_parsermod(name):
+    # Resolves a parsermod selected with --module
+    if name not in PARSERMODS:
+        raise ValueError("Unknown parsermod {}, available parsermods: {}".format(name, ", ".join(PARSERMODS)))
+    return importlib.import_module("." + name, __name__)
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 
 '''
- NAME: csv_parser.py | Version: 0.3
+ NAME: csv_parser.py | Version: 0.6
  CYBERNETHUNTER Version: 0.3
  AUTHOR: Diego Perez (@darkquasar) - 2018
  DESCRIPTION: This module will provide miscellaneous parsing capabilities for records.
@@ -12,6 +12,10 @@
     v0.1 - parse any CSV to a flat dict.
     v0.2 - 03-09-2019 - added ability to parse multi-line CSV file into single-line CSV file. Kind of redundant since I discovered later that PANDAS can do it by default.
     v0.3 - 19-11-2020 - Cleaned up this parser, removed XML parsing routines to its own mod
+    v0.4 - 18-10-2026 - Added bulk parsing mode: records are read in large chunks (pandas) or streamed with the "csv" module,
+                        header keys are cleaned once per file and records can be yielded one by one or in batches
+    v0.5 - 18-10-2026 - Optional streaming normalization of multiline values (KAPE/RECmd) in front of both engines
+    v0.6 - 18-10-2026 - The "csv" engine skips blank lines and aligns short and long rows to the header like the pandas engine
     
  ToDo:
         1. ZZZZ
@@ -21,15 +25,18 @@ import csv
 import json
 import logging
 import os
-import pandas as pd
 import re
 import sys
 
+from cybernethunter.helpermods import transforms
 from pathlib import Path
 
+# Non-ascii characters (like the UTF-8 BOM found in some KAPE outputs) are removed from header keys
+NON_ASCII_PATTERN = re.compile(r'[^\x00-\x7f]')
+
 class ParserMod():
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, csv_engine='pandas', chunk_size=10000, yield_batches=False, normalize_multilines=False):
 
         # Setup logging
         # We need to pass the "logger" to any Classes or Modules that may use it 
@@ -49,33 +56,113 @@ class ParserMod():
             self.logger.setLevel(logging.INFO)
         
         # initializing variables
+        # csv_engine: "pandas" reads the file in chunks of "chunk_size" rows with the C engine, 
+        # "csv" streams the file with the stdlib csv module (faster on narrow files and tolerant to null bytes)
+        # yield_batches: when True, a list of records is yielded for each chunk instead of one record at a time
+        # normalize_multilines: when True, the line breaks inside quoted values (KAPE/RECmd multiline CSVs) are replaced
+        # by a literal "\n" while the file is read, see transforms.HelperMod.stream_multilines_to_singlelines
         self.file_path = file_path
+        self.csv_engine = csv_engine
+        self.chunk_size = chunk_size
+        self.yield_batches = yield_batches
+        self.normalize_multilines = normalize_multilines
+        self.transforms = transforms.HelperMod() if normalize_multilines else None
 
     def execute(self):
         '''
-        This function will allow us to add data to the main Dictionary. Thanks: https://stackoverflow.com/questions/32278823/iterating-over-children-of-a-particular-tag-using-elementtree
+        This function will parse the CSV file and return a generator of flat dicts (or lists of flat dicts if yield_batches is True).
         '''
         
-        self.logger.info('Parsing data from {}'.format(self.file_path))
+        self.logger.info('Parsing data from {} with the {} engine'.format(self.file_path, self.csv_engine))
 
-        row_iterator = pd.read_csv(self.file_path, engine="c", chunksize=1)
-        for row in row_iterator:
-            yield self.csv_to_json(row.to_dict(orient='records')[0])    
+        if self.csv_engine == 'csv':
+            record_batches = self.read_with_csv_module()
+        else:
+            record_batches = self.read_with_pandas()
 
-        '''
+        for batch in record_batches:
+            if self.yield_batches == True:
+                yield batch
+            else:
+                yield from batch
+
+    def read_with_pandas(self):
+        # Reading big chunks and converting them to records in one go is magnitudes faster 
+        # than building a one-row DataFrame for each record
+
+        import pandas as pd
+
+        clean_columns = None
+
+        if self.normalize_multilines == True:
+            # The normalized lines are streamed to pandas through a file-like object, no temporary file is written
+            csvfile = open(self.file_path, 'r', newline='', encoding='utf-8', errors='replace')
+            source = transforms.LineStreamReader(self.transforms.stream_multilines_to_singlelines(csvfile))
+        else:
+            csvfile = None
+            source = self.file_path
+
+        try:
+            for chunk in pd.read_csv(source, engine="c", chunksize=self.chunk_size):
+
+                # The header is the same for all chunks, only clean it once per file
+                if clean_columns == None:
+                    clean_columns = self.clean_header_keys(chunk.columns)
+
+                chunk.columns = clean_columns
+
+                # Tagging
+                chunk['log_src_pipe'] = "cybernethunter-dfir-csv"
+
+                yield chunk.to_dict(orient='records')
+
+        finally:
+            if csvfile != None:
+                csvfile.close()
+
+    def read_with_csv_module(self):
         # Using this method with the "csv" module is magnitudes faster than 
-        # using Pandas, however I can't find a solution to the "null bytes" (\x00)
-        # that can sometimes be mixed up in the row data
-
-        if self.logtype == 'csv':
-            with open(self.filepath, 'r') as csvfile:
-                self.reader = csv.DictReader(csvfile)
-                for row in self.reader:
-                    try:
-                        yield self.csv_to_json(row)
-                    except:
-                        pass
-        '''
+        # using Pandas. The "null bytes" (\x00) that can sometimes be mixed up 
+        # in the row data are stripped from each line before it reaches the reader
+
+        with open(self.file_path, 'r', newline='', encoding='utf-8', errors='replace') as csvfile:
+
+            lines = (line.replace('\x00', '') if '\x00' in line else line for line in csvfile)
+            if self.normalize_multilines == True:
+                lines = self.transforms.stream_multilines_to_singlelines(lines)
+            reader = csv.reader(lines)
+
+            try:
+                header = self.clean_header_keys(next(reader))
+            except StopIteration:
+                return
+
+            width = len(header)
+            tag = "cybernethunter-dfir-csv"
+            batch = []
+
+            for row in reader:
+                # Blank lines are skipped, short rows get None for the missing columns and the extra values of
+                # long rows are dropped, so that the tag always ends up in its own key
+                if len(row) != width:
+                    if len(row) == 0:
+                        continue
+                    row = row[:width] if len(row) > width else row + [None] * (width - len(row))
+
+                record = dict(zip(header, row))
+                record['log_src_pipe'] = tag
+                batch.append(record)
+
+                if len(batch) >= self.chunk_size:
+                    yield batch
+                    batch = []
+
+            if len(batch) > 0:
+                yield batch
+
+    def clean_header_keys(self, keys):
+        # Let's cleanup keys with non-ascii characters, keeping the original column order
+        return [NON_ASCII_PATTERN.sub('', key) if NON_ASCII_PATTERN.search(key) else key for key in keys]
 
     def csv_to_json(self, row):
 
@@ -83,18 +170,9 @@ class ParserMod():
         # some pre-processing on the csv records before sending them to the output pipe
 
         # Let's cleanup keys with non-ascii characters
-        # Making a copy of the dict since we can't iterate and modify it at the same time
-        row_2 = row.copy()
-
-        for key in row.keys():
-            if re.match(r'[^\x00-\x7f]', key):
-                clean_key = re.sub(r'[^\x00-\x7f]', r'', key)
-                # Let's remove the non-ascii key from the copied object
-                row_2.pop(key)
-                row_2[clean_key] = row[key]
-                row_2.move_to_end(clean_key, last=False)
+        row_2 = dict(zip(self.clean_header_keys(row.keys()), row.values()))
 
         # Tagging
         row_2['log_src_pipe'] = "cybernethunter-dfir-csv"
 
-        return dict(row_2)
\ No newline at end of file
+        return row_2
@@ -12,22 +12,108 @@
  UPDATES: 
     v0.1 - 19-10-2018 - Created script
     v0.2 - 24-11-2020 - Fixed domain parsing issues, integrated tldextract package, improved logging.
+    v0.3 - 18-10-2026 - Log format is detected once per file and parsed with a single precompiled pattern, internal IPs are checked
+                        with integer ranges and domain/date parsing results are cached.
     
  ToDo:
         1. Null
 '''
 
+import functools
 import logging
 import os
-import pandas as pd
 import re
 import sys
-import tldextract
 
 from cybernethunter.helpermods import utils
 from datetime import datetime
 from pathlib import Path
 
+# Patterns used to detect the format of the file, checked against each line until one matches
+DNS_LOG_FORMAT_DETECTION = {
+    'windows_2003': re.compile(r'^\d{8} '),
+    'windows_2008r2': re.compile(r'^\d{1,2}/\d{1,2}/\d{4} '),
+    'windows_2012r2': re.compile(r'^Microsoft-Windows-DNS-Server'),
+    'information': re.compile(r'^Information[;,]'),
+}
+
+# A single pattern per format extracts all the fields we need from each line.
+# Windows 2003 and 2008R2 debug logs only contain DNS queries in lines with "PACKET" in them and flag
+# responses with an "R" after the packet id. The record type and the query are the last two fields.
+DNS_LOG_FORMAT_PATTERNS = {
+    'windows_2003': re.compile(r'^(?P<date>\d{8}) (?P<time>\d{1,2}:\d{2}:\d{2}) \S+ PACKET\s+\S+\s+\S+\s+\S+\s+(?P<client>\S+)\s+\S+\s+(?P<response>R\s)?.*?\s(?P<rtype>\S+)\s+(?P<query>\S+)\s*$'),
+    'windows_2008r2': re.compile(r'^(?P<date>\d{1,2}/\d{1,2}/\d{4}) (?P<time>\d{1,2}:\d{2}:\d{2} [AP]M) \S+ PACKET\s+\S+\s+\S+\s+\S+\s+(?P<client>\S+)\s+\S+\s+(?P<response>R\s)?.*?\s(?P<rtype>\S+)\s+(?P<query>\S+)\s*$'),
+    # whitespace separated fields: 3 = event id, 17 = filetime, 22 = client, 24 = query
+    'windows_2012r2': re.compile(r'^(?:\S+\s+){3}(?P<event_id>\S+)\s+(?:\S+\s+){13}(?P<filetime>\S+)\s+(?:\S+\s+){4}(?P<client>\S+)\s+\S+\s+(?P<query>\S+)'),
+    # ";" or "," separated fields: 1 = date, 3 = event id, 7 = client, 9 = query
+    'information': re.compile(r'^Information[;,](?P<date>[^;,]*)[;,][^;,]*[;,](?P<event_id>[^;,]*)[;,](?:[^;,]*[;,]){3}(?P<client>[^;,]*)[;,][^;,]*[;,](?P<query>[^;,\r\n]*)'),
+}
+
+# Query labels are written as (3)www(6)google(3)com(0)
+DNS_QUERY_LABEL_LENGTH = re.compile(r'\(\d+\)')
+
+# Internal ranges as (first, last) integer tuples: 10/8, 172.16/12, 192.168/16 and 127.0.0.1
+INTERNAL_IP_RANGES = (
+    (0x0A000000, 0x0AFFFFFF),
+    (0xAC100000, 0xAC1FFFFF),
+    (0xC0A80000, 0xC0A8FFFF),
+    (0x7F000001, 0x7F000001),
+)
+
+# Difference between the windows FILETIME epoch (1601) and the unix epoch in 100ns intervals
+FILETIME_EPOCH_DELTA = 116444736000000000
+
+@functools.lru_cache(maxsize=65536)
+def is_internal_ip(ip_address:str) -> bool:
+    # Client IPs repeat a lot within a debug log, so the result is cached per IP string
+
+    octets = ip_address.split('.')
+    if len(octets) != 4:
+        return False
+
+    try:
+        value = 0
+        for octet in octets:
+            octet = int(octet)
+            if octet < 0 or octet > 255:
+                return False
+            value = (value << 8) | octet
+    except ValueError:
+        return False
+
+    for first, last in INTERNAL_IP_RANGES:
+        if first <= value <= last:
+            return True
+
+    return False
+
+@functools.lru_cache(maxsize=65536)
+def extract_domain(dns_uriquery:str) -> str:
+    # Determine domain based off tld
+
+    import tldextract
+    tld_extract = tldextract.extract(dns_uriquery)
+    if tld_extract.domain[:1].isdigit():
+        return tld_extract.suffix
+
+    return tld_extract.domain + '.' + tld_extract.suffix
+
+@functools.lru_cache(maxsize=1024)
+def parse_date(date_string:str, date_format:str) -> datetime:
+    # Only a handful of distinct days are found in a debug log, so the date part is parsed once and cached
+    return datetime.strptime(date_string, date_format)
+
+def parse_time_12h(time_string:str):
+    # Converts "HH:MM:SS AM|PM" to a tuple of (hours, minutes, seconds) in 24h format
+
+    clock, meridiem = time_string.split(' ')
+    hours, minutes, seconds = clock.split(':')
+    hours = int(hours) % 12
+    if meridiem == 'PM':
+        hours = hours + 12
+
+    return hours, int(minutes), int(seconds)
+
 class ParserMod():
 
     def __init__(self, file_path):
@@ -41,135 +127,104 @@ class ParserMod():
         self.file_path = file_path
 
     def execute(self):
-      
-        # Initialize list for Final Dataframe
-        dns_df_rows_list = []
+
+        self.logger.info('Parsing data from {}'.format(self.file_path))
 
         # Open the dns log file given as input   
         with open(self.file_path, 'r') as dns_file:
-            
+
+            # The format is detected once per file with the first line that matches any of the known formats
+            log_format = None
             for line in dns_file:
-                
-                # Look for lines in Windows 2003-2008R2 DNS debug files with "PACKET" in them
-                if re.search( r'(.*) PACKET (.*?) .*', line, re.M|re.I): 
-
-                    # Windows 2003
-                    # For Windows 2003 type files, look for lines that start with date style YYYYMMDD
-                    if re.match('^\d\d\d\d\d\d\d\d', line):
-                        # Split the line into fields         
-                        log_fields = line.split()
-
-                        # put together the date and time indexes into datetime
-                        dns_date = log_fields[0] + ' ' + log_fields[1]
-                        dns_datetime = datetime.strptime(dns_date, '%Y%m%d %H:%M:%S')
-                        # Client IP
-                        dns_client = str(log_fields[7]).strip('[]')
-                        # Record Type
-                        dns_rtype = str(log_fields[-2]).strip('[]')
-
-                        # create variable to hold the value of dns_uriquery with the leading and trailing '.' stripped off
-                        dns_uriquery = re.sub(r"\(\d+\)", r".", str(log_fields[-1]).strip('[]'))
-                        dns_uriquery = dns_uriquery.rstrip('.').lstrip('.')
-
-                        # Determine domain based off tld
-                        tld_extract = tldextract.extract(dns_uriquery)
-                        if re.match('\d+', tld_extract.domain):
-                            dns_domain = tld_extract.suffix
-                        else:
-                            dns_domain = tld_extract.domain + '.' + tld_extract.suffix
-                        
-                        # Remove any response records as we are only looking for DNS queries
-                        if log_fields[9] != 'R':
-                            # This limits the client IPs to only RFC1918 addresses                                                      
-                            if re.match('^(10\.\d{1,3}|192\.168|172\.1[6-9]|172\.2[0-9]|172\.3[0-1]|127\.0\.0\.1)', dns_client):
-                                dns_dict = { 'DateTime': dns_datetime, 'ClientIP': dns_client, 'URIQuery': dns_uriquery, 'Domain': dns_domain, 'RecordType': dns_rtype }
-
-                                yield dns_dict
-                                
-                    # For Windows 2008R2 type files, look for lines that start with date style MM/DD/YYYY
-                    elif re.match('^\d{1,2}\/\d{1,2}\/\d{4}', line):
-    
-                        log_fields = line.split()
-                        dns_date = log_fields[0] + ' ' + log_fields[1] + ' ' + log_fields[2]
-                        dns_datetime = datetime.strptime(dns_date, '%d/%m/%Y %I:%M:%S %p')
-                        dns_sndrcv = str(log_fields[7]).strip('[]')
-                        dns_client = str(log_fields[8]).strip('[]')
-                        dns_rtype = str(log_fields[-2]).strip('[]')
-                        
-                        dns_uriquery = re.sub(r"\(\d+\)", r".", str(log_fields[-1]).strip('[]'))
-                        dns_uriquery = dns_uriquery.rstrip('.').lstrip('.')
-
-                        # Determine domain based off tld
-                        tld_extract = tldextract.extract(dns_uriquery)
-                        if re.match('\d+', tld_extract.domain):
-                            dns_domain = tld_extract.suffix
-                        else:
-                            dns_domain = tld_extract.domain + '.' + tld_extract.suffix
-
-                        if log_fields[10] != 'R':
-
-                            if re.match('^(10\.\d{1,3}|192\.168|172\.1[6-9]|172\.2[0-9]|172\.3[0-1]|127\.0\.0\.1)', dns_client):
-                                dns_dict = { 'DateTime': dns_datetime, 'ClientIP': dns_client, 'URIQuery': dns_uriquery, 'Domain': dns_domain, 'RecordType': dns_rtype }
-
-                                yield dns_dict
-
-                    # For Windows 2012R2-2016 type files, look for lines that start with Microsoft-Windows-DNS-Server
-                    elif re.match('^Microsoft-Windows-DNS-Server', line): 
-
-                        log_fields = line.split()
-                        # Extract Event ID
-                        dns_eventID = str(log_fields[3]).strip(",")
-                        # create a variable to hold the value the date, convert to string to remove a comma, then convert to int    
-                        dns_date = int(str(log_fields[17]).strip(","))
-                        dns_datetime = datetime.fromtimestamp((dns_date - 116444736000000000) // 10000000)
-                        
-                        dns_client = str(re.sub(r'"', r'',log_fields[22])).strip(',')
-                        dns_uriquery = str(re.sub(r'\.\"\,', r'', log_fields[24])).strip('"')
-                        dns_uriquery = dns_uriquery.rstrip('.').lstrip('.')
-
-                        # Determine domain based off tld
-                        tld_extract = tldextract.extract(dns_uriquery)
-                        if re.match('\d+', tld_extract.domain):
-                            dns_domain = tld_extract.suffix
-                        else:
-                            dns_domain = tld_extract.domain + '.' + tld_extract.suffix
-
-                        # DNS Analytical log event 256 is for DNS Queries
-                        if re.match(r"256",dns_eventID):                     
-
-                            if re.match('^(10\.\d{1,3}|192\.168|172\.1[6-9]|172\.2[0-9]|172\.3[0-1]|127\.0\.0\.1)', dns_client): 
-
-                                dns_dict = { 'DateTime': dns_datetime, 'ClientIP': dns_client, 'URIQuery': dns_uriquery, 'Domain': dns_domain }
-
-                                yield dns_dict
-                                
-                    elif re.match('^Information',line):
-
-                        log_fields = re.split(';|,',line)
-
-                        dns_eventID = str(log_fields[3])
-
-                        dns_date = log_fields[1]
-                        dns_datetime = datetime.strptime(dns_date, '%m/%d/%Y %I:%M:%S %p')
-
-                        dns_client = re.sub(r'Source=|Destination=', r'',log_fields[7])
-
-                        dns_uriquery = re.sub(r'Zone=|QNAME=', r'',log_fields[9].strip("."))
-                        dns_uriquery = dns_uriquery.rstrip('.').lstrip('.')
-
-                        # Determine domain based off tld
-                        tld_extract = tldextract.extract(dns_uriquery)
-                        if re.match('\d+', tld_extract.domain):
-                            dns_domain = tld_extract.suffix
-                        else:
-                            dns_domain = tld_extract.domain + '.' + tld_extract.suffix
-
-                        if re.match(r"256", dns_eventID):
-                            dns_dict = { 'DateTime': dns_datetime, 'ClientIP': dns_client, 'URIQuery': dns_uriquery, 'Domain': dns_domain }
-                            
-                            yield dns_dict
-
-        dns_df = pd.DataFrame(dns_df_rows_list)
-        
-        # return final dataframe
-        return dns_df
\ No newline at end of file
+                for format_name, detection_pattern in DNS_LOG_FORMAT_DETECTION.items():
+                    if detection_pattern.match(line):
+                        log_format = format_name
+                        break
+
+                if log_format != None:
+                    break
+
+            if log_format == None:
+                self.logger.error('Could not detect the format of the DNS debug log {}'.format(self.file_path))
+                return
+
+            self.logger.info('Detected DNS debug log format: {}'.format(log_format))
+
+            line_parser = getattr(self, 'parse_{}_line'.format(log_format))
+            line_pattern = DNS_LOG_FORMAT_PATTERNS[log_format]
+
+            # The line used to detect the format is parsed too
+            dns_dict = line_parser(line_pattern.match(line))
+            if dns_dict != None:
+                yield dns_dict
+
+            for line in dns_file:
+                dns_dict = line_parser(line_pattern.match(line))
+                if dns_dict != None:
+                    yield dns_dict
+
+    def parse_query(self, raw_query:str) -> str:
+        # create variable to hold the value of dns_uriquery with the leading and trailing '.' stripped off
+        return DNS_QUERY_LABEL_LENGTH.sub('.', raw_query.strip('[]')).strip('.')
+
+    def parse_windows_2003_line(self, match):
+
+        # Remove any response records as we are only looking for DNS queries
+        if match == None or match.group('response') != None:
+            return None
+
+        # This limits the client IPs to only RFC1918 addresses
+        dns_client = match.group('client').strip('[]')
+        if not is_internal_ip(dns_client):
+            return None
+
+        hours, minutes, seconds = match.group('time').split(':')
+        dns_datetime = parse_date(match.group('date'), '%Y%m%d').replace(hour=int(hours), minute=int(minutes), second=int(seconds))
+        dns_uriquery = self.parse_query(match.group('query'))
+
+        return { 'DateTime': dns_datetime, 'ClientIP': dns_client, 'URIQuery': dns_uriquery, 'Domain': extract_domain(dns_uriquery), 'RecordType': match.group('rtype').strip('[]') }
+
+    def parse_windows_2008r2_line(self, match):
+
+        if match == None or match.group('response') != None:
+            return None
+
+        dns_client = match.group('client').strip('[]')
+        if not is_internal_ip(dns_client):
+            return None
+
+        hours, minutes, seconds = parse_time_12h(match.group('time'))
+        dns_datetime = parse_date(match.group('date'), '%d/%m/%Y').replace(hour=hours, minute=minutes, second=seconds)
+        dns_uriquery = self.parse_query(match.group('query'))
+
+        return { 'DateTime': dns_datetime, 'ClientIP': dns_client, 'URIQuery': dns_uriquery, 'Domain': extract_domain(dns_uriquery), 'RecordType': match.group('rtype').strip('[]') }
+
+    def parse_windows_2012r2_line(self, match):
+
+        # DNS Analytical log event 256 is for DNS Queries
+        if match == None or not match.group('event_id').startswith('256'):
+            return None
+
+        dns_client = match.group('client').replace('"', '').strip(',')
+        if not is_internal_ip(dns_client):
+            return None
+
+        dns_date = int(match.group('filetime').strip(','))
+        dns_datetime = datetime.fromtimestamp((dns_date - FILETIME_EPOCH_DELTA) // 10000000)
+        dns_uriquery = match.group('query').replace('.",', '').strip('"').strip('.')
+
+        return { 'DateTime': dns_datetime, 'ClientIP': dns_client, 'URIQuery': dns_uriquery, 'Domain': extract_domain(dns_uriquery) }
+
+    def parse_information_line(self, match):
+
+        if match == None or not match.group('event_id').startswith('256'):
+            return None
+
+        date_part, time_part = match.group('date').split(' ', 1)
+        hours, minutes, seconds = parse_time_12h(time_part)
+        dns_datetime = parse_date(date_part, '%m/%d/%Y').replace(hour=hours, minute=minutes, second=seconds)
+
+        dns_client = match.group('client').replace('Source=', '').replace('Destination=', '')
+        dns_uriquery = match.group('query').strip('.').replace('Zone=', '').replace('QNAME=', '').strip('.')
+
+        return { 'DateTime': dns_datetime, 'ClientIP': dns_client, 'URIQuery': dns_uriquery, 'Domain': extract_domain(dns_uriquery) }
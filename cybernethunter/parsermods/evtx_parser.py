@@ -10,24 +10,32 @@
 
  UPDATES: 
     v0.1: 18-12-2019 - Created initial script
+    v0.2: 18-10-2026 - Exposed the number of threads used by the rust parser, local files are read by the rust side directly
+                       and records are decoded with orjson when available
     
  ToDo:
         1. 
 
 '''
 
-import fsspec
 import json
 import logging
+import os
 import sys
 
 from cybernethunter.helpermods import utils
-from evtx import PyEvtxParser
 from pathlib import Path
 
+# orjson decodes the records rendered by the rust parser several times faster than the json module
+try:
+    import orjson
+    json_loads = orjson.loads
+except ModuleNotFoundError:
+    json_loads = json.loads
+
 class ParserMod():
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, number_of_threads=0, ansi_codec='windows-1252'):
         
         # Setup logging
         utilities = utils.HelperMod()
@@ -35,13 +43,30 @@ class ParserMod():
         self.logger.info('Initializing {}'.format(__name__))
 
         # initializing variables
+        # number_of_threads: threads used by the rust parser to render the chunks of the file,
+        # 0 lets the library use all available cores
+        # ansi_codec: encoding of the ansi strings inside the evtx file
         self.file_path = file_path
+        self.number_of_threads = number_of_threads
+        self.ansi_codec = ansi_codec
 
     def execute(self):
 
-        self.logger.info('Parsing data from {}'.format(self.file_path))
+        self.logger.info('Parsing data from {} with {} threads'.format(self.file_path, self.number_of_threads if self.number_of_threads > 0 else 'all'))
+
+        # Local files are opened by the rust side itself, which avoids calling back into python 
+        # for every read. Remote files (URLs) are streamed through fsspec.
+        if '//' in str(self.file_path) or not os.path.isfile(self.file_path):
+            import fsspec
+            with fsspec.open(self.file_path, 'rb') as evtx_file:
+                yield from self.parse_records(evtx_file)
+        else:
+            yield from self.parse_records(str(self.file_path))
+
+    def parse_records(self, path_or_file_like):
+
+        from evtx import PyEvtxParser
+        evtx_parser = PyEvtxParser(path_or_file_like, number_of_threads=self.number_of_threads, ansi_codec=self.ansi_codec)
 
-        with fsspec.open(self.file_path, 'rb') as evtx_file:
-            evtx_parser = PyEvtxParser(evtx_file)
-            for record in evtx_parser.records_json():
-                yield json.loads(record['data'])
\ No newline at end of file
+        for record in evtx_parser.records_json():
+            yield json_loads(record['data'])
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 
 '''
- NAME: xml_parser.py | Version: 0.3
+ NAME: xml_parser.py | Version: 0.5
  CYBERNETHUNTER Version: 0.3
  AUTHOR: Diego Perez (@darkquasar) - 2018
  DESCRIPTION: This module will parse XML records into JSON
@@ -9,6 +9,11 @@
 
  UPDATES: 
     v0.1: 19-11-2020 - Created file from initial multiparser
+    v0.2: 18-10-2026 - Replaced the recursive flat parser with an iterative one that strips namespaces through a tag cache
+    v0.3: 18-10-2026 - Added an optional lxml engine that only hands the top-level record elements to python
+    v0.4: 18-10-2026 - The lxml engine keeps every top-level record whatever its tag, like the etree engine
+    v0.5: 18-10-2026 - Restored the C-level record tag filter of the lxml engine, top-level elements with other tags are
+                       converted when the next record arrives
     
  ToDo:
         1. 
@@ -18,10 +23,14 @@
 import json
 import logging
 import os
-import pandas as pd
 import re
 import sys
-import xml.etree.cElementTree as ET
+
+# cElementTree was removed in python 3.9, ElementTree uses the C accelerator by default
+try:
+    import xml.etree.cElementTree as ET
+except ModuleNotFoundError:
+    import xml.etree.ElementTree as ET
 
 from cybernethunter.helpermods import utils
 from collections import defaultdict
@@ -43,7 +52,7 @@ class Help():
 
 class ParserMod():
 
-    def __init__(self, filepath, xmlparsetype='flat'):
+    def __init__(self, filepath, xmlparsetype='flat', xmlengine='etree'):
         
         # Setup logging
         utilities = utils.HelperMod()
@@ -52,7 +61,9 @@ class ParserMod():
         
         # initializing variables
         # xmlparsetype identifies whether the resulting json record should be flat or nested
+        # xmlengine identifies the library used to parse the file: "etree" (python's ElementTree) or "lxml"
         self.xmlparsetype = xmlparsetype
+        self.xmlengine = xmlengine
         self.filepath = filepath
 
     def execute(self):
@@ -62,6 +73,22 @@ class ParserMod():
         '''
         
         self.logger.info('Parsing data from {}'.format(self.filepath))
+
+        if self.xmlengine == "lxml":
+            # Only the import falls back to etree, records already yielded by lxml must not be parsed again
+            try:
+                from lxml import etree as lxml_etree
+            except ModuleNotFoundError:
+                lxml_etree = None
+                self.logger.error('lxml is not installed, falling back to the etree engine')
+
+            if lxml_etree != None:
+                yield from self.lxml_parser(lxml_etree)
+                return
+
+        if self.xmlparsetype == "flat":
+            yield from self.flat_xml_parser()
+            return
     
         # compiling a RegEx that will aid in the removal of badly configured schema leftovers
         self.schema_info = re.compile('{.*?}')
@@ -73,7 +100,6 @@ class ParserMod():
         try:
     
             for event, elem in xmltree:
-                self.count = self.counter(1)
         
                 # Dealing with the leftovers of exporting all logs to 
                 # a file using evtxexport. The added "schema" info could be removed by
@@ -83,10 +109,7 @@ class ParserMod():
                 if len(schema_tag) > 0:
                     elem.tag = elem.tag.split(schema_tag[0])[1]
 
-                if self.xmlparsetype == "flat":
-                    yield self.flat_recursive_xml_parser(xmltree, elem.tag, {})
-                else:
-                    yield (self.flatten_lists_on_dict(self.nested_recursive_xml_parser(xmltree, elem.tag, None)))
+                yield (self.flatten_lists_on_dict(self.nested_recursive_xml_parser(xmltree, elem.tag, None)))
           
         except ET.ParseError:
             pass
@@ -98,103 +121,202 @@ class ParserMod():
         for record in self.execute():
             yield record
               
-    def counter(self, n):
-        while True:
-            n = n + 1
-            yield n
+    def flat_xml_parser(self):
+        '''
+        Iterative version of the flat parser. Every direct child of the root node is considered a record and 
+        every leaf element inside it is added to a flat dict following the rules in "add_flat_leaf". Namespaces 
+        (like the leftovers of exporting logs with evtxexport) are stripped through a cache so that each distinct 
+        tag is only processed once, and the root node is cleared after each record so memory stays flat.
+        '''
 
-    def flat_recursive_xml_parser(self, xmltree, first_level_node, result_dict):
-      
-        for event, elem in xmltree:
-            
-            # Dealing with the leftovers of executing evtxexport
-            schema_tag = re.findall(self.schema_info, elem.tag)
-            if len(schema_tag) > 0:
-                elem.tag = elem.tag.split(schema_tag[0])[1]
-
-            if event == "end" and len(elem.getchildren()) == 0:
-                
-                # Preventing evtxparse metadata <Execution ProcessID="488" ThreadID="3220"/>
-                # from appending another "ProcessID" key
-                if elem.tag == 'Execution':
+        tag_cache = {}
+        depth = 0
+        root = None
+        result_dict = None
+        duplicate_counter = 1
+
+        xmltree = ET.iterparse(self.filepath, events=('start', 'end'))
+
+        try:
+            for event, elem in xmltree:
+
+                if event == 'start':
+                    if depth == 0:
+                        root = elem
+                    elif depth == 1:
+                        # A new record starts
+                        result_dict = {}
+                        duplicate_counter = 1
+                    depth = depth + 1
                     continue
+
+                depth = depth - 1
+
+                if depth == 1:
+                    # End of a record
+                    if result_dict:
+                        yield result_dict
+                    result_dict = None
+                    root.clear()
+
+                elif depth > 1 and len(elem) == 0:
+                    tag = tag_cache.get(elem.tag)
+                    if tag == None:
+                        tag = elem.tag.rpartition('}')[2]
+                        tag_cache[elem.tag] = tag
+
+                    duplicate_counter = self.add_flat_leaf(result_dict, tag, elem.attrib, elem.text, duplicate_counter)
+
+        except ET.ParseError:
+            pass
+
+    def lxml_parser(self, lxml_etree):
+        '''
+        Parses the file with lxml, filtering the top-level record elements at the C level via iterparse(tag=...) so that 
+        python only deals with complete records. The record tag is the one of the first child of the root node, with a 
+        wildcard namespace so that records with or without the evtxexport schema leftovers are matched. Top-level 
+        elements with a different tag aren't lost: they stay in the tree as previous siblings of the next record (or as 
+        the last children of the root) and are converted in document order when it arrives, so files with mixed 
+        top-level tags give the same records as the etree engine. "huge_tree" lifts lxml's limits on very deep or big 
+        text nodes and "recover" allows us to continue past the malformed chunks that evtxexport sometimes leaves behind.
+        '''
+
+        record_tag = self.find_record_tag(lxml_etree)
+        if record_tag == None:
+            return
+
+        tag_cache = {}
+        last_record = None
+        xmltree = lxml_etree.iterparse(self.filepath, events=('end',), tag=record_tag, huge_tree=True, recover=True)
+
+        for event, elem in xmltree:
+
+            # Only direct children of the root node are records
+            parent = elem.getparent()
+            if parent == None or parent.getparent() != None:
+                continue
+            # Previous siblings still in the tree are the (cleared) previous record, complete top-level elements
+            # with another tag and comments or processing instructions (which have a function as tag)
+            while elem.getprevious() != None:
+                sibling = parent[0]
+                if sibling != last_record and isinstance(sibling.tag, str):
+                    record = self.lxml_record(sibling, tag_cache, lxml_etree)
+                    if record != None:
+                        yield record
+                del parent[0]
+
+            record = self.lxml_record(elem, tag_cache, lxml_etree)
+            if record != None:
+                yield record
+
+            # Free the record, it is removed from the root along with the next record's previous siblings
+            elem.clear(keep_tail=True)
+            last_record = elem
+
+        # Top-level elements with another tag after the last record
+        if last_record != None:
+            for sibling in last_record.itersiblings():
+                if isinstance(sibling.tag, str):
+                    record = self.lxml_record(sibling, tag_cache, lxml_etree)
+                    if record != None:
+                        yield record
+
+    def find_record_tag(self, lxml_etree):
+        # The first child of the root node tells us the tag of the records. The file is opened here so that it
+        # is closed as soon as the first child is found, instead of whenever the abandoned parser is collected.
+
+        with open(self.filepath, 'rb') as xmlfile:
+            for event, elem in lxml_etree.iterparse(xmlfile, events=('start',), huge_tree=True, recover=True):
+                if elem.getparent() != None:
+                    return '{*}' + elem.tag.rpartition('}')[2]
+
+        return None
+
+    def lxml_record(self, elem, tag_cache, lxml_etree):
+        # Converts a complete top-level element to a record, None for empty flat records
+
+        if self.xmlparsetype != "flat":
+            return self.flatten_lists_on_dict(self.element_to_nested_dict(elem, tag_cache))
+
+        result_dict = {}
+        duplicate_counter = 1
+        for leaf in elem.iter(lxml_etree.Element):
+            if leaf is elem or len(leaf) > 0:
+                continue
+            tag = tag_cache.get(leaf.tag)
+            if tag == None:
+                tag = leaf.tag.rpartition('}')[2]
+                tag_cache[leaf.tag] = tag
+            duplicate_counter = self.add_flat_leaf(result_dict, tag, leaf.attrib, leaf.text, duplicate_counter)
+
+        return result_dict if result_dict else None
+
+    def element_to_nested_dict(self, elem, tag_cache):
+        # Converts an element to the same structure produced by "nested_recursive_xml_parser":
+        # elements with children become a dict of lists, leaf elements become their text
         
-                # CASE: elem does not contain any text but elem attributes do
-                # Ex: <Key SomeKey="SomeValue"></Key>
-                if len(elem.attrib) > 0 and elem.text == None:
-                    for attr in elem.attrib:
-                        if elem.tag == 'Provider':
-                            result_dict['Provider'] = elem.attrib['Name']
-                            break
-                        else:
-                            result_dict[attr] = elem.attrib[attr]
-                    
-                '''
-                if the "tag" has already been seen (like in the above
-                example of multiple "Data" tags, we must make sure that
-                (a) we add them if the elem.attrib value is unique
-                (b) we exclude them if already present
-                (c) we add a counter value to the name if the elem.attrib value
-                (not the name of the attribute like "Key" but rather
-                its value like "SubjectUserSid") is 
-                repeated [<-- not handled yet]
-                CASE: elem.tag already in result_dict.keys()
-                '''
-        
-                if elem.tag in result_dict.keys():
-                    # CASE: EVTXEXPORT don't add the first child of <EventData> as "Data"
-                    if elem.attrib.get('Name') and elem.text != None:
-                        result_dict[elem.attrib['Name']] = elem.text
-              
-                    # CASE: EVTXEXPORT if multiple <Data> tags under <EventData> 
-                    # without any differentiating attributes inside the elem
-                    elif len(elem.attrib) == 0 and elem.text != None:
-                        result_dict[elem.tag+str(self.count.__next__())] = elem.text
-      
-            # CASE: elem.tag NOT IN result_dict.keys()
-                else:
-                    ''' 
-                    Handling duplicate tags with duplicate 
-                    attribute names, like cases where you have:
-                        <Data Name="SubjectUserSid">S-1-5-18</Data>
-                        <Data Name="SubjectUserName">-</Data>
-                        <Data Name="SubjectDomainName">-</Data>
-                        <Data Name="SubjectLogonId">0x00000000000003e7</Data>
-                    In this example, the elem.tag is the same ('Data'), as are
-                    the attribute keys ('Name').
-                    NOTE: The code below DOES NOT handle cases where 
-                    an elem.tag has multiple elem.attrib
-                    ''' 
-          
-                    # Handling exceptions for evtxexport
-                    if elem.tag == "Data" and len(elem.attrib) > 0:
-                        result_dict[elem.attrib['Name']] = elem.text
-              
-                    # this 2nd block will, by default, not collect any elements
-                    # that don't have attributes and are empty
-                    elif len(elem.attrib) == 0 and elem.text == None:
-                        continue
-              
-                    else:
-                        result_dict[elem.tag] = elem.text
-        
-            elif event == "start":
+        if len(elem) == 0:
+            return elem.text.strip().replace('"','') if elem.text else ""
+
+        items = defaultdict(list)
+        for child in elem:
+            if not isinstance(child.tag, str):
+                # comments and processing instructions
                 continue
-      
-            if event == "end":
-                
-                if elem.tag == first_level_node:
-                    self.root.clear()
-                    return
-                
-                elif len(elem.getchildren()) > 0:
-                    self.flat_recursive_xml_parser(xmltree, first_level_node, result_dict)
-                    return result_dict
-                
-                else:
-                    self.flat_recursive_xml_parser(xmltree, first_level_node, result_dict)
-                    return result_dict
-              
+            tag = tag_cache.get(child.tag)
+            if tag == None:
+                tag = child.tag.rpartition('}')[2]
+                tag_cache[child.tag] = tag
+            items[tag].append(self.element_to_nested_dict(child, tag_cache))
+
+        return dict(items)
+
+    def add_flat_leaf(self, result_dict, tag, attrib, text, duplicate_counter):
+        # Adds a leaf element (no children) to the flat dict of the current record. "duplicate_counter" 
+        # is used to name repeated tags without attributes (Data, Data2, Data3...) and is returned
+        # back to the caller so that it can keep track of it for the whole record.
+
+        # Preventing evtxparse metadata <Execution ProcessID="488" ThreadID="3220"/>
+        # from appending another "ProcessID" key
+        if tag == 'Execution':
+            return duplicate_counter
+
+        # CASE: elem does not contain any text but elem attributes do
+        # Ex: <Key SomeKey="SomeValue"></Key>
+        if len(attrib) > 0 and text == None:
+            if tag == 'Provider':
+                result_dict['Provider'] = attrib.get('Name')
+            else:
+                result_dict.update(attrib)
+
+        # CASE: tag already in result_dict
+        if tag in result_dict:
+            # CASE: EVTXEXPORT don't add the first child of <EventData> as "Data"
+            if attrib.get('Name') and text != None:
+                result_dict[attrib['Name']] = text
+
+            # CASE: EVTXEXPORT if multiple <Data> tags under <EventData> 
+            # without any differentiating attributes inside the elem
+            elif len(attrib) == 0 and text != None:
+                duplicate_counter = duplicate_counter + 1
+                result_dict[tag + str(duplicate_counter)] = text
+
+        # CASE: tag NOT in result_dict
+        else:
+            # Handling exceptions for evtxexport, <Data Name="SubjectUserSid">S-1-5-18</Data>
+            # is promoted to a "SubjectUserSid" key
+            if tag == "Data" and len(attrib) > 0:
+                result_dict[attrib.get('Name', tag)] = text
+
+            # by default, do not collect any elements that don't have attributes and are empty
+            elif len(attrib) == 0 and text == None:
+                pass
+
+            else:
+                result_dict[tag] = text
+
+        return duplicate_counter
+
     def nested_recursive_xml_parser(self, xmltree, first_level_node, new_elem=None):
         # https://stackoverflow.com/questions/19286118/python-convert-very-large-6-4gb-xml-files-to-json?newreg=1f34414a077a4ed5a951054f7859b7d8
         
@@ -236,4 +358,6 @@ class ParserMod():
         This function takes a nested dict as outputted by "nested_recursive_xml_parser" and recursively removes any lists whose content is a single item (regardless of this item being a string or a dict). 
         '''
         if isinstance(d, dict):
-            return {a:b[0] if len(b) == 1 and isinstance(b[0], str) else (self.flatten_lists_on_dict(b[0]) if len(b) == 1 and isinstance(b[0], dict) else [self.flatten_lists_on_dict(c) for c in b]) for a, b in d.items()}
\ No newline at end of file
+            return {a:b[0] if len(b) == 1 and isinstance(b[0], str) else (self.flatten_lists_on_dict(b[0]) if len(b) == 1 and isinstance(b[0], dict) else [self.flatten_lists_on_dict(c) for c in b]) for a, b in d.items()}
+        # strings inside lists of repeated elements (like multiple <Data> tags) are kept as they are
+        return d
\ No newline at end of file
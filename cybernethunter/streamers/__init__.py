@@ -1,4 +1,15 @@
 # -*- coding: utf-8 -*-
 # 2018-2020 Diego Perez (@darkquassar / https://linkedin.com/in/diegope)
 
-from . import dataframe_streamer
\ No newline at end of file
+import importlib
+
+# Registry of the available streamers, modules are only imported when they are first accessed
+STREAMERS = ["dataframe_streamer"]
+
+def __getattr__(name):
+    if name in STREAMERS:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+def __dir__():
+    return sorted(list(globals().keys()) + STREAMERS)
@@ -1,13 +1,16 @@
 #!/usr/bin/env python3
 
 '''
- NAME: dataframe_streamer.py | version: 0.1
+ NAME: dataframe_streamer.py | version: 0.4
  CYBERNETHUNTER Version: 0.3
  AUTHOR: Diego Perez (@darkquasar) - 2020
  DESCRIPTION: Streamer for Pandas DataFrames
     
  Updates: 
         v0.1 - 25-11-2020 - Created script
+        v0.2 - 18-10-2026 - Key partitioning streamer: one key lookup per record, per-key row buffers flushed to dataframes or CSV
+        v0.3 - 18-10-2026 - Chunks appended to a CSV file are aligned to the header written with its first chunk
+        v0.4 - 18-10-2026 - CSV partitions are written by the column-aligned writer of the file output, columns showing up after the first flush are kept
     
  ToDo:
         1. ----.
@@ -22,6 +25,7 @@ import sys
 import time
 
 from cybernethunter.helpermods import utils
+from cybernethunter.outputmods import file_writers
 from streamz import Stream
 
 class Streamer:
@@ -33,36 +37,133 @@ class Streamer:
         self.logger = self.utilities.get_logger('CYBERNETHUNTER.STREAMER.DATAFRAME')
         self.logger.info('Initializing {}'.format(__name__))
         
-    def stream_to_dataframe_by_key(self, value_list:list, key_selector:list) -> dict:
+    def stream_to_dataframe_by_key(self, value_list:list, key_selector:list, records=None, buffer_size:int=10000, target_file:str=None) -> dict:
 
-        # value_list: the list of values to filter by, a different stream filter will be created
-        # based off these values
-        # key_selector: in a dict, whether nested or flat, this is the key or nested key that is used
-        # to retrieve the values against which the value_list will be compared to break off the different
-        # streams
+        # value_list: the list of values to split the stream by, a different partition will be created
+        # for each one of these values. If None, a partition is created for every value found.
+        # key_selector: in a dict, whether nested or flat, this is the key or nested key (list or dot separated
+        # string) that is used to retrieve the values against which the value_list will be compared to split 
+        # the records into partitions
+        # records: an iterable of records to stream. If None, records must be emitted into "self.source_pipe" and 
+        # "flush_partitions" called at the end to retrieve the dataframes.
+        # buffer_size: number of records kept in memory for each partition before they are flushed
+        # target_file: if provided, partitions are flushed to CSV files instead of being kept as dataframes. 
+        # The string is formatted with the value of each partition, ex: "security_{}.csv" -> "security_4624.csv"
+        # The header of each file is the union of the columns of all its records, so the schema of a partition can change between flushes.
+
+        if isinstance(key_selector, str):
+            key_selector = key_selector.split('.')
+
+        self.key_selector = tuple(key_selector)
+        self.partition_values = None if value_list == None else set(value_list)
+        self.buffer_size = buffer_size
+        self.target_file = target_file
+
+        # value -> list of records waiting to be flushed
+        self.partition_buffers = {}
+        # value -> list of flushed dataframe chunks (only used when not writing to CSV)
+        self.partition_chunks = {}
+        # CSV file -> writer aligning the rows to the union of the columns, the file is completed when the writer is closed
+        self.partition_writers = {}
+
+        if self.partition_values != None:
+            for value in self.partition_values:
+                self.partition_buffers[value] = []
+                self.partition_chunks[value] = []
 
         # Setup Stream Pipeline
         self.source_pipe = Stream()
+        self.source_pipe.sink(self.partition_record)
+
+        if records == None:
+            return {}
+
+        for record in records:
+            if record != None:
+                self.source_pipe.emit(record)
+
+        return self.flush_partitions()
+
+    def get_partition_key(self, record:dict):
+        # Single lookup of the (possibly nested) key selector, without copying the list of keys
+
+        for key in self.key_selector:
+            if not isinstance(record, dict):
+                return None
+            record = record.get(key)
+
+        return record
+
+    def partition_record(self, record:dict):
+        # Dispatch each record to the buffer of its partition, flushing it once it is full
+
+        value = self.get_partition_key(record)
+        buffer = self.partition_buffers.get(value)
+
+        if buffer == None:
+            if self.partition_values != None:
+                # record does not belong to any of the requested partitions
+                return
+            buffer = self.partition_buffers[value] = []
+            self.partition_chunks[value] = []
+
+        buffer.append(record)
+
+        if len(buffer) >= self.buffer_size:
+            self.flush_partition(value)
+
+    def flush_partition(self, value):
+
+        buffer = self.partition_buffers[value]
+        if len(buffer) == 0:
+            return
+
+        self.partition_buffers[value] = []
+
+        if self.target_file != None:
+            # The schema of a partition can change between flushes, the writer spills the rows and aligns them to the
+            # union of the columns once it is closed
+            target_file = self.target_file.format(value)
+            writer = self.partition_writers.get(target_file)
+
+            if writer == None:
+                writer = self.partition_writers[target_file] = file_writers.TabularFileWriter(target_file, delimiter=',', batch_size=self.buffer_size)
+
+            for record in buffer:
+                writer.write(record)
+        else:
+            self.partition_chunks[value].append(pd.DataFrame.from_records(buffer))
+
+    def flush_partitions(self) -> dict:
+        # Flush whatever is left in the buffers and return a dict of dataframes named "<value>_df".
+        # When writing to CSV, the dict contains the path of the CSV file of each partition instead.
+
         df_dict = {}
 
-        for value in value_list:
+        for value in list(self.partition_buffers.keys()):
+            self.flush_partition(value)
             key_name = '{}_df'.format(value)
-            df_dict[key_name] = pd.DataFrame()
-            
-            self.source_pipe.filter(
-                lambda record: self.utilities.get_value_from_nested_dict(
-                    record,
-                    nested_keys_list=key_selector
-                ) == value
-            ).map(self.append_dataframe)
 
+            if self.target_file != None:
+                df_dict[key_name] = self.target_file.format(value)
+            elif len(self.partition_chunks[value]) > 0:
+                # A single concat per partition keeps the cost linear
+                df_dict[key_name] = pd.concat(self.partition_chunks[value], ignore_index=True)
+                self.partition_chunks[value] = []
+            else:
+                df_dict[key_name] = pd.DataFrame()
+
+        for writer in self.partition_writers.values():
+            writer.close()
+        self.partition_writers = {}
+
+        return df_dict
 
     def append_dataframe(self, record:dict) -> pd.DataFrame:
         
-        df = pd.DataFrame().from_dict([record])
-        return pd.DataFrame().append(df)
+        return pd.DataFrame.from_records([record])
     
-    def stream_from_dataframe_to_csv(self, dataframe:pd.core.frame.DataFrame, target_file:str):
+    def stream_from_dataframe_to_csv(self, dataframe:pd.core.frame.DataFrame, target_file:str, header:bool=True):
         # this function will essentially append dataframes to a CSV file
         
-        dataframe.to_csv(target_file, mode='a', index=False)
\ No newline at end of file
+        dataframe.to_csv(target_file, mode='a', index=False, header=header)
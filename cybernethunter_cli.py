@@ -15,7 +15,6 @@
 '''
 
 import argparse
-import importlib
 import logging
 import os
 import sys
@@ -24,13 +23,16 @@ import time
 from datetime import datetime as datetime
 from pathlib import Path
 from time import strftime
-from streamz import Stream
 
+# Parsermods and the client libraries of each output pipe are only imported once they are selected
+from cybernethunter import connectors
+from cybernethunter import huntmods
+from cybernethunter import parsermods
 from cybernethunter.helpermods import utils
+from cybernethunter.helpermods import parallel
+from cybernethunter.helpermods import stats
 from cybernethunter.helpermods import transforms
 from cybernethunter.outputmods import output as cyout
-from cybernethunter.parsermods import xml_parser as cyxml
-from cybernethunter.parsermods import csv_parser as cycsv
 
 class Arguments():
     
@@ -49,16 +51,106 @@ class Arguments():
                 required=False
                 )
         
+        self.parser.add_argument(
+                "-ce", "--csv-engine",
+                help="Engine used by the csv_parser module: ""pandas"" reads the file in big chunks with the pandas C engine, ""csv"" streams it with python's csv module (tolerant to null bytes)",
+                type=str,
+                choices=["pandas", "csv"],
+                default="pandas",
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-cm", "--csv-multilines",
+                help="Normalize the CSV rows whose quoted values span several lines (KAPE/RECmd outputs like OpenPIDMRU) into single-line rows while reading them, line breaks inside values are replaced by a literal \\n",
+                action="store_true",
+                default=False,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-cs", "--chunk-size",
+                help="Number of rows read at once by parsermods that support bulk reads (csv_parser) and number of records whose timestamps are converted at once by the collect action",
+                type=int,
+                default=10000,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-eb", "--es-bulk-bytes",
+                help="Max size in bytes of each elasticsearch bulk request, the number of records per request is set with --output-batch-size (default 5000)",
+                type=int,
+                default=10485760,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-ec", "--es-credentials",
+                help="Elasticsearch credentials separated by a space as follows: ""user password"". Example: ""elastic P@ssword123""",
+                type=str,
+                default=None,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-eh", "--es-hosts",
+                help="Elasticsearch/OpenSearch node urls separated by a space, bulk requests are spread across them. Example: ""https://10.0.0.5:9200 https://10.0.0.6:9200""",
+                type=str,
+                default="http://127.0.0.1:9200",
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-ei", "--es-index-prefix",
+                help="Prefix of the elasticsearch indexes, records are sent to ""<prefix>-winevent-<channel>"" or ""<prefix>-<log_type>"" so that they match the index templates of the stack",
+                type=str,
+                default="logs-dfir",
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-ens", "--es-no-verify-ssl",
+                help="Do not verify the certificates of the elasticsearch nodes",
+                action="store_true",
+                default=False,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-ew", "--es-bulk-workers",
+                help="Number of elasticsearch bulk requests sent concurrently",
+                type=int,
+                default=4,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-et", "--evtx-threads",
+                help="Number of threads used by the evtx_parser module to parse each EVTX file. 0 lets the parser use all cores (or splits them between workers when --workers is used)",
+                type=int,
+                default=0,
+                required=False
+                )
+
         self.parser.add_argument(
                 "-f", "--file",
                 help="File or folder (the script will list all files within it) to be processed",
                 type=str,
-                required=True
+                default=None,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-ha", "--hunt-all-records",
+                help="Send all the records to the output pipe when running the hunt action, not only the ones that hit a rule (hits are still tagged)",
+                action="store_true",
+                default=False,
+                required=False
                 )
 
         self.parser.add_argument(
                 "-ht", "--hunt-template",
-                help="Select the hunting template (YAML format) that will be applied to your data",
+                help="Select the hunting template (YAML format) that will be applied to your data, or a folder of templates (*.yml, *.yaml) that are all evaluated in the same pass",
                 type=str,
                 default=None,
                 required=False
@@ -72,11 +164,44 @@ class Arguments():
                 required=False
                 )
 
+        self.parser.add_argument(
+                "-kbs", "--kafka-batch-size",
+                help="Maximum size in bytes of the record batches sent by the kafka producer to each partition",
+                type=int,
+                default=262144,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-kc", "--kafka-compression",
+                help="Compression applied by the kafka producer to each batch of records",
+                type=str,
+                choices=["none", "gzip", "snappy", "lz4", "zstd"],
+                default="none",
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-kif", "--kafka-max-in-flight",
+                help="Maximum number of records sent to kafka and not yet acknowledged, the producer is flushed once this window is full",
+                type=int,
+                default=100000,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-kl", "--kafka-linger-ms",
+                help="Time in milliseconds the kafka producer waits for more records before sending a batch",
+                type=int,
+                default=50,
+                required=False
+                )
+
         self.parser.add_argument(
                 "-l", "--log-type",
                 help="This option specifies the type of log being ingested. Type ""xml"" requires a file in XML format with proper wrapping (opening and closing top-level root node). Type csv requires a ""csv"" file in ASCII format.",
                 type=str,
-                choices=["xml", "csv"],
+                choices=["xml", "csv", "evtx"],
                 default="xml",
                 required=False
                 )
@@ -98,6 +223,23 @@ class Arguments():
                 required=False
                 )
 
+        self.parser.add_argument(
+                "-ob", "--output-batch-size",
+                help="Number of records batched together by the file outputs (row group size for parquet and arrow). Each output uses its own default when not set",
+                type=int,
+                default=None,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-oc", "--output-compression",
+                help="Compression codec used by the outputs that support it (parquet: snappy/gzip/lz4/zstd, arrow: lz4/zstd, json/csv/tsv files: gzip/zstd)",
+                type=str,
+                choices=["none", "snappy", "gzip", "lz4", "zstd"],
+                default=None,
+                required=False
+                )
+
         self.parser.add_argument(
                 "-op", "--output-pipe",
                 help="Pipe of output: stdout, file, kafka, rabbitmq, elasticsearch",
@@ -107,20 +249,44 @@ class Arguments():
                 required=False
                 )
 
+        self.parser.add_argument(
+                "-or", "--output-rotate-size",
+                help="Rotate json/csv/tsv output files every N megabytes (uncompressed): output.0001.json, output.0002.json, etc.",
+                type=int,
+                default=None,
+                required=False
+                )
+
         self.parser.add_argument(
                 "-ot", "--output-type",
-                help="Type of output: csv, tsv, json, json_pretty, sqlite",
+                help="Type of output: csv, tsv, json, json_pretty, sqlite, parquet, arrow",
                 type=str,
-                choices=["tsv", "csv", "json", "json_pretty", "sqlite"],
+                choices=["tsv", "csv", "json", "json_pretty", "sqlite", "parquet", "arrow"],
                 default="json",
                 required=False
                 )
 
+        self.parser.add_argument(
+                "-pi", "--progress-interval",
+                help="Seconds between the progress lines logged while records go through the output pipe, 0 disables them",
+                type=float,
+                default=10,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-ps", "--profile-startup",
+                help="Report the import cost of CYBERNETHUNTER and each of its dependencies and exit",
+                action="store_true",
+                default=False,
+                required=False
+                )
+
         self.parser.add_argument(
                 "-rb", "--rabbitmq-broker",
-                help="Define the rabbit-mq broker options separated by a space as follows: ""IP PORT"". Example: ""127.0.0.1 9501""",
+                help="Define the rabbit-mq broker options separated by a space as follows: ""IP PORT"". Example: ""127.0.0.1 5672""",
                 type=str,
-                default="127.0.0.1 9501",
+                default="127.0.0.1 5672",
                 required=False
                 )
 
@@ -128,7 +294,180 @@ class Arguments():
                 "-rc", "--rabbitmq-credentials",
                 help="Define the rabbit-mq broker credentials separated by a space as follows: ""user password"". Example: ""admin P@ssword123""",
                 type=str,
-                default="127.0.0.1 9501",
+                default="guest guest",
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-rch", "--rabbitmq-channels",
+                help="Number of rabbit-mq channels the records are published across",
+                type=int,
+                default=2,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-re", "--rabbitmq-exchange",
+                help="Rabbit-mq exchange the records are published to, the exchange must already exist in the broker",
+                type=str,
+                default="logstash-rabbitmq",
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-rif", "--rabbitmq-max-in-flight",
+                help="Max number of records published to rabbit-mq but not yet confirmed by the broker, publishing pauses when the window is full",
+                type=int,
+                default=10000,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-rk", "--rabbitmq-routing-key",
+                help="Routing key of the records published to rabbit-mq",
+                type=str,
+                default="",
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-se", "--serializer",
+                help="JSON serializer used by the output pipes: ""auto"" picks the fastest one installed (orjson, ujson, json)",
+                type=str,
+                choices=["auto", "orjson", "ujson", "json"],
+                default="auto",
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-sf", "--stats-file",
+                help="JSON file where the final pipeline stats are written: records/s, bytes and p50/p90/p99 per-record latency of the parse, transform and output stages",
+                type=str,
+                default=None,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-tm", "--tabular-mode",
+                help="How csv/tsv file outputs keep the columns aligned when records have different fields: ""spill"" spills the rows to a temporary file and aligns them to the union of all fields when done (single pass), ""scan"" computes the union of the fields with a first pass over the input (two passes, no temporary file)",
+                type=str,
+                choices=["spill", "scan"],
+                default="spill",
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-ua", "--umbrella-auth",
+                help="Base64 encoded key:secret of the Umbrella API credentials used by the collect action, read from the UMBRELLA_AUTH_B64 environment variable when not provided",
+                type=str,
+                default=os.environ.get("UMBRELLA_AUTH_B64"),
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-uau", "--umbrella-auth-url",
+                help="Umbrella OAuth2 token url (ex: a local mock server), Umbrella's management API by default",
+                type=str,
+                default=None,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-ud", "--umbrella-domains",
+                help="Comma separated list of domains the Umbrella activity is filtered by (ex: avsvmcloud.com,digitalcollege.org)",
+                type=str,
+                default=None,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-ue", "--umbrella-endpoint",
+                help="Umbrella activity endpoint collected by the collect action",
+                type=str,
+                choices=["allactivity", "dns", "proxy", "firewall", "ip"],
+                default="dns",
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-uet", "--umbrella-end-time",
+                help="End of the time range collected from Umbrella in ISO format (ex: 2020-12-16T10:00:00), now by default",
+                type=str,
+                default=None,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-ul", "--umbrella-records-limit",
+                help="Max number of records returned by each Umbrella API request, time windows that reach it are split",
+                type=int,
+                default=5000,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-unc", "--umbrella-no-cache",
+                help="Do not read or write the on-disk cache of Umbrella responses (~/.cybernethunter/umbrella_cache.sqlite)",
+                action="store_true",
+                default=False,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-uo", "--umbrella-org-id",
+                help="Umbrella organization id collected by the collect action",
+                type=str,
+                default=None,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-ust", "--umbrella-start-time",
+                help="Start of the time range collected from Umbrella in ISO format (ex: 2020-12-15T00:00:00)",
+                type=str,
+                default=None,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-uu", "--umbrella-api-url",
+                help="Umbrella reporting API base url (ex: a local mock server), https://reports.api.umbrella.com/v2 by default",
+                type=str,
+                default=None,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-uw", "--umbrella-window-minutes",
+                help="Initial size in minutes of the time windows queried to Umbrella, adapted afterwards to the density of records",
+                type=float,
+                default=10,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-w", "--workers",
+                help="Number of worker processes used to parse the files inside a folder. With more than one worker, files are spread across a pool of processes and their records merged into a single output pipe",
+                type=int,
+                default=1,
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-wo", "--worker-order",
+                help="Order in which the records parsed by multiple workers are sent to the output pipe: ""unordered"" sends them as soon as they arrive, ""ordered"" keeps the order of the files in the folder",
+                type=str,
+                choices=["unordered", "ordered"],
+                default="unordered",
+                required=False
+                )
+
+        self.parser.add_argument(
+                "-xe", "--xmlengine",
+                help="Library used by the xml_parser module: ""etree"" (python's ElementTree) or ""lxml"" (builds each record at the C level and recovers from malformed evtxexport output)",
+                type=str,
+                choices=["etree", "lxml"],
+                default="etree",
                 required=False
                 )
 
@@ -143,6 +482,10 @@ class Arguments():
 
         self.pargs = self.parser.parse_args()
 
+        # The collect action pulls records from a connector instead of reading files
+        if self.pargs.file == None and self.pargs.profile_startup == False and self.pargs.action != "collect":
+            self.parser.error("the following arguments are required: -f/--file")
+
     def get_args(self):
         return self.pargs
 
@@ -153,10 +496,12 @@ class cyh_helpers:
         # Setup logging
         self.utilities = utils.HelperMod()
         self.transforms = transforms.HelperMod()
+        self.parallel = parallel.HelperMod()
+        self.stats = None
         self.logger = self.utilities.get_logger('CYBERNETHUNTER')
 
     # Define an "init_output_pipe" function that will initialize the output pipe for the records processed by the parsermods.
-    def init_output_pipe(self, output_pipe, output_type, output_file=None, log_type=None, kafka_broker=None, rabbitmq_broker=None, rabbitmq_credentials=None):
+    def init_output_pipe(self, output_pipe, output_type, output_file=None, log_type=None, kafka_broker=None, rabbitmq_broker=None, rabbitmq_credentials=None, kafka_options=None, rabbitmq_options=None, es_options=None, output_batch_size=None, output_compression=None, output_rotate_size=None, tabular_columns=None, serializer_backend="auto"):
 
         # Helper function to initialize an output pipe
 
@@ -164,71 +509,301 @@ class cyh_helpers:
         self.rabbitmq_broker = rabbitmq_broker.split(" ")
         self.rabbitmq_credentials = rabbitmq_credentials.split(" ")
 
-        self.output_pipe = cyout.Output(output_pipe=output_pipe, output_type=output_type, output_file=output_file, log_type=log_type, kafka_broker=self.kafka_broker, rabbitmq_broker=self.rabbitmq_broker, rabbitmq_credentials=self.rabbitmq_credentials)
-
-    def send_to_output_pipe(self, data, use_streamz=False):
-        # Helper function to iterate over a generator and send each record through the output pipe
+        # kafka_options: producer tuning passed straight to the Output (kafka_batch_size, kafka_linger_ms, etc.)
+        if kafka_options == None:
+            kafka_options = {}
+
+        # rabbitmq_options: publisher settings passed straight to the Output (rabbitmq_exchange, rabbitmq_routing_key, etc.)
+        if rabbitmq_options == None:
+            rabbitmq_options = {}
+
+        # es_options: elasticsearch bulk settings passed straight to the Output (es_hosts, es_index_prefix, etc.)
+        if es_options == None:
+            es_options = {}
+
+        self.output_pipe = cyout.Output(output_pipe=output_pipe, output_type=output_type, output_file=output_file, log_type=log_type, kafka_broker=self.kafka_broker, rabbitmq_broker=self.rabbitmq_broker, rabbitmq_credentials=self.rabbitmq_credentials, output_batch_size=output_batch_size, output_compression=None if output_compression == "none" else output_compression, output_rotate_size=output_rotate_size * 1024 * 1024 if output_rotate_size else None, tabular_columns=tabular_columns, serializer_backend=serializer_backend, **kafka_options, **rabbitmq_options, **es_options)
+        self.output_pipe.define_output_workflow()
+
+    def get_rabbitmq_options(self, pargs):
+        # Helper function to collect the rabbitmq publisher settings from the commandline arguments
+
+        return {
+            "rabbitmq_exchange": pargs.rabbitmq_exchange,
+            "rabbitmq_routing_key": pargs.rabbitmq_routing_key,
+            "rabbitmq_channels": pargs.rabbitmq_channels,
+            "rabbitmq_max_in_flight": pargs.rabbitmq_max_in_flight
+        }
+
+    def get_es_options(self, pargs):
+        # Helper function to collect the elasticsearch bulk settings from the commandline arguments
+
+        return {
+            "es_hosts": pargs.es_hosts.split(" "),
+            "es_credentials": pargs.es_credentials.split(" ") if pargs.es_credentials else None,
+            "es_index_prefix": pargs.es_index_prefix,
+            "es_bulk_workers": pargs.es_bulk_workers,
+            "es_bulk_bytes": pargs.es_bulk_bytes,
+            "es_verify_ssl": not pargs.es_no_verify_ssl
+        }
+
+    def get_kafka_options(self, pargs):
+        # Helper function to collect the kafka producer settings from the commandline arguments
+
+        return {
+            "kafka_batch_size": pargs.kafka_batch_size,
+            "kafka_linger_ms": pargs.kafka_linger_ms,
+            "kafka_compression": None if pargs.kafka_compression == "none" else pargs.kafka_compression,
+            "kafka_max_in_flight": pargs.kafka_max_in_flight
+        }
+
+    def send_to_output_pipe(self, data, use_streamz=False, hunt_engine=None):
+        # Helper function to iterate over a generator and send each record through the output pipe.
+        # With a hunt_engine (hunt action) every record goes through hunt_engine.hunt_record first and
+        # the records it drops (no hits) are not sent
 
         self.logger.info('Running records through output pipe')
         print('\n')
 
+        # Time spent in each stage is measured around the parsermod generator (parse), the hunt rules (hunt),
+        # the record conversion (transform) and Output.send (output), see stats.HelperMod
+        if self.stats == None:
+            self.stats = stats.HelperMod()
+
+        parse_stage = self.stats.stage('parse')
+        transform_stage = self.stats.stage('transform')
+        output_stage = self.stats.stage('output')
+        clock = time.perf_counter_ns
+
+        hunt_record = None
+        if hunt_engine != None:
+            hunt_stage = self.stats.stage('hunt')
+            hunt_record = hunt_engine.hunt_record
+
         if use_streamz == False:
 
+            convert_to_type = None
+            if self.output_pipe.output_pipe == 'stdout' and self.output_pipe.output_type in ['csv', 'tsv']:
+                convert_to_type = self.output_pipe.output_type
+
             try:
                 while True:
 
+                    start_ns = clock()
                     record = data.__next__()
-                    
+                    parsed_ns = clock()
+                    parse_stage.record(parsed_ns - start_ns)
+
                     if record == None:
                         continue
-                        
-                    if self.output_pipe.output_pipe == 'stdout':
 
-                        if self.output_pipe.output_type == 'csv':
-                            record = self.transforms.convert_json_record(record, to_type='csv')
-
-                        elif self.output_pipe.output_type == 'tsv':
-                            record = self.transforms.convert_json_record(record, to_type='tsv')
+                    if hunt_record != None:
+                        record = hunt_record(record)
+                        hunted_ns = clock()
+                        hunt_stage.record(hunted_ns - parsed_ns)
+                        parsed_ns = hunted_ns
+                        if record == None:
+                            continue
+
+                    if convert_to_type != None:
+                        record = self.transforms.convert_json_record(record, to_type=convert_to_type)
+                        transformed_ns = clock()
+                        transform_stage.record(transformed_ns - parsed_ns, len(record))
+                    else:
+                        transformed_ns = parsed_ns
 
                     self.output_pipe.send(record)
+                    sent_ns = clock()
+                    output_stage.record(sent_ns - transformed_ns)
+
+                    self.stats.report_progress(sent_ns)
 
             except StopIteration:
                 pass
 
             finally:
+                start_ns = clock()
                 self.output_pipe.close_output_pipe()
+                output_stage.add_time(clock() - start_ns)
 
         else:
 
+            # Records go through the stream in batches, so that the conversion to csv/tsv is done
+            # with a single convert_json_records call per batch
+            batch_size = 1000
+
+            def timed_convert(records, to_type):
+                start_ns = clock()
+                lines = self.transforms.convert_json_records(records, to_type=to_type)
+                transform_stage.record_batch(clock() - start_ns, len(lines), sum(map(len, lines)))
+                return lines
+
+            def timed_send(records):
+                start_ns = clock()
+                for record in records:
+                    self.output_pipe.send(record)
+                sent_ns = clock()
+                output_stage.record_batch(sent_ns - start_ns, len(records))
+                self.stats.report_progress(sent_ns)
+
             try:
 
+                from streamz import Stream
+
                 # Setup Stream Pipeline
                 source_pipe = Stream()
 
-                if self.output_pipe.output_type == 'csv':
-                    source_pipe.map(self.transforms.convert_json_record, to_type='csv').sink(self.output_pipe.send)
+                if self.output_pipe.output_pipe == 'stdout' and self.output_pipe.output_type in ['csv', 'tsv']:
+                    source_pipe.map(timed_convert, to_type=self.output_pipe.output_type).sink(timed_send)
 
-                elif self.output_pipe.output_type == 'tsv':
-                    source_pipe.map(self.transforms.convert_json_record, to_type='tsv').sink(self.output_pipe.send)
-                    
                 else:
-                    source_pipe.sink(self.output_pipe.send)
-                
+                    source_pipe.sink(timed_send)
+
+                batch = []
                 while True:
+                    start_ns = clock()
                     record = data.__next__()
+                    parsed_ns = clock()
+                    parse_stage.record(parsed_ns - start_ns)
                     if record == None:
                         continue
-                    
-                    source_pipe.emit(record)
+
+                    if hunt_record != None:
+                        record = hunt_record(record)
+                        hunt_stage.record(clock() - parsed_ns)
+                        if record == None:
+                            continue
+
+                    batch.append(record)
+                    if len(batch) >= batch_size:
+                        source_pipe.emit(batch)
+                        batch = []
 
             except StopIteration:
-                pass
+                if len(batch) > 0:
+                    source_pipe.emit(batch)
 
             finally:
+                start_ns = clock()
                 self.output_pipe.close_output_pipe()
+                output_stage.add_time(clock() - start_ns)
                     
             
 
+    def get_umbrella_record_generator(self, pargs):
+        # Helper function that authenticates against Umbrella and returns a generator of the activity records of the
+        # selected time range, see umbrella_connector.Connector.stream_umbrella_api_activity_records
+
+        connector_options = {}
+        if pargs.umbrella_api_url != None:
+            connector_options["api_base_url"] = pargs.umbrella_api_url
+        if pargs.umbrella_auth_url != None:
+            connector_options["auth_url"] = pargs.umbrella_auth_url
+        if pargs.umbrella_no_cache == True:
+            connector_options["cache_file"] = None
+
+        umbrella = connectors.umbrella_connector.Connector(**connector_options)
+        umbrella.umbrella_authenticate(pargs.umbrella_auth)
+
+        end_time = pargs.umbrella_end_time if pargs.umbrella_end_time != None else datetime.now().isoformat(timespec="seconds")
+        self.logger.info("Collecting Umbrella {} activity of organization {} from {} to {}".format(pargs.umbrella_endpoint, pargs.umbrella_org_id, pargs.umbrella_start_time, end_time))
+
+        return umbrella.stream_umbrella_api_activity_records(
+            start_time=pargs.umbrella_start_time,
+            end_time=end_time,
+            org_id=pargs.umbrella_org_id,
+            api_endpoint=umbrella.umbrella_api_activity_endpoint[pargs.umbrella_endpoint],
+            records_limit=pargs.umbrella_records_limit,
+            time_window_minute_increments=pargs.umbrella_window_minutes,
+            domains_filter=[domain.strip() for domain in pargs.umbrella_domains.split(",") if domain.strip() != ""] if pargs.umbrella_domains != None else [],
+            time_zone="UTC",
+            batch_size=pargs.chunk_size
+        )
+
+    def get_record_generator(self, targetfiles, pargs):
+        # Helper function that returns a generator of the records of all the target files
+
+        # Fan out the files across a pool of processes that feed the output pipe
+        if pargs.workers > 1 and len(targetfiles) > 1:
+            return self.parallel.parse_files(
+                target_files=targetfiles,
+                module_name=pargs.module,
+                parsermod_options=self.get_parsermod_options(pargs),
+                workers=pargs.workers,
+                ordered=(pargs.worker_order == "ordered")
+            )
+
+        return self.parse_files(targetfiles, pargs)
+
+    def scan_schema(self, targetfiles, pargs):
+        # Helper function that runs the parsermod over the target files and returns the union of the
+        # fields of all records in order of appearance, each distinct set of keys is only inspected once
+
+        self.logger.info("Scanning the schema of the records")
+
+        columns = {}
+        schemas = set()
+
+        for record in self.get_record_generator(targetfiles, pargs):
+            if record == None:
+                continue
+
+            schema = tuple(record)
+            if schema not in schemas:
+                schemas.add(schema)
+                columns.update(dict.fromkeys(schema))
+
+        self.logger.info("Found {} columns in {} different schemas".format(len(columns), len(schemas)))
+
+        return list(columns)
+
+    def parse_files(self, targetfiles, pargs):
+        # Helper function that runs the selected parsermod over each target file, one after the other,
+        # and chains their records into a single generator
+
+        for file in targetfiles:
+            # Load the required parsermod
+            load_parser_mod = parsermods.load_parsermod(pargs.module)
+            parsermod = load_parser_mod.ParserMod(file, **self.get_parsermod_options(pargs))
+            # Execute parsermod
+            yield from parsermod.execute()
+
+    def get_parsermod_options(self, pargs):
+        # Helper function to collect the keyword arguments that are specific to the selected parsermod
+
+        if pargs.module == "csv_parser":
+            return {"csv_engine": pargs.csv_engine, "chunk_size": pargs.chunk_size, "normalize_multilines": pargs.csv_multilines}
+
+        elif pargs.module == "evtx_parser":
+            number_of_threads = pargs.evtx_threads
+            # Avoid oversubscribing the cores when several worker processes run the rust parser at the same time
+            if number_of_threads == 0 and pargs.workers > 1:
+                number_of_threads = max(1, (os.cpu_count() or 1) // pargs.workers)
+            return {"number_of_threads": number_of_threads}
+
+        elif pargs.module == "xml_parser":
+            return {"xmlparsetype": pargs.xmlparsetype, "xmlengine": pargs.xmlengine}
+
+        return {}
+
+    def report_startup_profile(self, pargs):
+        # Helper function to log the import cost of the core modules, the selected parsermod and each dependency
+
+        modules = [
+            "cybernethunter",
+            "cybernethunter.outputmods.output",
+            "cybernethunter.parsermods.{}".format(pargs.module),
+            "coloredlogs", "yaml", "streamz", "pandas", "numpy", "tldextract", "fsspec", "evtx", "lxml",
+            "kafka", "pika", "pyarrow", "orjson", "requests"
+        ]
+
+        self.logger.info("Profiling the import cost of {} modules".format(len(modules)))
+
+        for result in self.utilities.profile_imports(modules):
+            if result['seconds'] == None:
+                self.logger.info("{:<45} not installed or failed to import".format(result['module']))
+            else:
+                self.logger.info("{:<45} {:>9.1f} ms  {:>5} modules loaded".format(result['module'], result['seconds'] * 1000, result['modules_loaded']))
+
     def list_targetfiles(self, pargs):
         # Checking to see if a directory or only one file was passed in as argument
         # to "--file"
@@ -252,6 +827,8 @@ class cyh_helpers:
                     file_type_filter = ".csv"
                 elif pargs.log_type == "xml":
                     file_type_filter = ".xml"
+                elif pargs.log_type == "evtx":
+                    file_type_filter = ".evtx"
                 else:
                     file_type_filter = ""
             
@@ -275,6 +852,11 @@ def main():
 
     helpers.logger.info("Starting CYBERNETHUNTER Hunting Framework")
 
+    # CYBERNETHUNTER STARTUP PROFILE
+    if pargs.profile_startup == True:
+        helpers.report_startup_profile(pargs)
+        return
+
     # CYBERNETHUNTER ACTION: PARSE
     if pargs.action == "parse":
 
@@ -283,54 +865,160 @@ def main():
         # Obtain a list of all target files
         targetfiles = helpers.list_targetfiles(pargs)
 
-        # Iterating over the results and closing pipe at the end    
+        # Pipeline instrumentation, the size of the target files is the input byte count
+        helpers.stats = stats.HelperMod(progress_interval=pargs.progress_interval)
         for file in targetfiles:
-            
-            # Running a check to determine whether we have a file name for the output if a file pipe is selected
-            if pargs.output_pipe == 'file' and pargs.output_file == None:
-                helpers.logger.error("You must specify a --output-file parameter if you are choosing a file output pipe")
-                sys.exit()
-
-            # Start an output pipe
-            helpers.init_output_pipe(
-                output_pipe=pargs.output_pipe,
-                output_type=pargs.output_type,
-                output_file=pargs.output_file,
-                log_type=pargs.log_type,
-                kafka_broker=pargs.kafka_broker,
-                rabbitmq_broker=pargs.rabbitmq_broker,
-                rabbitmq_credentials=pargs.rabbitmq_credentials
-            )
+            try:
+                helpers.stats.add_input_bytes(os.path.getsize(file))
+            except OSError:
+                pass
 
-            # Load the required parsermod
-            load_parser_mod = importlib.import_module("." + pargs.module, "parsermods")
-            parsermod = load_parser_mod.ParserMod(file)
-            # Execute parsermod
-            record_generator = parsermod.execute()
-            # Send records to output pipe
-            helpers.send_to_output_pipe(record_generator, use_streamz=False)
+        # Running a check to determine whether we have a file name for the output if a file pipe is selected
+        if pargs.output_pipe == 'file' and pargs.output_file == None:
+            helpers.logger.error("You must specify a --output-file parameter if you are choosing a file output pipe")
+            sys.exit()
+
+        # Two-pass tabular outputs: compute the columns of the csv/tsv file before writing it
+        tabular_columns = None
+        if pargs.output_pipe == 'file' and pargs.output_type in ['csv', 'tsv'] and pargs.tabular_mode == 'scan':
+            tabular_columns = helpers.scan_schema(targetfiles, pargs)
+
+        # Start an output pipe, a single pipe is shared by all target files
+        helpers.init_output_pipe(
+            output_pipe=pargs.output_pipe,
+            output_type=pargs.output_type,
+            output_file=pargs.output_file,
+            log_type=pargs.log_type,
+            kafka_broker=pargs.kafka_broker,
+            rabbitmq_broker=pargs.rabbitmq_broker,
+            rabbitmq_credentials=pargs.rabbitmq_credentials,
+            kafka_options=helpers.get_kafka_options(pargs),
+            rabbitmq_options=helpers.get_rabbitmq_options(pargs),
+            es_options=helpers.get_es_options(pargs),
+            output_batch_size=pargs.output_batch_size,
+            output_compression=pargs.output_compression,
+            output_rotate_size=pargs.output_rotate_size,
+            tabular_columns=tabular_columns,
+            serializer_backend=pargs.serializer
+        )
+
+        # Records of all target files, parsed by a pool of processes when more than one worker is requested
+        record_generator = helpers.get_record_generator(targetfiles, pargs)
+
+        # Send records to output pipe
+        helpers.send_to_output_pipe(record_generator, use_streamz=False)
+
+        # Report the records/s and latency of each stage
+        helpers.stats.report(stats_file=pargs.stats_file)
 
     # CYBERNETHUNTER ACTION: COLLECT
     if pargs.action == "collect":
         helpers.logger.info("Initiating CYBERNETHUNTER DFIR Collector")
-        helpers.logger.info("Starting CYBERNETHUNTER MultiParser")
+
+        if pargs.umbrella_org_id == None or pargs.umbrella_start_time == None or pargs.umbrella_auth == None:
+            helpers.logger.error("You must specify the --umbrella-org-id, --umbrella-start-time and --umbrella-auth (or UMBRELLA_AUTH_B64) parameters to collect Umbrella activity")
+            sys.exit()
+
+        # Running a check to determine whether we have a file name for the output if a file pipe is selected
+        if pargs.output_pipe == 'file' and pargs.output_file == None:
+            helpers.logger.error("You must specify a --output-file parameter if you are choosing a file output pipe")
+            sys.exit()
+
+        # Pipeline instrumentation, the "parse" stage measures the time spent waiting for the API
+        helpers.stats = stats.HelperMod(progress_interval=pargs.progress_interval)
+
+        # Start an output pipe, csv/tsv files always use the spill mode since the API can't be read twice
+        helpers.init_output_pipe(
+            output_pipe=pargs.output_pipe,
+            output_type=pargs.output_type,
+            output_file=pargs.output_file,
+            log_type="umbrella",
+            kafka_broker=pargs.kafka_broker,
+            rabbitmq_broker=pargs.rabbitmq_broker,
+            rabbitmq_credentials=pargs.rabbitmq_credentials,
+            kafka_options=helpers.get_kafka_options(pargs),
+            rabbitmq_options=helpers.get_rabbitmq_options(pargs),
+            es_options=helpers.get_es_options(pargs),
+            output_batch_size=pargs.output_batch_size,
+            output_compression=pargs.output_compression,
+            output_rotate_size=pargs.output_rotate_size,
+            serializer_backend=pargs.serializer
+        )
+
+        # Records are streamed from the API straight to the output pipe, in batches of --chunk-size records
+        # whose timestamps are converted at once
+        def record_generator():
+            for batch in helpers.get_umbrella_record_generator(pargs):
+                yield from batch
+
+        helpers.send_to_output_pipe(record_generator(), use_streamz=False)
+
+        # Report the records/s and latency of each stage
+        helpers.stats.report(stats_file=pargs.stats_file)
+
+    # CYBERNETHUNTER ACTION: HUNT
+    elif pargs.action == "hunt":
+        helpers.logger.info("Starting CYBERNETHUNTER Hunt Engine")
+
+        if pargs.hunt_template == None:
+            helpers.logger.error("You must specify a --hunt-template parameter to run the hunt action")
+            sys.exit()
+
+        # Running a check to determine whether we have a file name for the output if a file pipe is selected
+        if pargs.output_pipe == 'file' and pargs.output_file == None:
+            helpers.logger.error("You must specify a --output-file parameter if you are choosing a file output pipe")
+            sys.exit()
+
+        # All the rules of the template(s) are compiled once and evaluated in a single pass over the records
+        try:
+            hunt_engine = huntmods.hunt_engine.HuntMod(pargs.hunt_template, hits_only=(pargs.hunt_all_records == False))
+        except (OSError, ValueError) as e:
+            helpers.logger.error("Could not load the hunt template {}: {}".format(pargs.hunt_template, e))
+            sys.exit()
 
         # Obtain a list of all target files
         targetfiles = helpers.list_targetfiles(pargs)
 
-        # Iterating over the results and closing pipe at the end    
+        # Pipeline instrumentation, the size of the target files is the input byte count
+        helpers.stats = stats.HelperMod(progress_interval=pargs.progress_interval)
         for file in targetfiles:
-            parsermod = importlib.import_module("." + pargs.module, "parsermods")
-            parsermod = parsermod.ParserMod(pargs.logtype, file, pargs.output, collect=True)
-            parsermod.execute()
-            parsermod.runpipe(parsermod.results)
+            try:
+                helpers.stats.add_input_bytes(os.path.getsize(file))
+            except OSError:
+                pass
 
-    # CYBERNETHUNTER ACTION: HUNT
-    elif pargs.action == "hunt":
-        # TBD: idea is to load the hunt-template and pass execution of the template
-        # to the "jaguarhunter" (imports PySpark) module inside huntmods. This module(s) will load the template
-        # and produce an ElasticSearch Index as output
-        print("TBD")
+        # Two-pass tabular outputs: the scan doesn't run the rules, so the hunt tags are added to its columns
+        tabular_columns = None
+        if pargs.output_pipe == 'file' and pargs.output_type in ['csv', 'tsv'] and pargs.tabular_mode == 'scan':
+            tabular_columns = helpers.scan_schema(targetfiles, pargs)
+            tabular_columns = tabular_columns + [field for field in huntmods.hunt_engine.TAG_FIELDS if field not in tabular_columns]
+
+        # Start an output pipe, a single pipe is shared by all target files
+        helpers.init_output_pipe(
+            output_pipe=pargs.output_pipe,
+            output_type=pargs.output_type,
+            output_file=pargs.output_file,
+            log_type=pargs.log_type,
+            kafka_broker=pargs.kafka_broker,
+            rabbitmq_broker=pargs.rabbitmq_broker,
+            rabbitmq_credentials=pargs.rabbitmq_credentials,
+            kafka_options=helpers.get_kafka_options(pargs),
+            rabbitmq_options=helpers.get_rabbitmq_options(pargs),
+            es_options=helpers.get_es_options(pargs),
+            output_batch_size=pargs.output_batch_size,
+            output_compression=pargs.output_compression,
+            output_rotate_size=pargs.output_rotate_size,
+            tabular_columns=tabular_columns,
+            serializer_backend=pargs.serializer
+        )
+
+        # Records of all target files go through the hunt engine on their way to the output pipe
+        record_generator = helpers.get_record_generator(targetfiles, pargs)
+        helpers.send_to_output_pipe(record_generator, use_streamz=False, hunt_engine=hunt_engine)
+
+        # Report the hits of each rule and the records/s and latency of each stage
+        hunt_engine.report()
+        helpers.stats.report(stats_file=pargs.stats_file)
 
     # Capturing end time for debugging purposes
     et = datetime.now()
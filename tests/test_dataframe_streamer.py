@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+'''
+ NAME: test_dataframe_streamer.py | version: 0.1
+ CYBERNETHUNTER Version: 0.3
+ AUTHOR: Diego Perez (@darkquasar) - 2026
+ DESCRIPTION: Checks that the key partitioning streamer keeps every record and every column of a partition, whether it
+ is kept as a dataframe or flushed to CSV in several chunks with different fields.
+
+ USAGE:
+    python -m pytest -q tests
+
+ Updates:
+        v0.1 - 18-10-2026 - Created script.
+
+'''
+
+import pandas as pd
+
+from cybernethunter.streamers import dataframe_streamer
+
+RECORDS = [
+    {'EventID': '4624', 'TargetUserName': 'user1'},
+    {'EventID': '4688', 'CommandLine': 'cmd.exe /c whoami'},
+    {'EventID': '4624', 'TargetUserName': 'user2'},
+    {'EventID': '4624', 'TargetUserName': 'admin', 'IpAddress': '10.0.1.1'},
+    {'EventID': '4688', 'CommandLine': 'notepad.exe', 'ParentProcessName': 'explorer.exe'},
+    {'EventID': '4624', 'LogonType': '3'},
+]
+
+def expected_partition(value):
+
+    records = [record for record in RECORDS if record['EventID'] == value]
+    columns = list(dict.fromkeys(key for record in records for key in record))
+    return pd.DataFrame([[record.get(column) for column in columns] for record in records], columns=columns)
+
+def test_partitions_to_dataframes():
+
+    df_dict = dataframe_streamer.Streamer().stream_to_dataframe_by_key(None, 'EventID', records=RECORDS, buffer_size=2)
+
+    assert sorted(df_dict) == ['4624_df', '4688_df']
+    for value in ['4624', '4688']:
+        pd.testing.assert_frame_equal(df_dict[value + '_df'].fillna('').astype(str), expected_partition(value).fillna('').astype(str))
+
+def test_partitions_to_csv_keep_columns_of_later_chunks(tmp_path):
+
+    target_file = str(tmp_path / 'security_{}.csv')
+    df_dict = dataframe_streamer.Streamer().stream_to_dataframe_by_key(['4624', '4688'], 'EventID', records=RECORDS, buffer_size=2, target_file=target_file)
+
+    assert df_dict == {'4624_df': target_file.format('4624'), '4688_df': target_file.format('4688')}
+    for value in ['4624', '4688']:
+        dataframe = pd.read_csv(df_dict[value + '_df'], dtype=str, keep_default_na=False)
+        pd.testing.assert_frame_equal(dataframe, expected_partition(value).fillna('').astype(str))
+    assert list(tmp_path.glob('.cybernethunter_spill_*')) == []
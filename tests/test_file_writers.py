@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+'''
+ NAME: test_file_writers.py | version: 0.1
+ CYBERNETHUNTER Version: 0.3
+ AUTHOR: Diego Perez (@darkquasar) - 2026
+ DESCRIPTION: Checks that the column-aligned CSV/TSV writer puts every value of records with different fields under the
+ right column, including values bigger than the csv module's default field size limit (128 KB).
+
+ USAGE:
+    python -m pytest -q tests
+
+ Updates:
+        v0.1 - 18-10-2026 - Created script.
+
+'''
+
+import csv
+
+import pytest
+
+from cybernethunter.outputmods import file_writers
+
+BIG_VALUE = 'A' * 200000 + ',"quoted"\nline'
+
+RECORDS = [
+    {'EventID': '4688', 'CommandLine': 'cmd.exe /c whoami'},
+    {'EventID': '4104', 'ScriptBlockText': BIG_VALUE, 'Path': 'C:\\script.ps1'},
+    {'Path': 'C:\\other.ps1', 'EventID': '4104'},
+    {'EventID': '4688', 'CommandLine': 'notepad.exe'},
+]
+
+def read_rows(file_paths, delimiter):
+    # Rows of all the parts of the output, each part starts with its own header
+
+    limit = csv.field_size_limit(file_writers.SPILL_FIELD_SIZE_LIMIT)
+    try:
+        header = None
+        rows = []
+        for file_path in file_paths:
+            with open(file_path, mode='r', newline='', encoding='utf-8') as output_file:
+                reader = csv.reader(output_file, delimiter=delimiter)
+                part_header = next(reader)
+                assert header == None or part_header == header
+                header = part_header
+                rows.extend(reader)
+    finally:
+        csv.field_size_limit(limit)
+
+    return header, rows
+
+@pytest.mark.parametrize('columns', [None, ['EventID', 'CommandLine', 'ScriptBlockText', 'Path']], ids=['spill', 'scan'])
+@pytest.mark.parametrize('rotate_size', [None, 1000], ids=['single', 'rotated'])
+def test_mixed_schemas_with_big_field(tmp_path, columns, rotate_size):
+
+    writer = file_writers.TabularFileWriter(str(tmp_path / 'output.csv'), delimiter=',', batch_size=2, rotate_size=rotate_size, columns=columns)
+    for record in RECORDS:
+        writer.write(dict(record))
+    writer.close()
+
+    header, rows = read_rows(writer.files, ',')
+
+    assert sorted(header) == sorted({key for record in RECORDS for key in record})
+    assert [dict(zip(header, row)) for row in rows] == [{column: record.get(column, '') for column in header} for record in RECORDS]
+    assert list(tmp_path.glob('.cybernethunter_spill_*')) == []
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+
+'''
+ NAME: test_hunt_engine.py | version: 0.1
+ CYBERNETHUNTER Version: 0.3
+ AUTHOR: Diego Perez (@darkquasar) - 2026
+ DESCRIPTION: Checks the hits of the compiled hunt engine against a naive evaluator that runs every rule on every record,
+ over hand written rules (all/any conditions, exclude, the "all" modifier, nested paths, numeric comparisons) and a few
+ hundred generated ones.
+
+ USAGE:
+    python -m pytest -q tests
+
+ Updates:
+        v0.1 - 18-10-2026 - Created script.
+
+'''
+
+import random
+import re
+
+import pytest
+import yaml
+
+from cybernethunter.huntmods import hunt_engine
+
+RECORDS = [
+    {'EventID': '4688', 'CommandLine': 'foo only', 'NewProcessName': 'C:\\Windows\\powershell.exe', 'EventRecordID': '10'},
+    {'EventID': '4688', 'CommandLine': 'foo and BAR', 'NewProcessName': 'C:\\Windows\\cmd.exe', 'EventRecordID': '250'},
+    {'EventID': 4624, 'LogonType': '3', 'TargetUserName': 'Admin99', 'IpAddress': '10.0.9.1', 'EventRecordID': 'n/a'},
+    {'EventID': '4624', 'LogonType': 10, 'TargetUserName': 'user1', 'IpAddress': '10.0.1.1'},
+    {'System': {'EventID': '4624', 'Computer': 'WKS001.corp.local'}, 'EventData': {'Data': ['S-1-5-18', 'user1', '5']}},
+    {'System': {'EventID': '4688', 'Computer': 'SRV01.corp.local'}, 'EventData': {'Data': ['S-1-5-18', 'admin']}},
+]
+
+RULES = [
+    {'name': 'exclude_all_values', 'match': {'EventID': 4688}, 'exclude': {'CommandLine|contains|all': ['foo', 'bar']}},
+    {'name': 'exclude_any_value', 'match': {'EventID': 4688}, 'exclude': {'CommandLine|contains': ['bar', 'baz']}},
+    {'name': 'match_all_values', 'match': {'CommandLine|contains|all': ['FOO', 'bar']}},
+    {'name': 'condition_any', 'condition': 'any', 'match': {'TargetUserName|endswith|cased': '99', 'IpAddress|re': r'^10\.0\.1\.'}},
+    {'name': 'condition_all', 'match': {'EventID': [4624, 4625], 'LogonType': [3, 10]}},
+    {'name': 'nested_path', 'match': {'System.EventID': 4624, 'EventData.Data': 'USER1'}},
+    {'name': 'nested_startswith', 'match': {'System.Computer|startswith': ['srv', 'dc']}},
+    {'name': 'numeric', 'match': {'EventRecordID|gte': 100, 'EventRecordID|lt': 1000}},
+    {'name': 'numeric_any_threshold', 'match': {'EventRecordID|lt': [5, 20]}},
+]
+
+def get_field_value(record, field):
+
+    value = record.get(field)
+    if value == None and '.' in field:
+        value = record
+        for key in field.split('.'):
+            value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+def naive_predicate(record, field_spec, values):
+    # Straightforward implementation of the template format described in hunt_engine.py
+
+    field, *modifiers = field_spec.split('|')
+    value = get_field_value(record, field)
+    if value == None:
+        return False
+
+    items = value if isinstance(value, list) else [value]
+    values = values if isinstance(values, list) else [values]
+    modifier = ([modifier for modifier in modifiers if modifier not in ['all', 'cased']] or ['equals'])[0]
+    cased = 'cased' in modifiers or modifier in ['re', 'gt', 'gte', 'lt', 'lte']
+
+    def item_matches(item, expected):
+        item = str(item)
+        if modifier in ['gt', 'gte', 'lt', 'lte']:
+            try:
+                number = float(item)
+            except ValueError:
+                return False
+            return {'gt': number > expected, 'gte': number >= expected, 'lt': number < expected, 'lte': number <= expected}[modifier]
+        if modifier == 're':
+            return re.search(str(expected), item) != None
+        if not cased:
+            item, expected = item.lower(), str(expected).lower()
+        expected = str(expected)
+        return {'equals': item == expected, 'contains': expected in item, 'startswith': item.startswith(expected), 'endswith': item.endswith(expected)}[modifier]
+
+    def value_matches(expected):
+        return any(item_matches(item, expected) for item in items if item != None)
+
+    if 'all' in modifiers:
+        return all(value_matches(expected) for expected in values)
+    return any(value_matches(expected) for expected in values)
+
+def naive_hits(rules, record):
+
+    hits = []
+    for rule in rules:
+        results = [naive_predicate(record, field_spec, values) for field_spec, values in rule['match'].items()]
+        hit = all(results) if rule.get('condition', 'all') == 'all' else any(results)
+        if hit and any(naive_predicate(record, field_spec, values) for field_spec, values in (rule.get('exclude') or {}).items()):
+            hit = False
+        if hit:
+            hits.append(rule['name'])
+    return hits
+
+def generate_rules(records, count, seed=1):
+    # Random rules built out of the values of the records, so that a good share of them hit
+
+    generator = random.Random(seed)
+    flat_records = [record for record in records if 'System' not in record]
+    fields = sorted({field for record in flat_records for field in record})
+    modifiers = ['', 'contains', 'startswith', 'endswith', 'cased', 'contains|all', 'contains|cased', 're', 'gte', 'lt']
+    rules = []
+
+    for number in range(count):
+        match = {}
+        for field in generator.sample(fields, generator.randint(1, 3)):
+            value = str(generator.choice(flat_records).get(field, 'x'))
+            modifier = generator.choice(modifiers)
+            if modifier in ['gte', 'lt']:
+                match['EventRecordID|' + modifier] = generator.randint(0, 300)
+            elif modifier == 're':
+                match[field + '|re'] = re.escape(value[:2]) + '.*'
+            elif modifier == 'contains|all':
+                match[field + '|contains|all'] = [value[:2].upper(), value[-2:]]
+            elif modifier == '':
+                match[field] = generator.choice([value, [value, 'other'], value.upper()])
+            else:
+                match[field + '|' + modifier] = [value[:generator.randint(1, len(value))], 'zz']
+
+        rule = {'name': 'generated_{}'.format(number), 'condition': generator.choice(['all', 'any']), 'match': match}
+        if generator.random() < 0.3:
+            field = generator.choice(fields)
+            value = str(generator.choice(flat_records).get(field, 'q'))
+            rule['exclude'] = {field + generator.choice(['|contains', '|contains|all']): [value[:2], value[-2:]]}
+        rules.append(rule)
+
+    return rules
+
+def load_engine(tmp_path, rules):
+
+    template_file = tmp_path / 'template.yml'
+    template_file.write_text(yaml.safe_dump({'title': 'test', 'rules': rules}))
+    return hunt_engine.HuntMod(str(template_file))
+
+def engine_hits(engine, record):
+
+    return [engine.rules[index]['name'] for index in engine.match_record(record)]
+
+def test_exclude_all_only_discards_when_every_value_matches(tmp_path):
+
+    engine = load_engine(tmp_path, RULES[:2])
+
+    assert engine_hits(engine, {'EventID': 4688, 'CommandLine': 'foo only'}) == ['exclude_all_values', 'exclude_any_value']
+    assert engine_hits(engine, {'EventID': 4688, 'CommandLine': 'foo and bar'}) == []
+
+@pytest.mark.parametrize('rules', [RULES, generate_rules(RECORDS, 300)], ids=['handwritten', 'generated'])
+def test_hits_match_naive_evaluator(tmp_path, rules):
+
+    engine = load_engine(tmp_path, rules)
+
+    # Twice, so that the second pass goes through the memoized hits of each mask
+    for record in RECORDS + RECORDS:
+        assert engine_hits(engine, record) == naive_hits(rules, record)
+
+def test_hunt_tags_hits_and_drops_misses(tmp_path):
+
+    engine = load_engine(tmp_path, RULES)
+    records = list(engine.hunt(dict(record) for record in RECORDS))
+
+    assert len(records) == len([record for record in RECORDS if naive_hits(RULES, record)])
+    for record in records:
+        assert record['hunt_template'] == 'test'
+        assert record['hunt_rules'] == naive_hits(RULES, {key: value for key, value in record.items() if key not in hunt_engine.TAG_FIELDS})